@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ApisConfig(AppConfig):
+    name = 'apibot.apis'
+    verbose_name = "APIs"
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import os
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import cache as shared_cache
+from django.db import connection, transaction
+from django.db.backends.base.creation import TEST_DATABASE_PREFIX
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from .cache import response_cache, spec_cache
+from .lists import general_data, info_fields, swagger_fields
+from .models import Swagger, normalize_name
+from .restviews import BotView
+from .synthetic import definition_name, generate_body, operation_id, resource_path
+
+
+BENCHMARK_API = 'benchmark'
+CATALOG_BATCH_SIZE = 1000
+
+
+def percentile(values, q):
+    """
+    :param values: Sorted values
+    :param q: The percentile, from 0 to 100
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))]
+
+
+def bot_payload(action, **parameters):
+    return {
+        'lang': 'en',
+        'timestamp': '2017-08-01T12:00:00.000Z',
+        'sessionId': 'benchmark',
+        'result': {
+            'parameters': dict(parameters, api=BENCHMARK_API),
+            'contexts': [],
+            'resolvedQuery': 'benchmark',
+            'source': 'agent',
+            'action': action,
+        },
+    }
+
+
+def spec_actions(paths):
+    """
+    Returns the questions asked about a generated spec, as (name, payload),
+    about something in the middle of it.
+    """
+    middle = max(paths // 2, 0)
+    actions = [
+        ('api.info {0}'.format(data), bot_payload('api.info', data=data))
+        for data in info_fields + swagger_fields + general_data
+    ]
+    actions += [
+        ('api.object-definition', bot_payload('api.object-definition', object=definition_name(middle))),
+        ('api.operation', bot_payload('api.operation', operation=operation_id('get', middle))),
+        ('api.path', bot_payload('api.path', path='/v1{0}'.format(resource_path(middle)))),
+    ]
+    return actions
+
+
+def catalog_actions():
+    return [
+        ('api.list', bot_payload('api.list')),
+        ('api.info title', bot_payload('api.info', data='title')),
+    ]
+
+
+def is_test_database(connection):
+    """
+    Whether a connection is to a database made by the test runner, or
+    to an in-memory SQLite one.
+    :rtype: bool
+    """
+    name = str(connection.settings_dict['NAME'])
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db(name):
+        return True
+    return name == connection.settings_dict['TEST'].get('NAME') or \
+        os.path.basename(name).startswith(TEST_DATABASE_PREFIX)
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """
+    Runs on a test database, created and destroyed as the test runner
+    does, so that the APIs of the configured database are never touched
+    nor locked. Uses the current one when it already is a test database.
+    """
+    if is_test_database(connection):
+        yield
+        return
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+@contextmanager
+def isolated():
+    """
+    Runs a benchmark on its own: local caches, no job queue, no network,
+    and a transaction that is rolled back, so nothing it does stays.
+    """
+    def no_network(*args, **kwargs):
+        raise RuntimeError('Benchmarks do not use the network')
+
+    with override_settings(
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'apibot-benchmark'}},
+        APIBOT_JOB_QUEUE_URL='',
+        APIBOT_JOB_QUEUE_THREAD=False,
+        APIBOT_SPEC_STORE_PATH='',
+    ), mock.patch('requests.sessions.Session.request', side_effect=no_network):
+        with transaction.atomic():
+            try:
+                yield
+            finally:
+                transaction.set_rollback(True)
+                spec_cache.clear()
+                response_cache.clear()
+
+
+class BotBenchmark(object):
+    """
+    Times the answers of BotView to every action, against generated
+    Swagger files of growing size and catalogs of growing numbers of APIs.
+    """
+
+    def __init__(self, runs=30):
+        self.runs = runs
+        self.factory = APIRequestFactory()
+        self.view = BotView.as_view()
+
+    def setup(self, catalog, paths):
+        """
+        Replaces the APIs by a catalog of this many, one of them with
+        a Swagger file of this many paths and definitions.
+        """
+        if not is_test_database(connection):
+            raise RuntimeError('Benchmarks only run on a test database, see test_database()')
+        Swagger.objects.all().delete()
+        swagger = Swagger(name=BENCHMARK_API, swaggerfile='http://api.example.com/swagger.json')
+        swagger.store_swaggerfile(generate_body(paths))
+        swagger.save()
+        others = [
+            Swagger(
+                name='api-{0}'.format(i),
+                slug=normalize_name('api-{0}'.format(i)),
+                swaggerfile='http://api{0}.example.com/swagger.json'.format(i),
+            )
+            for i in range(catalog - 1)
+        ]
+        batch_size = min(CATALOG_BATCH_SIZE, connection.ops.bulk_batch_size(Swagger._meta.concrete_fields, others) or 1)
+        Swagger.objects.bulk_create(others, batch_size=batch_size)
+
+    def ask(self, payload):
+        request = self.factory.post('/api/v1/apis/bot/', payload, format='json')
+        response = self.view(request)
+        response.render()
+        if response.status_code != 200:
+            raise RuntimeError('The bot answered {0}: {1}'.format(response.status_code, response.content[:200]))
+        return response
+
+    def clear(self, parsed=False):
+        shared_cache.clear()
+        response_cache.clear()
+        if parsed:
+            spec_cache.clear()
+
+    def timed(self, payload):
+        start = time.perf_counter()
+        self.ask(payload)
+        return (time.perf_counter() - start) * 1000
+
+    def measure(self, payload):
+        """
+        :rtype: OrderedDict - milliseconds for the first answer, before
+            the Swagger file is parsed, percentiles of answers that are not
+            cached and of answers that are, the peak of memory allocated
+            (KB) and the number of queries for one answer
+        """
+        self.clear(parsed=True)
+        cold = self.timed(payload)
+
+        uncached = []
+        for _i in range(self.runs):
+            self.clear()
+            uncached.append(self.timed(payload))
+        uncached.sort()
+
+        cached = sorted(self.timed(payload) for _i in range(self.runs))
+
+        self.clear()
+        tracemalloc.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                self.ask(payload)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return OrderedDict((
+            ('cold_ms', cold),
+            ('p50_ms', percentile(uncached, 50)),
+            ('p95_ms', percentile(uncached, 95)),
+            ('p99_ms', percentile(uncached, 99)),
+            ('cached_p50_ms', percentile(cached, 50)),
+            ('peak_kb', peak / 1024.0),
+            ('queries', len(queries)),
+        ))
+
+    def run(self, sizes, catalogs):
+        """
+        Benchmarks every action against Swagger files of each size in a
+        catalog of the smallest size, then api.list and a lookup by name
+        in catalogs of each size with the smallest Swagger file.
+        Yields (scenario, action, measures).
+        """
+        with isolated():
+            for paths in sizes:
+                self.setup(min(catalogs), paths)
+                for name, payload in spec_actions(paths):
+                    yield 'paths={0}'.format(paths), name, self.measure(payload)
+            for catalog in catalogs:
+                self.setup(catalog, min(sizes))
+                for name, payload in catalog_actions():
+                    yield 'catalog={0}'.format(catalog), name, self.measure(payload)
+
+
+# Differences below these are noise, whatever the tolerance
+LATENCY_FLOOR_MS = 1.0
+MEMORY_FLOOR_KB = 64.0
+
+# Measures that do not depend on the machine, which a shared baseline keeps
+PORTABLE_MEASURES = ('queries', 'peak_kb')
+
+
+def compare(results, baseline, tolerance=0.5, latency=False):
+    """
+    Finds regressions against a baseline: more queries than before, or
+    a peak memory, and with latency a p95 latency, more than tolerance
+    above it. Latencies only compare with a baseline of the same machine.
+    :param results: {'scenario action': measures}
+    :param baseline: The same, saved by a previous run
+    :rtype: list of str - the regressions
+    """
+    checks = [('peak_kb', MEMORY_FLOOR_KB, 'KB')]
+    if latency:
+        checks.append(('p95_ms', LATENCY_FLOOR_MS, 'ms'))
+    regressions = []
+    for key, measures in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if measures['queries'] > before['queries']:
+            regressions.append('{0}: {1} queries instead of {2}'.format(key, measures['queries'], before['queries']))
+        for measure, floor, unit in checks:
+            if measure not in before:
+                raise ValueError('The baseline has no {0}, save one with latencies on this machine'.format(measure))
+            if measures[measure] > before[measure] * (1 + tolerance) and measures[measure] - before[measure] > floor:
+                regressions.append('{0}: {1} {2:.1f} {3} instead of {4:.1f} {3}'.format(
+                    key, measure, measures[measure], unit, before[measure]))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def save_baseline(path, results, latency=False):
+    """
+    :param latency: Whether to keep latencies too, for a baseline of this machine only
+    """
+    results = dict(
+        (key, dict(
+            (measure, round(value, 3)) for measure, value in measures.items()
+            if latency or measure in PORTABLE_MEASURES
+        ))
+        for key, measures in results.items()
+    )
+    with open(path, 'w') as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
+        baseline.write('\n')
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import csv
+import io
+import json
+import os
+from collections import namedtuple
+from urllib.parse import urljoin
+from urllib.request import pathname2url
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.exceptions import ValidationError
+
+from .cache import invalidate_api_list
+from .fetch import SpecFetcher
+from .ingest import IngestError, validate_swaggerfile
+from .jobs import enqueue
+from .models import FILE_URL_PREFIX, Swagger, normalize_name
+from .serializers import SwaggerSerializer
+
+
+# One API to import. Swagger files of a directory have a path rather than to be downloaded.
+ImportItem = namedtuple('ImportItem', ('name', 'url', 'path'))
+ImportResult = namedtuple('ImportResult', ('name', 'status', 'id', 'detail'))
+
+CREATED = 'created'
+PENDING = 'pending'
+EXISTS = 'exists'
+INVALID = 'invalid'
+FAILED = 'failed'
+
+# Stays below the 999 parameters SQLite allows in a query
+LOOKUP_BATCH_SIZE = 500
+
+
+def parse_manifest(text, format='json'):
+    """
+    Reads the APIs to import from a manifest: a JSON list of objects,
+    or a CSV file with a header, with a name and a url (or swaggerfile) each.
+    :param format: 'json' or 'csv'
+    :raises ValueError: when the manifest cannot be read
+    :rtype: list of ImportItem
+    """
+    if format == 'csv':
+        return manifest_items(list(csv.DictReader(io.StringIO(text))))
+    return manifest_items(json.loads(text))
+
+
+def manifest_items(rows):
+    """
+    :param rows: The decoded manifest, a list of dicts or {'apis': [...]}
+    :raises ValueError: when it is not
+    :rtype: list of ImportItem
+    """
+    if isinstance(rows, dict):
+        rows = rows.get('apis')
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError('A manifest is a list of objects with a name and a url')
+    return [
+        ImportItem(str(row.get('name') or '').strip(), str(row.get('url') or row.get('swaggerfile') or '').strip(), None)
+        for row in rows
+    ]
+
+
+def read_manifest(path):
+    """
+    Reads the APIs to import from a manifest file, or from a directory of
+    Swagger files, which are named after their files.
+    :rtype: list of ImportItem
+    """
+    if os.path.isdir(path):
+        items = []
+        for filename in sorted(os.listdir(path)):
+            name, extension = os.path.splitext(filename)
+            if extension.lower() == '.json':
+                filename = os.path.abspath(os.path.join(path, filename))
+                items.append(ImportItem(name, urljoin(FILE_URL_PREFIX, pathname2url(filename)), filename))
+        return items
+    with open(path, encoding='utf-8') as manifest:
+        return parse_manifest(manifest.read(), 'csv' if path.lower().endswith('.csv') else 'json')
+
+
+class BulkImport(object):
+    """
+    Adds many APIs at once.
+
+    run() downloads and validates the Swagger files itself, from a pool
+    of threads with a limit per host, and inserts the APIs in batches.
+    queue() only inserts the APIs, pending, and leaves their Swagger
+    files to the ingestion jobs.
+    Both report on every API, as ImportResult.
+    """
+
+    def __init__(self, workers=8, per_host=2, timeout=None, batch_size=100):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.fetcher = SpecFetcher(workers, per_host, timeout)
+
+    def check(self, items):
+        """
+        Splits the items into those to import and the results of the others:
+        incomplete ones, and names or URLs that are taken or given twice.
+        A failed API does not hold on to its URL.
+        :rtype: tuple - (list of ImportItem, list of ImportResult)
+        """
+        accepted = []
+        rejected = []
+        slugs = set()
+        urls = set()
+        url_field = SwaggerSerializer().fields['swaggerfile']
+        for item in items:
+            slug = normalize_name(item.name)
+            url_error = self.check_url(url_field, item)
+            if not item.name or not item.url or len(item.name) > 100 or len(item.url) > 200:
+                rejected.append(ImportResult(item.name, INVALID, None, _('A name and a URL are required.')))
+            elif url_error:
+                rejected.append(ImportResult(item.name, INVALID, None, url_error))
+            elif slug in slugs:
+                rejected.append(ImportResult(item.name, INVALID, None, _('This name is given more than once.')))
+            elif item.url in urls:
+                rejected.append(ImportResult(item.name, INVALID, None, _('This URL is given more than once.')))
+            else:
+                slugs.add(slug)
+                urls.add(item.url)
+                accepted.append(item)
+
+        taken_slugs = set()
+        taken_urls = set()
+        # Two parameters per item
+        batch_size = LOOKUP_BATCH_SIZE // 2
+        for i in range(0, len(accepted), batch_size):
+            batch = accepted[i:i + batch_size]
+            for slug, url, status in Swagger.objects.filter(
+                Q(slug__in=[normalize_name(item.name) for item in batch]) |
+                Q(swaggerfile__in=[item.url for item in batch]) & ~Q(status=Swagger.FAILED),
+            ).values_list('slug', 'swaggerfile', 'status'):
+                taken_slugs.add(slug)
+                if status != Swagger.FAILED:
+                    taken_urls.add(url)
+
+        remaining = []
+        for item in accepted:
+            if normalize_name(item.name) in taken_slugs:
+                rejected.append(ImportResult(item.name, EXISTS, None, _('An API with this name already exists!')))
+            elif item.url in taken_urls:
+                rejected.append(ImportResult(item.name, EXISTS, None, _('An API pointing to this URL already exists!')))
+            else:
+                remaining.append(item)
+        return remaining, rejected
+
+    def check_url(self, field, item):
+        """
+        Validates the URL of an item as the API does. Files of a directory
+        have a file: URL instead, which is never fetched, see Swagger.is_file.
+        :rtype: str - what is wrong with it, if anything
+        """
+        if item.path is not None:
+            return ''
+        try:
+            field.run_validation(item.url)
+        except ValidationError as e:
+            return ' '.join(str(error) for error in e.detail)
+        return ''
+
+    def prepare(self, item):
+        """
+        Downloads or reads, then validates, the Swagger file of an item.
+        Runs in the pool of threads, without touching the database.
+        :rtype: Swagger - not saved yet
+        :raises IngestError: when the Swagger file cannot be added
+        """
+        swagger = Swagger(name=item.name, slug=normalize_name(item.name), swaggerfile=item.url, status=Swagger.READY)
+        if item.path:
+            try:
+                with open(item.path, 'rb') as swaggerfile:
+                    body = swaggerfile.read()
+            except OSError as e:
+                raise IngestError(str(e))
+            validate_swaggerfile(body, item.url)
+            try:
+                swagger.store_swaggerfile(body)
+            except ValueError as e:
+                raise IngestError(str(e))
+            return swagger
+
+        result, error, _elapsed = self.fetcher.fetch(item.url)
+        if error is not None:
+            raise IngestError(_('{0} - This is an invalid URL!').format(item.url))
+        validate_swaggerfile(result.body, result.url)
+        swagger.record_fetch(result, save=False)
+        return swagger
+
+    def run(self, items):
+        """
+        Imports the APIs with their Swagger files.
+        Yields an ImportResult for every item, as they are done.
+        """
+        accepted, rejected = self.check(items)
+        for result in rejected:
+            yield result
+
+        batch = []
+        try:
+            # Files of a directory are read rather than downloaded, from no host
+            prepared = self.fetcher.schedule(self.prepare, accepted, lambda item: None if item.path else item.url)
+            for item, future in prepared:
+                try:
+                    batch.append(future.result())
+                except Exception as e:
+                    yield ImportResult(item.name, FAILED, None, str(e))
+                    continue
+                if len(batch) >= self.batch_size:
+                    for result in self.insert(batch, CREATED):
+                        yield result
+                    batch = []
+            for result in self.insert(batch, CREATED):
+                yield result
+        finally:
+            invalidate_api_list()
+
+    def queue(self, items):
+        """
+        Inserts the APIs as pending and queues the ingestion of their Swagger files.
+        :rtype: list of ImportResult
+        """
+        accepted, results = self.check(items)
+        swaggers = [
+            Swagger(name=item.name, slug=normalize_name(item.name), swaggerfile=item.url, status=Swagger.PENDING)
+            for item in accepted
+        ]
+        for i in range(0, len(swaggers), self.batch_size):
+            for result in self.insert(swaggers[i:i + self.batch_size], PENDING):
+                if result.status == PENDING:
+                    enqueue('apibot.apis.ingest.ingest_swagger', result.id)
+                results.append(result)
+        invalidate_api_list()
+        return results
+
+    def insert(self, swaggers, status):
+        """
+        Inserts a batch of APIs with a single query, or one by one when
+        some name got taken in the meantime.
+        :rtype: list of ImportResult
+        """
+        if not swaggers:
+            return []
+        try:
+            with transaction.atomic():
+                Swagger.objects.bulk_create(swaggers)
+        except IntegrityError:
+            created = []
+            for swagger in swaggers:
+                try:
+                    with transaction.atomic():
+                        swagger.save()
+                    created.append(swagger)
+                except IntegrityError:
+                    pass
+        else:
+            created = swaggers
+
+        # Only PostgreSQL tells the ids of rows inserted in bulk
+        ids = dict(Swagger.objects.filter(slug__in=[swagger.slug for swagger in created]).values_list('slug', 'id'))
+        results = []
+        for swagger in swaggers:
+            if swagger.slug in ids:
+                results.append(ImportResult(swagger.name, status, ids[swagger.slug], ''))
+            else:
+                results.append(ImportResult(swagger.name, EXISTS, None, _('An API with this name already exists!')))
+        return results
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .index import build_definition_index, LookupTable, normalize_path
+from .search import SearchIndex
+from .spec import LazySpec, load_spec
+from .store import get_spec_store, StoredSpec
+from .metrics import SPEC_CACHE_BYTES, SPEC_CACHE_EVICTIONS, SPEC_CACHE_LOOKUPS, SPEC_PARSE_SECONDS
+from .timing import annotate, phase
+
+
+def record_lookup(source):
+    """
+    Tells where a parsed Swagger file was found: memory, store, shared or database.
+    """
+    annotate(spec=source)
+    SPEC_CACHE_LOOKUPS.labels(source).inc()
+
+
+def content_hash(body):
+    """
+    Returns the hash identifying one version of a Swagger file.
+    :param body: The raw Swagger file
+    :rtype: str
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class ParsedSpec(object):
+    """
+    One version of a parsed Swagger file, with the indexes derived from it.
+    """
+
+    def __init__(self, swagger_id, digest, compressed):
+        body = zlib.decompress(compressed)
+        specification, compactor = load_spec(body)
+        self.swagger_id = swagger_id
+        self.content_hash = digest
+        self.body_size = len(body)
+        # The memory taken by the decoded spec, which is what the cache budgets
+        self.size = compactor.size
+        self.nodes = compactor.nodes
+        self.shared_nodes = compactor.shared_nodes
+        self.parser = LazySpec(specification)
+
+    @property
+    def key(self):
+        return (self.swagger_id, self.content_hash)
+
+    @classmethod
+    def from_store(cls, swagger_id, digest, specification):
+        """
+        Wraps a Swagger file read from the spec store, which takes
+        hardly any memory of the process.
+        :param specification: A StoredSpecification
+        """
+        entry = cls.__new__(cls)
+        entry.swagger_id = swagger_id
+        entry.content_hash = digest
+        entry.body_size = 0
+        entry.size = specification.index_size
+        entry.nodes = 0
+        entry.shared_nodes = 0
+        entry.parser = StoredSpec(specification)
+        return entry
+
+    @cached_property
+    def definition_index(self):
+        with phase('scan'):
+            return build_definition_index(self.parser.specification)
+
+    @cached_property
+    def definition_lookup(self):
+        with phase('index'):
+            return LookupTable(self.parser.specification.get('definitions', {}))
+
+    @cached_property
+    def operation_lookup(self):
+        with phase('index'):
+            return LookupTable(self.parser.operation)
+
+    @cached_property
+    def path_lookup(self):
+        with phase('index'):
+            return LookupTable(self.parser.paths, normalize_path, self.parser.base_path)
+
+    @cached_property
+    def search_index(self):
+        with phase('index'):
+            return SearchIndex(self.parser.specification, self.parser.base_path)
+
+
+class SpecCache(object):
+    """
+    A two-tier cache of parsed Swagger files.
+
+    The first tier is an LRU of parsed specs local to this process,
+    keyed by Swagger id and content hash. The second tier is
+    CACHES['default'] (Redis in production), which holds the compressed
+    specs under the same key, so a process that has not parsed a spec
+    yet does not need to read it from the database.
+    Since a new version of a spec gets a new hash, entries never
+    need to be revalidated.
+    """
+
+    key_prefix = 'apibot:spec'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'APIBOT_SPEC_CACHE_TTL', 300)
+
+    @property
+    def max_bytes(self):
+        return getattr(settings, 'APIBOT_SPEC_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+
+    def body_key(self, swagger_id, digest):
+        return '{0}:{1}:{2}'.format(self.key_prefix, swagger_id, digest)
+
+    def get(self, swagger):
+        """
+        Returns the stored version of a Swagger file.
+        :param swagger: A Swagger instance, preferably without its spec fields loaded
+        :rtype: ParsedSpec
+        """
+        compressed = None
+        if swagger.spec_hash:
+            entry = self._get_local(swagger.pk, swagger.spec_hash)
+            if entry is not None:
+                record_lookup('memory')
+                return entry
+            store = get_spec_store()
+            with phase('load'):
+                specification = store.get(swagger.pk, swagger.spec_hash) if store is not None else None
+            if specification is not None:
+                record_lookup('store')
+                with phase('parse'), SPEC_PARSE_SECONDS.labels('store').time():
+                    entry = ParsedSpec.from_store(swagger.pk, swagger.spec_hash, specification)
+                self._put_local(entry)
+                return entry
+            with phase('load'):
+                compressed = shared_cache.get(self.body_key(swagger.pk, swagger.spec_hash))
+
+        if compressed is None:
+            record_lookup('database')
+            with phase('load'):
+                compressed = swagger.load_swaggerfile()
+                if len(compressed) <= self.max_bytes:
+                    shared_cache.set(self.body_key(swagger.pk, swagger.spec_hash), compressed, self.ttl)
+
+        else:
+            record_lookup('shared')
+        with phase('parse'), SPEC_PARSE_SECONDS.labels('body').time():
+            entry = ParsedSpec(swagger.pk, swagger.spec_hash, compressed)
+        self._put_local(entry)
+        return entry
+
+    def invalidate(self, swagger_id):
+        """
+        Forgets every version of a Swagger file parsed by this process.
+        :param swagger_id: The id of a Swagger instance
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == swagger_id]:
+                self._size -= self._entries.pop(key).size
+            SPEC_CACHE_BYTES.set(self._size)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            SPEC_CACHE_BYTES.set(0)
+
+    def stats(self):
+        """
+        Returns how much memory the specs parsed by this process take.
+        :rtype: dict
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+            return {
+                'entries': len(entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'body_bytes': sum(entry.body_size for entry in entries),
+                'nodes': sum(entry.nodes for entry in entries),
+                'shared_nodes': sum(entry.shared_nodes for entry in entries),
+            }
+
+    def _get_local(self, swagger_id, digest):
+        with self._lock:
+            entry = self._entries.get((swagger_id, digest))
+            if entry is not None:
+                self._entries.move_to_end(entry.key)
+            return entry
+
+    def _put_local(self, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(entry.key, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._entries[entry.key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                SPEC_CACHE_EVICTIONS.inc()
+            SPEC_CACHE_BYTES.set(self._size)
+
+
+spec_cache = SpecCache()
+
+
+class ResponseCache(object):
+    """
+    A two-tier cache of rendered bot answers: an LRU local to this
+    process in front of CACHES['default'].
+    Keys include the content hash of the Swagger file the answer comes
+    from, so a new version of it never gets a stale answer.
+    """
+
+    key_prefix = 'apibot:answer'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'APIBOT_RESPONSE_CACHE_TTL', 3600)
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'APIBOT_RESPONSE_CACHE_SIZE', 1000)
+
+    def make_key(self, action, swagger_id, digest, language, parameters):
+        """
+        :param parameters: The intent parameters the answer depends on
+        """
+        parameters = json.dumps(parameters, sort_keys=True, separators=(',', ':'))
+        return '{0}:{1}:{2}:{3}:{4}:{5}'.format(
+            self.key_prefix, action, swagger_id, digest, language,
+            hashlib.md5(parameters.encode('utf-8')).hexdigest(),
+        )
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+        data = shared_cache.get(key)
+        if data is not None:
+            self._put_local(key, data)
+        return data
+
+    def set(self, key, data, timeout=None):
+        # Only kept here once the shared cache took it
+        shared_cache.set(key, data, self.ttl if timeout is None else timeout)
+        self._put_local(key, data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _put_local(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+
+
+HITS_KEY = 'apibot:hits:{0}'
+
+
+def record_hit(swagger_id):
+    """
+    Counts a question about an API, so that the most asked about
+    APIs can be loaded before they are asked about.
+    """
+    key = HITS_KEY.format(swagger_id)
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        shared_cache.add(key, 1, None)
+
+
+def get_hits(swagger_ids):
+    """
+    :rtype: dict - the number of questions about each API, by id
+    """
+    hits = shared_cache.get_many([HITS_KEY.format(swagger_id) for swagger_id in swagger_ids])
+    return dict((swagger_id, hits.get(HITS_KEY.format(swagger_id), 0)) for swagger_id in swagger_ids)
+
+
+API_LIST_GENERATION_KEY = 'apibot:api-list:generation'
+
+
+def get_api_list_generation():
+    generation = shared_cache.get(API_LIST_GENERATION_KEY)
+    if generation is None:
+        shared_cache.add(API_LIST_GENERATION_KEY, 1, None)
+        generation = shared_cache.get(API_LIST_GENERATION_KEY, 1)
+    return generation
+
+
+def api_list_cache_key(cursor, language):
+    """
+    Returns the key of one rendered page of api.list. Keys include a
+    generation number, so bumping it drops every page at once.
+    """
+    return 'apibot:api-list:{0}:{1}:{2}'.format(get_api_list_generation(), language, cursor)
+
+
+def invalidate_api_list():
+    try:
+        shared_cache.incr(API_LIST_GENERATION_KEY)
+    except ValueError:
+        shared_cache.set(API_LIST_GENERATION_KEY, 1, None)
+
+
+API_DELETED_KEY = 'apibot:apis:deleted'
+
+
+def record_deletion():
+    """
+    Remembers that an API was deleted, which the modification times of
+    the others do not tell. It counts from the next second, since HTTP
+    dates have none.
+    """
+    deleted = timezone.now().replace(microsecond=0) + timedelta(seconds=1)
+    shared_cache.set(API_DELETED_KEY, deleted, None)
+
+
+def get_last_deletion():
+    """
+    :rtype: datetime - when an API was last deleted; now when the cache
+        forgot, since a deletion may have happened
+    """
+    deleted = shared_cache.get(API_DELETED_KEY)
+    if deleted is None:
+        shared_cache.add(API_DELETED_KEY, timezone.now().replace(microsecond=0), None)
+        deleted = shared_cache.get(API_DELETED_KEY) or timezone.now()
+    return deleted
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import inspect
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.core.validators import MaxLengthValidator, MinLengthValidator
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import CharField, DictField, empty, ListField
+from rest_framework.serializers import Serializer
+
+from .serializers import BotSerializer, BotResponseSerializer
+
+
+class Fallback(Exception):
+    """
+    Raised when the fast path cannot decide, so that DRF does it instead.
+    """
+
+
+def get_default(field):
+    if callable(field.default):
+        return field.default()
+    return field.default
+
+
+def has_custom_validation(serializer):
+    if type(serializer).validate is not Serializer.validate or serializer.validators:
+        return True
+    return any(hasattr(serializer, 'validate_{0}'.format(name)) for name in serializer.fields)
+
+
+def compile_reader(field):
+    """
+    Turns a serializer field into a function validating its input.
+    The function returns what DRF would, or raises Fallback for
+    anything that is not plainly valid.
+    """
+    if isinstance(field, Serializer):
+        return compile_serializer_reader(field)
+
+    if isinstance(field, ListField):
+        child = compile_reader(field.child)
+
+        def read_list(value):
+            if not isinstance(value, list) or (not value and not field.allow_empty):
+                raise Fallback
+            return [child(item) for item in value]
+        return read_list
+
+    if type(field) is CharField and all(
+            isinstance(validator, (MaxLengthValidator, MinLengthValidator)) for validator in field.validators):
+        max_length = field.max_length
+        min_length = field.min_length or 0
+
+        def read_char(value):
+            if value is None or isinstance(value, bool) or not isinstance(value, (str, int, float)):
+                raise Fallback
+            value = str(value)
+            if value == '' or (field.trim_whitespace and not value.strip()):
+                if field.allow_blank:
+                    return ''
+                raise Fallback
+            if field.trim_whitespace:
+                value = value.strip()
+            if (max_length is not None and len(value) > max_length) or len(value) < min_length:
+                raise Fallback
+            return value
+        return read_char
+
+    # Anything else is validated by the field itself
+    def read_field(value):
+        try:
+            return field.run_validation(value)
+        except ValidationError:
+            raise Fallback
+    return read_field
+
+
+def compile_serializer_reader(serializer):
+    if has_custom_validation(serializer):
+        def read_serializer(value):
+            raise Fallback
+        return read_serializer
+
+    fields = []
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        if field.source != name:
+            raise ValueError('The fast path does not follow sources, {0} has one'.format(name))
+        fields.append((name, compile_reader(field), field))
+
+    def read_serializer(value):
+        if not isinstance(value, Mapping):
+            raise Fallback
+        validated = OrderedDict()
+        for name, read, field in fields:
+            if name in value:
+                validated[name] = read(value[name])
+            elif field.default is not empty:
+                validated[name] = get_default(field)
+            elif field.required:
+                raise Fallback
+        return validated
+    return read_serializer
+
+
+def compile_writer(field):
+    """
+    Turns a serializer field into a function rendering its output,
+    exactly as to_representation() would.
+    """
+    if isinstance(field, Serializer):
+        return compile_serializer_writer(field)
+
+    if isinstance(field, ListField):
+        child = compile_writer(field.child)
+
+        def write_list(value):
+            return [child(item) if item is not None else None for item in value]
+        return write_list
+
+    if isinstance(field, DictField):
+        child = compile_writer(field.child)
+
+        def write_dict(value):
+            return dict((str(key), child(item) if item is not None else None) for key, item in value.items())
+        return write_dict
+
+    if type(field) is CharField:
+        return str
+
+    return field.to_representation
+
+
+def compile_serializer_writer(serializer):
+    fields = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source != name:
+            raise ValueError('The fast path does not follow sources, {0} has one'.format(name))
+        fields.append((name, compile_writer(field), field))
+
+    def write_serializer(instance):
+        if not isinstance(instance, Mapping):
+            raise Fallback
+        output = OrderedDict()
+        for name, write, field in fields:
+            try:
+                value = instance[name]
+            except KeyError:
+                if field.default is not empty:
+                    value = get_default(field)
+                elif not field.required:
+                    continue
+                else:
+                    # Let DRF complain about it
+                    raise Fallback
+            if inspect.isfunction(value) or inspect.ismethod(value):
+                raise Fallback
+            output[name] = write(value) if value is not None else None
+        return output
+    return write_serializer
+
+
+class FastSerializer(object):
+    """
+    Validates and renders the fixed schemas of api.ai without going
+    through the fields of DRF one by one.
+
+    The checks are compiled once from the serializer, so they stay in
+    line with it. Input the fast path is not sure about, including
+    every invalid input, goes through the serializer itself, so errors
+    are exactly those of DRF.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        serializer = serializer_class()
+        self._read = compile_reader(serializer)
+        self._write = compile_writer(serializer)
+
+    def validate(self, data):
+        """
+        :rtype: tuple - (validated data, None) or (None, errors)
+        """
+        try:
+            return self._read(data), None
+        except Fallback:
+            serializer = self.serializer_class(data=data)
+            if serializer.is_valid():
+                return serializer.validated_data, None
+            return None, serializer.errors
+
+    def render(self, instance):
+        """
+        :rtype: dict - what serializer_class(instance).data would be
+        """
+        try:
+            return self._write(instance)
+        except Fallback:
+            return self.serializer_class(instance).data
+
+
+bot_request = FastSerializer(BotSerializer)
+bot_response = FastSerializer(BotResponseSerializer)
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import threading
+import time
+from collections import Counter, defaultdict, deque, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+
+from .metrics import observe_fetch
+
+
+class SwaggerFetchError(Exception):
+    """
+    Raised when a Swagger file cannot be downloaded from its host.
+    """
+
+    def __init__(self, message, status=None):
+        super(SwaggerFetchError, self).__init__(message)
+        self.status = status
+
+
+class FetchResult(object):
+    """
+    The outcome of downloading a Swagger file.
+    """
+
+    def __init__(self, url, status, body=None, etag='', last_modified='', elapsed=0.0):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.elapsed = elapsed
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+    @property
+    def size(self):
+        return len(self.body) if self.body else 0
+
+
+def fetch_spec(url, etag='', last_modified='', session=None, timeout=None):
+    """
+    Downloads a Swagger file. When the ETag or Last-Modified header of
+    a previous download is given, the request is conditional and an
+    unchanged file comes back as a body-less 304.
+    :param url: The URL of the Swagger file
+    :param etag: ETag of the version we already have
+    :param last_modified: Last-Modified of the version we already have
+    :param session: An optional requests.Session, to reuse connections
+    :param timeout: Seconds to wait for the host
+    :rtype: FetchResult
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    if timeout is None:
+        timeout = getattr(settings, 'APIBOT_SPEC_FETCH_TIMEOUT', 10.0)
+
+    host = urlparse(url).netloc
+    start = time.time()
+    try:
+        response = (session or requests).get(url, headers=headers, timeout=timeout)
+    except requests.RequestException as e:
+        observe_fetch(host, None, time.time() - start)
+        raise SwaggerFetchError(str(e))
+    elapsed = time.time() - start
+    observe_fetch(host, response.status_code, elapsed, len(response.content) if response.status_code == 200 else 0)
+
+    if response.status_code == 304 and headers:
+        return FetchResult(url, 304, None, response.headers.get('ETag', etag),
+                           response.headers.get('Last-Modified', last_modified), elapsed)
+    if response.status_code != 200:
+        raise SwaggerFetchError(
+            '{0} answered with HTTP {1}'.format(url, response.status_code),
+            response.status_code,
+        )
+    return FetchResult(url, 200, response.content, response.headers.get('ETag', ''),
+                       response.headers.get('Last-Modified', ''), elapsed)
+
+
+def candidate_urls(url):
+    """
+    Returns the URLs a user may have meant. Chat clients tend to strip
+    the scheme, so a URL without one could be either HTTPS or HTTP.
+    :rtype: list - most preferred first
+    """
+    url = url.strip()
+    if urlparse(url).scheme in ('http', 'https', ):
+        return [url]
+    return ['https://{0}'.format(url), 'http://{0}'.format(url)]
+
+
+def probe_spec_url(url, timeout=None, head_start=None):
+    """
+    Downloads a Swagger file from whichever of the candidate URLs answers.
+    Each candidate only starts once the ones before it failed or had a
+    head start, so a host that works is downloaded once, and one that
+    hangs does not hold up the others. The most preferred one that
+    works wins, with a strict timeout to connect and to read.
+    The body of the result is the Swagger file, so there is no need to
+    download it again to validate or store it.
+    :param url: A URL, possibly without its scheme
+    :param timeout: Seconds to wait for a host to connect and to answer
+    :param head_start: Seconds to wait for a candidate before trying the next one too
+    :raises SwaggerFetchError: when no candidate works
+    :rtype: FetchResult
+    """
+    if timeout is None:
+        timeout = (
+            getattr(settings, 'APIBOT_SPEC_CONNECT_TIMEOUT', 3.0),
+            getattr(settings, 'APIBOT_SPEC_FETCH_TIMEOUT', 10.0),
+        )
+    if head_start is None:
+        head_start = getattr(settings, 'APIBOT_SPEC_PROBE_HEAD_START', 1.0)
+    urls = candidate_urls(url)
+    futures = {}
+    outcomes = {}
+
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    try:
+        while True:
+            if len(futures) < len(urls):
+                i = len(futures)
+                futures[executor.submit(fetch_spec, urls[i], timeout=timeout)] = i
+            pending = [future for future in futures if futures[future] not in outcomes]
+            # Until the last candidate started, wait for the head start only
+            done, _ = wait(pending, timeout=head_start if len(futures) < len(urls) else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    outcomes[futures[future]] = future.result()
+                except SwaggerFetchError as e:
+                    outcomes[futures[future]] = e
+            # Settle for a candidate once every preferred one has failed
+            for i in range(len(urls)):
+                if i not in outcomes:
+                    break
+                if isinstance(outcomes[i], FetchResult):
+                    return outcomes[i]
+            if len(outcomes) == len(urls):
+                raise outcomes[len(urls) - 1]
+    finally:
+        # Do not wait for the other candidates; their timeouts end them
+        executor.shutdown(wait=False)
+
+
+class SpecFetcher(object):
+    """
+    Downloads Swagger files from a bounded pool of threads.
+
+    Every thread keeps its own HTTP session so connections to a host
+    are reused, and no more than per_host requests run against
+    the same host at a time.
+    """
+
+    def __init__(self, workers=8, per_host=2, timeout=None):
+        self.workers = workers
+        self.per_host = per_host
+        self.timeout = timeout
+        self._local = threading.local()
+        self._hosts = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._hosts_lock = threading.Lock()
+
+    def get_session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.per_host)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def get_host_limit(self, url):
+        with self._hosts_lock:
+            return self._hosts[urlparse(url).netloc]
+
+    def fetch(self, url, etag='', last_modified=''):
+        """
+        :rtype: tuple - (FetchResult or None, SwaggerFetchError or None, seconds)
+        """
+        with self.get_host_limit(url):
+            start = time.time()
+            try:
+                result = fetch_spec(url, etag, last_modified, session=self.get_session(), timeout=self.timeout)
+                return result, None, time.time() - start
+            except SwaggerFetchError as e:
+                return None, e, time.time() - start
+
+    def schedule(self, function, items, get_url):
+        """
+        Calls function(item) for every item from the pool of threads.
+        A call only starts once the host of its URL has a free slot, so
+        the items of a slow host wait in their own queue rather than
+        hold up threads the other hosts could use.
+        Yields (item, future) in order of completion.
+        :param get_url: Returns the URL of an item, or None when it has no host
+        """
+        waiting = OrderedDict()
+        for item in items:
+            url = get_url(item)
+            waiting.setdefault(urlparse(url).netloc if url else None, deque()).append(item)
+        running = Counter()
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while waiting or futures:
+                # One item per host at a time, so the hosts take turns
+                submitted = True
+                while submitted and len(futures) < self.workers:
+                    submitted = False
+                    for host in list(waiting):
+                        if len(futures) >= self.workers:
+                            break
+                        if host is not None and running[host] >= self.per_host:
+                            continue
+                        item = waiting[host].popleft()
+                        if not waiting[host]:
+                            del waiting[host]
+                        futures[executor.submit(function, item)] = (host, item)
+                        running[host] += 1
+                        submitted = True
+                done, _not_done = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host, item = futures.pop(future)
+                    running[host] -= 1
+                    yield item, future
+
+    def fetch_all(self, swaggers, conditional=True):
+        """
+        Yields (swagger, result, error, seconds) in order of completion.
+        Only the downloads happen in the pool; the caller stays the only
+        one talking to the database.
+        """
+        def fetch(swagger):
+            etag, last_modified = swagger.cache_validators(conditional)
+            return self.fetch(swagger.swaggerfile, etag, last_modified)
+
+        for swagger, future in self.schedule(fetch, swaggers, lambda swagger: swagger.swaggerfile):
+            result, error, elapsed = future.result()
+            yield (swagger, result, error, elapsed)
@@ -0,0 +1,856 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.utils.module_loading import import_string
+from django.utils.translation import get_language, ugettext_lazy as _
+
+from .cache import api_list_cache_key, record_hit, response_cache
+from .fastpath import bot_response
+from .fetch import candidate_urls
+from .ingest import queue_ingest
+from .lists import (
+    info_fields,
+    general_data,
+    swagger_fields,
+)
+from .metrics import RESPONSE_CACHE_LOOKUPS
+from .models import Swagger, normalize_name
+from .render import render
+from .timing import annotate, phase
+
+
+# Some docs:
+# Slack
+# Basic formatting: https://api.slack.com/docs/message-formatting
+generic_error_msg = _(
+    'Something went wrong here... I will tell the developers and hopefully they will manage to fix this.')
+not_existing_msg = _('This information is not defined in the Swagger file. Sorry!')
+not_defined_msg = _(
+    'This data is not part of the OpenAPI specifications: https://github.com/OAI/OpenAPI-Specification')
+no_api_msg = _('We do not have information about this API. Feel free to add it yourself!')
+show_more_msg = _('There is more, just ask me to *show more*.')
+pending_api_msg = _('I am still reading the Swagger file of *{0}*.')
+failed_api_msg = _('I could not add *{0}*: {1}')
+
+
+class HandlerTimings(object):
+    """
+    How long each action takes to answer, per process.
+    """
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, action, seconds):
+        with self._lock:
+            stats = self._stats.setdefault(action, {'count': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+
+    def snapshot(self):
+        """
+        :rtype: dict - action to its count, total and max seconds
+        """
+        with self._lock:
+            return dict((action, dict(stats)) for action, stats in self._stats.items())
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+timings = HandlerTimings()
+
+
+class BotHandler(object):
+    """
+    Answers one action of api.ai.
+
+    Subclasses set the action they answer and implement handle().
+    respond() wraps handle() with the response cache, which is used
+    whenever get_cache_key() returns a key, and with timing metrics.
+    Answers to a failure, see error(), are never cached.
+    """
+
+    action = None
+    # Seconds a cached response is kept
+    cache_ttl = None
+    # Whether the answer tells about a failure, which may not happen again
+    failed = False
+
+    def __init__(self, request, parameters, contexts):
+        """
+        :param request: The request from api.ai
+        :param parameters: The validated parameters of the intent
+        :param contexts: The validated contexts of the conversation
+        """
+        self.request = request
+        self.parameters = parameters
+        self.contexts = contexts
+
+    def handle(self):
+        """
+        Builds the answer, before serialization.
+        :rtype: dict - with at least a displayText
+        """
+        raise NotImplementedError
+
+    def error(self, text):
+        """
+        Answers that something went wrong, without caching the answer.
+        :rtype: dict
+        """
+        self.failed = True
+        return {'displayText': text}
+
+    def get_cache_key(self):
+        """
+        Returns the key to cache the response under, or None
+        when the response cannot be cached.
+        """
+        return None
+
+    def get_cache_ttl(self):
+        return self.cache_ttl
+
+    def get_cache(self):
+        """
+        Returns where responses are cached, anything with
+        the get() and set() of a Django cache.
+        """
+        return shared_cache
+
+    def respond(self):
+        """
+        Returns the serialized answer, from the cache when possible.
+        :rtype: dict
+        """
+        start = time.time()
+        key = self.get_cache_key()
+        with phase('cache'):
+            data = self.get_cache().get(key) if key else None
+        annotate(cache='none' if not key else 'miss' if data is None else 'hit')
+        if key:
+            RESPONSE_CACHE_LOOKUPS.labels('miss' if data is None else 'hit').inc()
+        if data is None:
+            data = self.serialize(self.handle())
+            if key and not self.failed:
+                with phase('cache'):
+                    self.get_cache().set(key, data, self.get_cache_ttl())
+        timings.record(self.action, time.time() - start)
+        return data
+
+    def serialize(self, output_data):
+        # For now duplicate the display text and speech
+        output_data['speech'] = output_data['displayText']
+        with phase('serialize'):
+            return bot_response.render(output_data)
+
+    @classmethod
+    def benchmark(cls, parameters, contexts=(), number=100, request=None):
+        """
+        Times handle() on its own, without the response cache or serialization.
+        :rtype: list - the seconds each run took
+        """
+        seconds = []
+        for _i in range(number):
+            handler = cls(request, dict(parameters), list(contexts))
+            start = time.time()
+            handler.handle()
+            seconds.append(time.time() - start)
+        return seconds
+
+    def get_api(self):
+        """
+        We might be getting the API name from paramaters straight or
+        from passed context
+        """
+        if 'api' in self.parameters:
+            return self.parameters['api']
+        elif self.contexts:
+            for context in self.contexts:
+                if 'api' in context['parameters']:
+                    return context['parameters']['api']
+        return None
+
+    def get_swagger(self):
+        """
+        :raises Swagger.DoesNotExist: when we do not know the API
+        :rtype: Swagger - without its spec fields loaded
+        """
+        if not hasattr(self, '_swagger'):
+            with phase('lookup'):
+                self._swagger = Swagger.objects.defer(*Swagger.spec_fields).resolve(self.get_api() or '')
+        return self._swagger
+
+
+class UnknownHandler(BotHandler):
+    """
+    We have no idea what this intent is...
+    """
+
+    def handle(self):
+        return {'displayText': not_defined_msg}
+
+
+class SpecHandler(BotHandler):
+    """
+    Answers questions about the Swagger file of one API.
+
+    Answers only depend on the Swagger file and on cache_parameters,
+    so they are cached per version of the Swagger file. A cached answer
+    costs a single query, to find the current version.
+    """
+
+    # The intent parameters answers depend on, besides the API
+    cache_parameters = ()
+
+    def get_cache(self):
+        return response_cache
+
+    def get_cache_key(self):
+        try:
+            swagger = self.get_swagger()
+        except Swagger.DoesNotExist:
+            return None
+        if swagger.status != Swagger.READY or not swagger.spec_hash:
+            return None
+        return response_cache.make_key(
+            self.action,
+            swagger.pk,
+            swagger.spec_hash,
+            get_language(),
+            dict((name, self.parameters.get(name)) for name in self.cache_parameters),
+        )
+
+    def respond(self):
+        try:
+            record_hit(self.get_swagger().pk)
+        except Swagger.DoesNotExist:
+            pass
+        return super(SpecHandler, self).respond()
+
+    def handle(self):
+        try:
+            swagger = self.get_swagger()
+        except Swagger.DoesNotExist:
+            return {'displayText': no_api_msg}
+        # Do not download the Swagger file while the queue is on it
+        if swagger.status == Swagger.PENDING:
+            return {'displayText': pending_api_msg.format(swagger.name)}
+        if not swagger.spec_hash:
+            if swagger.status == Swagger.FAILED:
+                return self.error(failed_api_msg.format(swagger.name, swagger.fetch_error))
+            # Never downloaded: the queue does it, rather than this request
+            queue_ingest(swagger)
+            return {'displayText': pending_api_msg.format(swagger.name)}
+        try:
+            spec = swagger.get_spec()
+        except Exception:
+            return self.error(generic_error_msg)
+        return self.handle_spec(swagger, spec)
+
+    def handle_spec(self, swagger, spec):
+        """
+        :param swagger: The Swagger instance of the API
+        :param spec: Its parsed Swagger file
+        :rtype: dict
+        """
+        raise NotImplementedError
+
+    def get_offset(self):
+        """
+        Where the part of a long answer to show starts.
+        """
+        try:
+            return max(int(self.parameters.get('offset') or 0), 0)
+        except ValueError:
+            return 0
+
+    def render(self, value):
+        """
+        Formats a spec fragment, a part of it at a time when it is long.
+        :rtype: tuple - (text, offset of the next part or None)
+        """
+        with phase('render'):
+            text, offset = render(value, offset=self.get_offset())
+        if offset is not None:
+            text = '{0}\n\n{1}'.format(text, show_more_msg)
+        return text, offset
+
+    def show_more(self, output_data, swagger, offset):
+        """
+        Remembers where a truncated answer stopped, for api.show-more.
+        """
+        if offset is None:
+            return output_data
+        parameters = {
+            'show_more': self.action,
+            'api': swagger.name,
+            'offset': str(offset),
+        }
+        for name in self.cache_parameters:
+            if name != 'offset' and self.parameters.get(name):
+                parameters[name] = self.parameters[name]
+        output_data['contextOut'] = [{
+            'name': 'show_more',
+            'lifespan': 1,
+            'parameters': parameters,
+        }]
+        return output_data
+
+    def suggest(self, spec, kind, query):
+        """
+        Suggests what the user might have meant when we cannot find
+        an operation, path or object definition.
+        Returns None when nothing comes close.
+        """
+        if spec is None or not query:
+            return None
+        with phase('search'):
+            suggestions = spec.search_index.search(query, kind)
+        if not suggestions:
+            return None
+
+        # Define buttons for Slack
+        explain = {
+            'operation': _('Explain operation {0}'),
+            'path': _('Explain path {0}'),
+            'definition': _('Explain object {0}'),
+        }[kind]
+        actions = []
+        for suggestion in suggestions:
+            actions.append({
+                'name': suggestion,
+                'text': suggestion,
+                'value': explain.format(suggestion),
+            })
+
+        attachments = {
+            'text': _('Did you mean one of these?'),
+            'fallback': generic_error_msg,
+            'callback_id': 'suggestions',
+            'actions': actions,
+        }
+        display_text = _('I could not find *{0}*. Did you mean:\n{1}').format(
+            query,
+            '\n'.join(suggestions),
+        )
+        return {
+            'displayText': display_text,
+            'data': {
+                'slack': {
+                    'text': display_text,
+                    'attachments': [attachments, ],
+                },
+            },
+        }
+
+
+class ListHandler(BotHandler):
+    """
+    Lists all APIs, a page at a time. Pages are cached until
+    an API gets added, renamed or removed.
+    """
+
+    action = 'api.list'
+
+    def get_cursor(self):
+        """
+        Where the previous page of api.list ended, if we are paging.
+        """
+        if self.parameters.get('cursor'):
+            return self.parameters['cursor']
+        for context in self.contexts:
+            if context.get('name') == 'api_list' and context['parameters'].get('cursor'):
+                return context['parameters']['cursor']
+        return ''
+
+    def get_cache_key(self):
+        return api_list_cache_key(self.get_cursor(), get_language())
+
+    def get_cache_ttl(self):
+        return getattr(settings, 'APIBOT_API_LIST_CACHE_TTL', 3600)
+
+    def handle(self):
+        cursor = self.get_cursor()
+        page_size = getattr(settings, 'APIBOT_API_LIST_PAGE_SIZE', 20)
+        queryset = Swagger.objects.order_by('slug')
+        if cursor:
+            queryset = queryset.filter(slug__gt=cursor)
+        page = list(queryset.values_list('slug', 'name')[:page_size + 1])
+        next_cursor = page[page_size - 1][0] if len(page) > page_size else ''
+        api_list = [name for slug, name in page[:page_size]]
+
+        # Define buttons for Slack
+        actions = []
+
+        for api in api_list:
+            actions.append({
+                'name': api,
+                'text': api,
+                'value': _('Use {0}').format(api),
+            })
+        if next_cursor:
+            actions.append({
+                'name': 'next_page',
+                'text': _('Next page'),
+                'value': _('Show more APIs'),
+            })
+
+        attachments = {
+            'text': _('Which API you want to know more about? Here are top APIs:'),
+            'fallback': generic_error_msg,
+            'callback_id': 'api_list',
+            'actions': actions,
+        }
+
+        attachments_text = _(('\n').join([
+            'We have these APIs:',
+            '{0}'.format('\n'.join(api_list)),
+            'If you want to know more about a certain API, just tell me you want to *use* that one.',
+            'You can also *create* a new API if you have a URL to a valid Swagger file.',
+        ]))
+
+        output_data = {
+            'data': {
+                'slack': {
+                    'text': attachments_text,
+                    'attachments': [attachments, ],
+                },
+            },
+            'displayText': attachments_text,
+        }
+        if next_cursor:
+            # Remember where this page ends, for the next page button
+            output_data['contextOut'] = [{
+                'name': 'api_list',
+                'lifespan': 1,
+                'parameters': {
+                    'cursor': next_cursor,
+                },
+            }]
+        return output_data
+
+
+class CreateHandler(BotHandler):
+    """
+    Adds an API. Its Swagger file gets downloaded, validated and
+    indexed in the background, since api.ai does not wait for long.
+    A failed API can be created again under the same name.
+    """
+
+    action = 'api.create'
+
+    def handle(self):
+        try:
+            # This is ugly - no way out to get a serializer field name
+            # with a dot in the name
+            request_url = self.request.data['result']['contexts'][0]['parameters']['url.original']
+            name = self.parameters['api']
+        except (KeyError, IndexError):
+            return {'displayText': _(
+                'I need a name and URL pointing to a OpenAPI json specification in order to create a new API.')}
+        return {'displayText': self.create_api(name, request_url)}
+
+    def create_api(self, name, request_url):
+        """
+        :rtype: str - what to tell the user
+        """
+        # API with same name exists
+        swagger = Swagger.objects.defer(*Swagger.spec_fields).filter(slug=normalize_name(name)).first()
+        if swagger is not None and swagger.status != Swagger.FAILED:
+            return _('An API with this name already exists!')
+
+        # API with same URL exists
+        # We lose the http(s):// from Slack input, so both are possible
+        # A failed API does not hold on to its URL
+        same_url = Swagger.objects.filter(swaggerfile__in=candidate_urls(request_url)).exclude(status=Swagger.FAILED)
+        if swagger is not None:
+            # The failed API being created again
+            same_url = same_url.exclude(pk=swagger.pk)
+        if same_url.exists():
+            return _('An API pointing to this URL already exists!')
+
+        if swagger is None:
+            swagger = Swagger(name=name)
+        swagger.swaggerfile = request_url.strip()
+        swagger.status = Swagger.PENDING
+        swagger.fetch_error = ''
+        swagger.save()
+        queue_ingest(swagger)
+        return _('Thanks! I am reading the Swagger file of *{0}* now. Ask me if it is ready in a moment.').format(name)
+
+
+class StatusHandler(BotHandler):
+    """
+    Tells whether an API created through the bot can be used yet.
+    """
+
+    action = 'api.status'
+
+    def handle(self):
+        try:
+            swagger = self.get_swagger()
+        except Swagger.DoesNotExist:
+            return {'displayText': no_api_msg}
+        if swagger.status == Swagger.PENDING:
+            display_text = pending_api_msg.format(swagger.name)
+        elif swagger.status == Swagger.FAILED:
+            display_text = failed_api_msg.format(swagger.name, swagger.fetch_error)
+        else:
+            display_text = _('*{0}* is ready, ask me anything about it!').format(swagger.name)
+        return {'displayText': display_text}
+
+
+class InfoHandler(SpecHandler):
+    """
+    Information about specific API.
+    """
+
+    action = 'api.info'
+    cache_parameters = ('data', )
+
+    def handle_spec(self, swagger, spec):
+        api = swagger.name
+        data = self.parameters.get('data')
+        try:
+            # Do we have a request for generic information of this API?
+            if data in info_fields:
+                return self.describe(api, data, spec.parser.specification['info'])
+
+            # Do we have Swagger object fields?
+            elif data in swagger_fields:
+                return self.describe(api, data, spec.parser.specification)
+
+            # Some general data about the API: paths, operations or definitions
+            elif data in general_data:
+                return getattr(self, 'list_{0}'.format(data))(api, spec.parser)
+
+            # No idea what they want...
+            # TODO: start logging these so we can analyze
+            return {'displayText': not_defined_msg}
+        except Exception as e:
+            return self.error(str(e))
+
+    def describe(self, api, data, fields):
+        try:
+            return {'displayText': _('Here is the *{0}* you asked for *{1}*:\n{2}').format(
+                data,
+                api,
+                fields[data],
+            )}
+        except Exception:
+            return {'displayText': not_existing_msg}
+
+    def list_paths(self, api, parser):
+        # TODO
+        # Add buttons
+        paths = parser.paths.keys()
+        if not paths:
+            return {'displayText': _('There are no paths defined in this OpenAPI specification.')}
+
+        # Define buttons for Slack
+        actions = []
+
+        for path in paths:
+            actions.append({
+                'name': path,
+                'text': path,
+                'value': _('Explain path {0}').format(path),
+            })
+
+        attachments = {
+            'text': _('Which path you want to know more about? Here are the top paths:'),
+            'fallback': generic_error_msg,
+            'callback_id': 'paths',
+            'actions': actions,
+        }
+        attachments_list = {
+            'text': _('Here is a *list of paths* defined:\n{0}').format('\n'.join(paths)),
+            'attachments': [attachments, ],
+        }
+        return {
+            'data': {
+                'slack': attachments_list,
+            },
+            'displayText': _('Here is the *{0}* you asked for *{1}*:\n{2}').format(
+                'paths',
+                api,
+                '\n'.join(paths)
+            ),
+        }
+
+    def list_operations(self, api, parser):
+        operations = parser.operation.keys()
+        if not operations:
+            return {'displayText': _('There are no operations defined in this OpenAPI specification.')}
+
+        # Define buttons for Slack
+        actions = []
+
+        for operation in operations:
+            actions.append({
+                'name': operation,
+                'text': operation,
+                'value': _('Explain operation {0}').format(operation),
+            })
+
+        attachments = {
+            'text': _('Which operation you want to know more about? Here are the top operations:'),
+            'fallback': generic_error_msg,
+            'callback_id': 'operations',
+            'actions': actions,
+        }
+        attachments_list = {
+            'text': _('Here is a *list of operations* defined:\n{0}').format('\n'.join(operations)),
+            'attachments': [attachments, ],
+        }
+        return {
+            'data': {
+                'slack': attachments_list,
+            },
+            'displayText': _('Here is the *{0}* you asked for *{1}*:\n{2}').format(
+                'operations',
+                api,
+                '\n'.join(operations)
+            ),
+        }
+
+    def list_definitions(self, api, parser):
+        definitions = parser.specification['definitions'].keys()
+        if not definitions:
+            return {'displayText': _('No objects are defined in this OpenAPI specification.')}
+
+        # Define buttons for Slack
+        actions = []
+
+        for definition in definitions:
+            actions.append({
+                'name': definition,
+                'text': definition,
+                'value': _('Explain object {0}').format(definition),
+            })
+
+        attachments = {
+            'text': _('Which object you want to know more about? Here are top objects:'),
+            'fallback': generic_error_msg,
+            'callback_id': 'object_definitions',
+            'actions': actions,
+        }
+        attachments_list = {
+            'text': _('Here is a *list of objects* defined:\n{0}').format('\n'.join(definitions)),
+            'attachments': [attachments, ],
+        }
+        return {
+            'data': {
+                'slack': attachments_list,
+            },
+            'displayText': '\n'.join(definitions),
+        }
+
+
+class ObjectDefinitionHandler(SpecHandler):
+    """
+    Object definitions for specific API.
+    """
+
+    action = 'api.object-definition'
+    cache_parameters = ('object', 'offset', )
+
+    def handle_spec(self, swagger, spec):
+        # TODO
+        # Give an example can be added explicitly
+        try:
+            # Sometimes the keys are stored in lower or titlecase.
+            # The lookup table deals with that.
+            name = spec.definition_lookup[self.parameters['object']]
+        except KeyError:
+            return self.suggest(spec, 'definition', self.parameters.get('object')) or {'displayText': not_defined_msg}
+        definition = spec.parser.specification['definitions'][name]
+
+        # Are there linked operations to this object?
+        # See build_definition_index for the assumptions we make
+        operations = spec.definition_index.get(name.lower(), [])
+        text, offset = self.render(definition)
+
+        if operations and definition:
+            # Define buttons for Slack
+            actions = []
+
+            for operation in operations:
+                actions.append({
+                    'name': operation['value'],
+                    'text': operation['value'],
+                    'value': _('Explain {0} {1}').format(
+                        operation['type'],
+                        operation['value'] if operation['type'] == 'operation' else operation['path'],
+                    ),
+                })
+
+            attachments = {
+                'text': _('Which operation you want to know more about? Here are top operations:'),
+                'fallback': generic_error_msg,
+                'callback_id': 'object_definition',
+                'actions': actions,
+            }
+            attachments_list = {
+                'text': _('Here is the object definition for *{0}*:\n{1}\n\nI also found these operations linked to it:\n{2}').format(
+                    self.parameters['object'],
+                    text,
+                    '\n'.join(operation['value'] for operation in operations),
+                ),
+                'attachments': [attachments, ],
+            }
+            return self.show_more({
+                'data': {
+                    'slack': attachments_list,
+                },
+                # And display text
+                'displayText': '\n'.join(operation['value'] for operation in operations),
+            }, swagger, offset)
+        elif definition:
+            return self.show_more({'displayText': _('Here is the object definition for *{0}*:\n{1}').format(
+                self.parameters['object'],
+                text,
+            )}, swagger, offset)
+        return {'displayText': not_defined_msg}
+
+
+class OperationHandler(SpecHandler):
+    """
+    Operation definitions for specific API.
+    """
+
+    action = 'api.operation'
+    cache_parameters = ('operation', 'offset', )
+
+    def handle_spec(self, swagger, spec):
+        try:
+            operation = spec.operation_lookup[self.parameters['operation']]
+        except KeyError:
+            return self.suggest(spec, 'operation', self.parameters.get('operation')) or {'displayText': not_defined_msg}
+        path, method = spec.parser.operation[operation][:2]
+        text, offset = self.render(spec.parser.paths[path][method])
+        return self.show_more({'displayText': _('Here is the operation definition for *{0}*:\n{1}').format(
+            operation,
+            text,
+        )}, swagger, offset)
+
+
+class PathHandler(SpecHandler):
+    """
+    Path info for specific API.
+    """
+
+    action = 'api.path'
+    cache_parameters = ('path', 'offset', )
+
+    def handle_spec(self, swagger, spec):
+        try:
+            # Due to a bug in api.ai, the leading / gets stripped
+            # Occasionally check if this is resolved
+            # https://discuss.api.ai/t/slashes-are-removed/5595
+            # The lookup table ignores slashes and the basePath anyway
+            path = spec.path_lookup[self.parameters['path']]
+        except KeyError:
+            return self.suggest(spec, 'path', self.parameters.get('path')) or {'displayText': not_defined_msg}
+        try:
+            text, offset = self.render(spec.parser.paths[path])
+        except Exception:
+            return self.error(generic_error_msg)
+        return self.show_more({'displayText': text}, swagger, offset)
+
+
+class ShowMoreHandler(BotHandler):
+    """
+    Shows the next part of an answer that was too long,
+    see SpecHandler.show_more().
+    """
+
+    action = 'api.show-more'
+
+    def get_target(self):
+        """
+        Returns the handler of the truncated answer, set to show its next part.
+        """
+        for context in self.contexts:
+            if context.get('name') == 'show_more':
+                parameters = context['parameters']
+                handler = get_handler(parameters.get('show_more'))
+                if issubclass(handler, SpecHandler):
+                    return handler(self.request, parameters, self.contexts)
+        return None
+
+    def respond(self):
+        target = self.get_target()
+        if target is None:
+            return super(ShowMoreHandler, self).respond()
+        return target.respond()
+
+    def handle(self):
+        return {'displayText': _('There is nothing more to show.')}
+
+
+# TODO
+# "securityDefinitions"
+# "securityDefinitions":{
+#    "petstore_auth":{
+#       "type":"oauth2",
+#       "authorizationUrl":"http://petstore.swagger.io/oauth/dialog",
+#       "flow":"implicit",
+#       "scopes":{
+#          "write:pets":"modify pets in your account",
+#          "read:pets":"read your pets"
+#       }
+#    },
+#    "api_key":{
+#       "type":"apiKey",
+#       "name":"api_key",
+#       "in":"header"
+#    }
+
+
+HANDLERS = (
+    ListHandler,
+    CreateHandler,
+    StatusHandler,
+    InfoHandler,
+    ObjectDefinitionHandler,
+    OperationHandler,
+    PathHandler,
+    ShowMoreHandler,
+)
+
+_tables = {}
+
+
+def get_handlers():
+    """
+    Returns the dispatch table of actions to handler classes.
+    Handlers listed in APIBOT_BOT_HANDLERS, as dotted paths, come on top
+    of the built-in ones and replace those answering the same action.
+    :rtype: dict
+    """
+    extra = tuple(getattr(settings, 'APIBOT_BOT_HANDLERS', ()))
+    if extra not in _tables:
+        table = dict((handler.action, handler) for handler in HANDLERS)
+        for path in extra:
+            handler = import_string(path)
+            table[handler.action] = handler
+        _tables[extra] = table
+    return _tables[extra]
+
+
+def get_handler(action):
+    """
+    :rtype: BotHandler subclass - UnknownHandler for actions nobody answers
+    """
+    return get_handlers().get(action, UnknownHandler)
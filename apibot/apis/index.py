@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import re
+from collections import defaultdict
+
+
+DEFINITION_REF = re.compile(r'#/definitions/(\w+)')
+
+
+def get_definition_name(ref):
+    """
+    Returns the lowercased definition name of a $ref, if it points to one.
+    :param ref: A $ref value, e.g. '#/definitions/Pet'
+    """
+    match = DEFINITION_REF.match(ref)
+    return match.group(1).lower() if match else None
+
+
+def get_parameter_references(operation):
+    """
+    Returns the definitions referenced by the body parameters of an operation.
+    :rtype: set
+    """
+    names = set()
+    for parameter in operation.get('parameters', []):
+        try:
+            name = get_definition_name(parameter['schema']['$ref'])
+        except Exception:
+            continue
+        if name:
+            names.add(name)
+    return names
+
+
+def get_response_references(operation):
+    """
+    Returns the definitions referenced by the responses of an operation,
+    either as a single item or as a list of items.
+    The first response we cannot make sense of ends the search.
+    :rtype: set
+    """
+    names = set()
+    try:
+        responses = operation['responses']
+        for status_code in responses:
+            if 'schema' in responses[status_code]:
+                schema = responses[status_code]['schema']
+                ref = schema['items']['$ref'] if 'items' in schema else schema['$ref']
+                name = get_definition_name(ref)
+                if name:
+                    names.add(name)
+    except Exception:
+        pass
+    return names
+
+
+class SubstringMatcher(object):
+    """
+    Finds which of a set of names occur inside a piece of text.
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.lengths = sorted(set(len(name) for name in names))
+
+    def find(self, text):
+        found = set()
+        for length in self.lengths:
+            for start in range(len(text) - length + 1):
+                if text[start:start + length] in self.names:
+                    found.add(text[start:start + length])
+        return found
+
+
+def build_definition_index(specification):
+    """
+    Maps every object definition to the operations linked to it.
+
+    There is no such link in the OpenAPI specification
+    (follow-up on https://github.com/OAI/OpenAPI-Specification/issues/1097),
+    so we make assumptions. An operation is linked to an object when
+    1. one of its tags is the name of the object,
+    2. its path contains the name of the object,
+    3. its operationId contains the name of the object,
+    4. one of its body parameters references the object, or
+    5. one of its responses references the object or a list of it.
+    Once 1-3 link an object to an operation, the other operations of the
+    same path are not considered for that object.
+
+    :param specification: A Swagger specification
+    :rtype: dict - lowercased definition name to a list of operations,
+        each a dict with a 'type' (operation or path), 'value',
+        'path' and 'method'
+    """
+    names = set(name.lower() for name in specification.get('definitions', {}))
+    matcher = SubstringMatcher(names)
+    index = defaultdict(list)
+
+    for path, methods in specification.get('paths', {}).items():
+        in_path = matcher.find(path)
+        done = set()
+
+        for method, spec in methods.items():
+            if not isinstance(spec, dict):
+                spec = {}
+
+            # Sometimes we don't have the operationID defined
+            # Show method and path instead
+            if 'operationId' in spec:
+                operation = {
+                    'type': 'operation',
+                    'value': spec['operationId'],
+                }
+            else:
+                operation = {
+                    'type': 'path',
+                    'value': '{0} {1}'.format(method.upper(), path),
+                }
+            operation['path'] = path
+            operation['method'] = method
+
+            linked = set(in_path)
+            linked |= names.intersection(tag.lower() for tag in spec.get('tags', []))
+            if 'operationId' in spec:
+                linked |= matcher.find(spec['operationId'].lower())
+            linked -= done
+            for name in linked:
+                index[name].append(operation)
+
+            # An operation can show up twice, when both its input and
+            # its output reference the object
+            for name in get_parameter_references(spec) - done - linked:
+                index[name].append(operation)
+            for name in get_response_references(spec) - done - linked:
+                index[name].append(operation)
+
+            done |= linked
+
+    return dict(index)
+
+
+def normalize_name(name):
+    return name.casefold()
+
+
+def normalize_path(path):
+    """
+    Ignores case, and leading, trailing and repeated slashes,
+    e.g. 'V2//Pet/' and '/v2/pet' are the same path.
+    """
+    return '/'.join(part for part in path.casefold().split('/') if part)
+
+
+class LookupTable(object):
+    """
+    Resolves user input to the key it refers to in a Swagger file,
+    whatever the casing of the input.
+    """
+
+    def __init__(self, keys, normalize=normalize_name, prefix=''):
+        """
+        :param keys: The keys as they appear in the Swagger file
+        :param normalize: The function making input and keys comparable
+        :param prefix: A prefix of the keys that users may leave out,
+            e.g. the basePath of paths
+        """
+        self.normalize = normalize
+        self.keys = set(keys)
+        self._table = {}
+        for key in keys:
+            self._table.setdefault(normalize(key), key)
+
+        prefix = normalize(prefix) if prefix else ''
+        if prefix:
+            for key in keys:
+                normalized = normalize(key)
+                if normalized.startswith(prefix + '/'):
+                    self._table.setdefault(normalized[len(prefix) + 1:], key)
+
+    def get(self, name, default=None):
+        if name in self.keys:
+            return name
+        return self._table.get(self.normalize(name), default)
+
+    def __getitem__(self, name):
+        key = self.get(name)
+        if key is None:
+            raise KeyError(name)
+        return key
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import logging
+
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+from swagger_spec_validator.validator20 import validate_spec
+
+from .fetch import probe_spec_url, SwaggerFetchError
+from .jobs import enqueue
+from .models import Swagger
+
+
+logger = logging.getLogger(__name__)
+
+
+class IngestError(Exception):
+    """
+    Raised when a Swagger file cannot be added, with the reason to show the user.
+    """
+
+
+def validate_swaggerfile(body, url=''):
+    """
+    Checks that a Swagger file is valid Swagger 2.0.
+    :param body: The raw Swagger file
+    :param url: Where it comes from, to resolve its remote $refs
+    :raises IngestError: when it is not
+    """
+    try:
+        validate_spec(json.loads(body.decode('utf-8')), url)
+    except Exception:
+        raise IngestError(_('This is not a valid Swagger 2.0 file.'))
+
+
+def queue_ingest(swagger):
+    """
+    Marks an API as pending and ingests its Swagger file in the background.
+    :param swagger: A saved Swagger instance
+    """
+    if swagger.status != Swagger.PENDING:
+        swagger.status = Swagger.PENDING
+        swagger.save(update_fields=['status', 'modified'])
+    enqueue('apibot.apis.ingest.ingest_swagger', swagger.pk)
+
+
+def ingest_swagger(swagger_id):
+    """
+    Downloads, validates, parses and indexes the Swagger file of
+    a pending API, and marks it as ready or failed.
+    The Swagger file URL may lack its scheme, as typed in a chat.
+    """
+    try:
+        swagger = Swagger.objects.get(pk=swagger_id, status=Swagger.PENDING)
+    except Swagger.DoesNotExist:
+        # Removed or ingested since
+        return
+
+    try:
+        try:
+            result = probe_spec_url(swagger.swaggerfile)
+        except SwaggerFetchError as e:
+            swagger.record_fetch(error=e, save=False)
+            raise IngestError(_('{0} - This is an invalid URL!').format(swagger.swaggerfile))
+
+        # A failed API does not hold on to its URL. Of two pending ones, the
+        # older one gets it, whichever job runs first.
+        if Swagger.objects.filter(
+            Q(status=Swagger.READY) | Q(status=Swagger.PENDING, pk__lt=swagger.pk),
+            swaggerfile=result.url,
+        ).exclude(pk=swagger.pk).exists():
+            raise IngestError(_('An API pointing to this URL already exists!'))
+
+        validate_swaggerfile(result.body, result.url)
+
+        swagger.swaggerfile = result.url
+        swagger.record_fetch(result, save=False)
+        # Parse and index now, rather than when the first question comes
+        spec = swagger.get_spec()
+        spec.definition_index
+        spec.search_index
+    except IngestError as e:
+        swagger.status = Swagger.FAILED
+        swagger.fetch_error = str(e)[:255]
+    except Exception as e:
+        logger.exception('Ingesting %s failed', swagger)
+        swagger.status = Swagger.FAILED
+        swagger.fetch_error = str(e)[:255]
+    else:
+        swagger.status = Swagger.READY
+    swagger.save()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(name, args):
+    """
+    Runs a job, logging rather than raising its errors so that
+    one bad job does not stop the worker.
+    :param name: The dotted path of the function to run
+    :param args: Its arguments, which must be JSON serializable
+    """
+    close_old_connections()
+    try:
+        import_string(name)(*args)
+    except Exception:
+        logger.exception('Job %s%r failed', name, tuple(args))
+    finally:
+        close_old_connections()
+
+
+class LocalQueue(object):
+    """
+    Runs jobs in a background thread of this process.
+    Without the thread, jobs wait until run_pending() is called,
+    which is what the tests do.
+    """
+
+    def __init__(self, thread=True):
+        self.thread = thread
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, name, *args):
+        self._queue.put((name, args))
+        if self.thread:
+            self._start()
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self.work, name='apibot-jobs', daemon=True)
+                self._worker.start()
+
+    def work(self, burst=False):
+        """
+        Runs jobs as they come. In burst mode, stops once the queue is empty.
+        """
+        while True:
+            try:
+                name, args = self._queue.get(block=not burst)
+            except queue.Empty:
+                return
+            run_job(name, args)
+
+    def run_pending(self):
+        self.work(burst=True)
+
+    def depth(self):
+        return self._queue.qsize()
+
+
+class RedisQueue(object):
+    """
+    Keeps jobs in a Redis list, for `manage.py run_jobs` workers to run.
+    """
+
+    key = 'apibot:jobs'
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.StrictRedis.from_url(url)
+
+    def enqueue(self, name, *args):
+        self.client.rpush(self.key, json.dumps({'job': name, 'args': args}))
+
+    def depth(self):
+        return self.client.llen(self.key)
+
+    def work(self, burst=False, timeout=5):
+        while True:
+            if burst:
+                item = self.client.lpop(self.key)
+                if item is None:
+                    return
+            else:
+                item = self.client.blpop(self.key, timeout)
+                if item is None:
+                    continue
+                item = item[1]
+            job = json.loads(item.decode('utf-8'))
+            run_job(job['job'], job['args'])
+
+
+_queues = {}
+
+
+def get_queue():
+    """
+    Returns the queue configured by APIBOT_JOB_QUEUE_URL:
+    Redis if it is set, else a queue local to this process.
+    """
+    url = getattr(settings, 'APIBOT_JOB_QUEUE_URL', '')
+    thread = getattr(settings, 'APIBOT_JOB_QUEUE_THREAD', True)
+    if (url, thread) not in _queues:
+        _queues[url, thread] = RedisQueue(url) if url else LocalQueue(thread)
+    return _queues[url, thread]
+
+
+def enqueue(name, *args):
+    """
+    Queues a job once the current transaction commits,
+    so that the job sees the rows it is about.
+    :param name: The dotted path of the function to run
+    """
+    transaction.on_commit(lambda: get_queue().enqueue(name, *args))
@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import asyncio
+import json
+import random
+import ssl
+from collections import namedtuple, OrderedDict
+from itertools import count
+from urllib.parse import urlparse
+
+from .benchmark import percentile
+from .lists import general_data, info_fields, swagger_fields
+from .models import Swagger
+from .warmup import hot_swaggers
+
+
+# api.ai gives up on a webhook after 5 seconds
+API_AI_TIMEOUT = 5.0
+
+# How often each intent starts a turn of a synthetic conversation
+INTENT_MIX = OrderedDict((
+    ('api.list', 1),
+    ('api.status', 1),
+    ('api.info', 4),
+    ('api.operation', 2),
+    ('api.path', 2),
+    ('api.object-definition', 2),
+))
+
+# What a synthetic conversation can ask about an API
+Vocabulary = namedtuple('Vocabulary', ('api', 'operations', 'paths', 'definitions'))
+
+# The outcome of one request; status is None when there was no answer
+Sample = namedtuple('Sample', ('action', 'status', 'latency', 'lag', 'error'))
+
+
+def make_payload(session_id, action, parameters, contexts=(), query=''):
+    """
+    Builds the body api.ai posts to the bot webhook, see BotSerializer.
+    """
+    return {
+        'lang': 'en',
+        'timestamp': '2017-08-01T12:00:00.000Z',
+        'sessionId': session_id,
+        'result': {
+            'parameters': parameters,
+            'contexts': list(contexts),
+            'resolvedQuery': query or action,
+            'source': 'agent',
+            'action': action,
+            'metadata': {'intentName': action, 'webhookUsed': True},
+        },
+    }
+
+
+def load_vocabularies(count=50, limit=20, apis=None):
+    """
+    Reads what there is to ask about ready APIs from their parsed
+    Swagger files, at most limit operations, paths and definitions each.
+    :param count: How many APIs, the ones asked about the most
+    :param apis: Names of the APIs, instead of the ones asked about the most
+    :rtype: list of Vocabulary
+    """
+    if apis:
+        swaggers = Swagger.objects.filter(status=Swagger.READY, name__in=apis).exclude(spec_hash='').order_by('name')
+    else:
+        swaggers = hot_swaggers(count)
+    vocabularies = []
+    for swagger in swaggers:
+        try:
+            parser = swagger.get_spec().parser
+        except Exception:
+            continue
+        vocabularies.append(Vocabulary(
+            swagger.name,
+            sorted(parser.operation)[:limit],
+            sorted(parser.paths)[:limit],
+            sorted(parser.specification.get('definitions') or {})[:limit],
+        ))
+    return vocabularies
+
+
+class SyntheticConversation(object):
+    """
+    A user asking the bot about one API over a few turns. The first
+    turn names the API; later ones leave it to the contexts, as api.ai
+    does, and the contexts the bot sends back are carried to the next
+    turn, so truncated answers and pages of APIs are followed up.
+    """
+
+    def __init__(self, session_id, vocabulary, turns, rng, mix=INTENT_MIX):
+        self.session_id = session_id
+        self.vocabulary = vocabulary
+        self.remaining = turns
+        self.rng = rng
+        self.mix = mix
+        self.contexts = []
+        self.turn = 0
+
+    @property
+    def done(self):
+        return self.remaining <= 0
+
+    def get_context(self, name):
+        for context in self.contexts:
+            if context.get('name') == name:
+                return context
+        return None
+
+    def choose_intent(self):
+        if self.get_context('show_more') and self.rng.random() < 0.6:
+            return 'api.show-more'
+        if self.get_context('api_list') and self.rng.random() < 0.6:
+            return 'api.list'
+        intents = [intent for intent, weight in self.mix.items() if weight > 0]
+        choice = self.rng.uniform(0, sum(self.mix[intent] for intent in intents))
+        for intent in intents:
+            choice -= self.mix[intent]
+            if choice <= 0:
+                return intent
+        return intents[-1]
+
+    def get_parameters(self, action):
+        rng = self.rng
+        vocabulary = self.vocabulary
+        if action == 'api.info':
+            return {'data': rng.choice(info_fields + swagger_fields + general_data)}
+        if action == 'api.operation' and vocabulary.operations:
+            return {'operation': rng.choice(vocabulary.operations)}
+        if action == 'api.path' and vocabulary.paths:
+            return {'path': rng.choice(vocabulary.paths)}
+        if action == 'api.object-definition' and vocabulary.definitions:
+            return {'object': rng.choice(vocabulary.definitions)}
+        return {}
+
+    def next_payload(self):
+        """
+        :rtype: tuple - (action, payload)
+        """
+        self.remaining -= 1
+        self.turn += 1
+        action = self.choose_intent()
+        parameters = self.get_parameters(action)
+        contexts = list(self.contexts)
+        if action not in ('api.list', 'api.show-more'):
+            if self.turn == 1:
+                parameters['api'] = self.vocabulary.api
+            else:
+                contexts.append({'name': 'api', 'lifespan': 5, 'parameters': {'api': self.vocabulary.api}})
+        return action, make_payload(self.session_id, action, parameters, contexts)
+
+    def answered(self, answer):
+        """
+        Keeps the contexts of an answer for the next turns, and lets the
+        older ones expire.
+        :param answer: The decoded answer of the bot, or None
+        """
+        contexts = []
+        for context in self.contexts:
+            if context.get('lifespan', 1) > 1:
+                contexts.append(dict(context, lifespan=context['lifespan'] - 1))
+        for context in (answer or {}).get('contextOut') or []:
+            contexts = [other for other in contexts if other.get('name') != context.get('name')]
+            contexts.append(context)
+        self.contexts = contexts
+
+
+class RecordedConversation(object):
+    """
+    Turns of a conversation that happened, replayed as they were.
+    """
+
+    def __init__(self, session_id, payloads):
+        self.session_id = session_id
+        self.payloads = list(payloads)
+
+    @property
+    def done(self):
+        return not self.payloads
+
+    def next_payload(self):
+        payload = self.payloads.pop(0)
+        return payload.get('result', {}).get('action', ''), payload
+
+    def answered(self, answer):
+        pass
+
+
+def synthetic_conversations(vocabularies, seed=0, max_turns=4, mix=INTENT_MIX):
+    """
+    Yields conversations of 1 to max_turns turns about random APIs, forever.
+    The same seed gives the same conversations.
+    """
+    if not vocabularies:
+        raise ValueError('There is no API to talk about')
+    rng = random.Random(seed)
+    for i in count():
+        yield SyntheticConversation(
+            'load-{0}-{1}'.format(seed, i), rng.choice(vocabularies), rng.randint(1, max_turns),
+            random.Random(rng.random()), mix,
+        )
+
+
+def read_recorded(path):
+    """
+    Reads recorded webhook traffic: one api.ai payload per line, in the
+    order they came, and groups them into conversations by sessionId.
+    :raises ValueError: when a line is not a payload
+    :rtype: list of RecordedConversation
+    """
+    sessions = OrderedDict()
+    with open(path, encoding='utf-8') as recorded:
+        for number, line in enumerate(recorded, 1):
+            if not line.strip():
+                continue
+            try:
+                payload = json.loads(line)
+                sessions.setdefault(payload['sessionId'], []).append(payload)
+            except (ValueError, KeyError, TypeError):
+                raise ValueError('Line {0} of {1} is not an api.ai payload'.format(number, path))
+    if not sessions:
+        raise ValueError('{0} has no payloads'.format(path))
+    return [RecordedConversation(session_id, payloads) for session_id, payloads in sessions.items()]
+
+
+def recorded_conversations(conversations):
+    """
+    Yields the recorded conversations over and over.
+    """
+    while True:
+        for conversation in conversations:
+            yield RecordedConversation(conversation.session_id, conversation.payloads)
+
+
+def schedule(rate, duration, ramp=0.0, start_rate=1.0):
+    """
+    Yields when to send each request, in seconds from the start: rate
+    requests per second, after growing linearly from start_rate over
+    the first ramp seconds.
+    """
+    t = 0.0
+    while t < duration:
+        yield t
+        current = rate
+        if ramp > 0 and t < ramp:
+            current = start_rate + (rate - start_rate) * t / ramp
+        t += 1.0 / max(current, 1e-3)
+
+
+class HttpError(Exception):
+    pass
+
+
+class ConnectionClosed(HttpError):
+    """
+    Raised when a connection is closed before the answer started.
+    """
+
+    def __init__(self, message, reused=False):
+        super(ConnectionClosed, self).__init__(message)
+        self.reused = reused
+
+
+class HttpClient(object):
+    """
+    A small HTTP/1.1 client on asyncio streams, with a pool of at most
+    connections kept-alive connections to one host.
+    """
+
+    def __init__(self, url, connections=100):
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise ValueError('Not an HTTP URL: {0}'.format(url))
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parsed.scheme == 'https' else None
+        self.path = parsed.path or '/'
+        if parsed.query:
+            self.path = '{0}?{1}'.format(self.path, parsed.query)
+        self.netloc = parsed.netloc
+        self.idle = []
+        self.slots = asyncio.Semaphore(connections)
+
+    async def connect(self, reuse=True):
+        if reuse and self.idle:
+            return self.idle.pop(), True
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl), False
+
+    async def post_json(self, payload):
+        """
+        :rtype: tuple - (status, body as bytes)
+        """
+        body = json.dumps(payload).encode('utf-8')
+        request = (
+            'POST {0} HTTP/1.1\r\nHost: {1}\r\nContent-Type: application/json\r\n'
+            'Accept: application/json\r\nContent-Length: {2}\r\n\r\n'
+        ).format(self.path, self.netloc, len(body)).encode('latin-1') + body
+        async with self.slots:
+            try:
+                return await self.send(request)
+            except ConnectionClosed as e:
+                if not e.reused:
+                    raise
+            # The server closed the connection while it was idle, so it
+            # never got the request: that is the client's doing, not an error
+            return await self.send(request, reuse=False)
+
+    async def send(self, request, reuse=True):
+        (reader, writer), reused = await self.connect(reuse)
+        try:
+            writer.write(request)
+            status, keep_alive, content = await self.read_response(reader, reused)
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, content
+
+    async def read_response(self, reader, reused=False):
+        try:
+            line = await reader.readline()
+        except ConnectionResetError:
+            line = b''
+        if not line:
+            raise ConnectionClosed('The connection was closed', reused)
+        parts = line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise HttpError('Not an HTTP answer: {0!r}'.format(line[:100]))
+        version, status = parts[0], int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'content-length' in headers:
+            content = await reader.readexactly(int(headers['content-length']))
+        else:
+            content = await reader.read()
+            keep_alive = False
+        return status, keep_alive, content
+
+    def close(self):
+        for _reader, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+
+class LoadGenerator(object):
+    """
+    Sends the turns of conversations to the bot webhook at a target rate.
+
+    Requests go out on schedule whether or not earlier ones were answered,
+    as api.ai sends them, and latencies count from when a request was due,
+    so a server that falls behind cannot hide it. A conversation sends its
+    next turn at the next due time after its previous turn was answered;
+    a new conversation starts when no conversation is waiting.
+    """
+
+    def __init__(self, url, conversations, connections=100, timeout=API_AI_TIMEOUT * 2):
+        self.url = url
+        self.conversations = conversations
+        self.connections = connections
+        self.timeout = timeout
+        self.samples = []
+        self.elapsed = 0.0
+
+    async def turn(self, client, conversation, due, waiting):
+        loop = asyncio.get_event_loop()
+        action, payload = conversation.next_payload()
+        lag = loop.time() - due
+        status = answer = error = None
+        try:
+            status, content = await asyncio.wait_for(client.post_json(payload), self.timeout)
+            if status == 200:
+                answer = json.loads(content.decode('utf-8'))
+            else:
+                error = 'HTTP {0}'.format(status)
+        except asyncio.TimeoutError:
+            error = 'timeout'
+        except (OSError, ValueError, HttpError, asyncio.IncompleteReadError) as e:
+            error = e.__class__.__name__
+        self.samples.append(Sample(action, status, loop.time() - due, lag, error))
+        conversation.answered(answer)
+        if not conversation.done:
+            waiting.append(conversation)
+
+    async def run_async(self, times):
+        loop = asyncio.get_event_loop()
+        client = HttpClient(self.url, self.connections)
+        waiting = []
+        tasks = []
+        start = loop.time()
+        try:
+            for at in times:
+                delay = start + at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                conversation = waiting.pop(0) if waiting else next(self.conversations)
+                tasks.append(asyncio.ensure_future(self.turn(client, conversation, start + at, waiting)))
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            self.elapsed = loop.time() - start
+            client.close()
+
+    def run(self, rate, duration, ramp=0.0, start_rate=1.0):
+        """
+        :rtype: list of Sample
+        """
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.run_async(schedule(rate, duration, ramp, start_rate)))
+        finally:
+            loop.close()
+            asyncio.set_event_loop(None)
+        return self.samples
+
+
+def summarize(samples, elapsed, deadline=API_AI_TIMEOUT):
+    """
+    :param elapsed: Seconds the load lasted
+    :param deadline: Seconds after which api.ai has given up on an answer
+    :rtype: OrderedDict - throughput of answers, latency percentiles of
+        every request, the rate of errors and of requests api.ai would
+        have given up on, over all actions and per action
+    """
+    def measures(samples):
+        latencies = sorted(sample.latency * 1000 for sample in samples)
+        errors = sum(1 for sample in samples if sample.error)
+        missed = sum(1 for sample in samples if sample.error or sample.latency > deadline)
+        total = len(samples) or 1
+        return OrderedDict((
+            ('requests', len(samples)),
+            ('throughput_rps', (len(samples) - errors) / elapsed if elapsed else 0.0),
+            ('p50_ms', percentile(latencies, 50)),
+            ('p95_ms', percentile(latencies, 95)),
+            ('p99_ms', percentile(latencies, 99)),
+            ('error_rate', errors / total),
+            ('miss_rate', missed / total),
+        ))
+
+    actions = OrderedDict()
+    for sample in sorted(samples, key=lambda sample: sample.action):
+        actions.setdefault(sample.action, []).append(sample)
+    summary = measures(samples)
+    summary['max_lag_ms'] = max([sample.lag * 1000 for sample in samples] or [0.0])
+    summary['actions'] = OrderedDict((action, measures(samples)) for action, samples in actions.items())
+    summary['errors'] = OrderedDict(sorted(
+        (error, sum(1 for sample in samples if sample.error == error))
+        for error in set(sample.error for sample in samples if sample.error)
+    ))
+    return summary
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import os
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmark import BotBenchmark, compare, load_baseline, save_baseline, test_database
+
+
+def sizes(value):
+    try:
+        values = sorted(set(int(size) for size in value.split(',')))
+    except ValueError:
+        values = []
+    if not values or values[0] < 1:
+        raise CommandError('Sizes are a comma separated list of positive numbers, not {0}'.format(value))
+    return values
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the answers of the bot to every action, against generated Swagger files and catalogs of growing size. '
+        'Runs on a test database of its own, in a transaction that is rolled back, and without the network. '
+        'Fails when a baseline is given and an answer takes more memory or makes more queries, '
+        'or with --latency got slower.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000,10000', help='Paths and definitions of the Swagger files.')
+        parser.add_argument('--catalogs', default='10,1000,100000', help='Numbers of APIs.')
+        parser.add_argument('--runs', type=int, default=30, help='Answers timed per action.')
+        parser.add_argument('--baseline', help='A JSON file of results to compare with.')
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results to --baseline instead.')
+        parser.add_argument(
+            '--latency', action='store_true',
+            help='Save or compare latencies too. They only compare with a baseline saved on the same machine, '
+                 'e.g. benchmarks/bot.local.json.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.5,
+            help='How much slower or bigger than the baseline an answer may get, 0.5 being 50%%.',
+        )
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1.')
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('--save-baseline needs --baseline.')
+        baseline = None
+        if options['baseline'] and not options['save_baseline']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError('No baseline at {0}, make one with --save-baseline.'.format(options['baseline']))
+            baseline = load_baseline(options['baseline'])
+
+        self.stdout.write('{0:<16} {1:<26} {2:>9} {3:>8} {4:>8} {5:>8} {6:>9} {7:>9} {8:>7}'.format(
+            'scenario', 'action', 'cold ms', 'p50 ms', 'p95 ms', 'p99 ms', 'cache ms', 'peak KB', 'queries'))
+        results = OrderedDict()
+        benchmark = BotBenchmark(options['runs'])
+        with test_database(max(options['verbosity'] - 1, 0)):
+            for scenario, action, measures in benchmark.run(sizes(options['sizes']), sizes(options['catalogs'])):
+                results['{0} {1}'.format(scenario, action)] = measures
+                self.stdout.write(
+                    '{0:<16} {1:<26} {cold_ms:9.1f} {p50_ms:8.2f} {p95_ms:8.2f} {p99_ms:8.2f} '
+                    '{cached_p50_ms:9.2f} {peak_kb:9.1f} {queries:7d}'.format(scenario, action, **measures))
+
+        if options['save_baseline']:
+            save_baseline(options['baseline'], results, options['latency'])
+            self.stdout.write(self.style.SUCCESS('Saved the baseline to {0}'.format(options['baseline'])))
+        elif baseline is not None:
+            try:
+                regressions = compare(results, baseline, options['tolerance'], options['latency'])
+            except ValueError as e:
+                raise CommandError(str(e))
+            if regressions:
+                raise CommandError('Regressions against {0}:\n{1}'.format(options['baseline'], '\n'.join(regressions)))
+            self.stdout.write(self.style.SUCCESS('No regressions against {0}'.format(options['baseline'])))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from ...fastpath import bot_request, bot_response
+from ...serializers import BotSerializer, BotResponseSerializer
+
+
+PAYLOAD = {
+    'lang': 'en',
+    'timestamp': '2017-08-01T12:00:00.000Z',
+    'sessionId': '0f6b1a8e-3f0c-4a5e-9d3c-2c1b0e1f2a3b',
+    'result': {
+        'parameters': {'api': 'petstore', 'path': '/pet/{petId}'},
+        'contexts': [
+            {'name': 'api', 'lifespan': 5, 'parameters': {'api': 'petstore', 'api.original': 'petstore'}},
+            {'name': 'path', 'lifespan': 2, 'parameters': {'path': '/pet/{petId}'}},
+        ],
+        'resolvedQuery': 'Explain path /pet/{petId}',
+        'source': 'agent',
+        'action': 'api.path',
+        'metadata': {'intentId': '5a9c', 'webhookUsed': 'true', 'intentName': 'path'},
+    },
+}
+
+RESPONSE = {
+    'displayText': 'Here is a *list of paths* defined',
+    'speech': 'Here is a *list of paths* defined',
+    'data': {
+        'slack': {
+            'text': 'Here is a *list of paths* defined',
+            'attachments': [{
+                'text': 'Which path you want to know more about? Here are the top paths:',
+                'fallback': 'Something went wrong here...',
+                'callback_id': 'paths',
+                'actions': [
+                    {'name': path, 'text': path, 'value': 'Explain path {0}'.format(path)}
+                    for path in ('/pet', '/pet/findByStatus', '/pet/{petId}', '/store/order', '/user/login')
+                ],
+            }],
+        },
+    },
+    'contextOut': [{'name': 'api', 'lifespan': 5, 'parameters': {'api': 'petstore'}}],
+}
+
+
+def validate_drf():
+    serializer = BotSerializer(data=PAYLOAD)
+    serializer.is_valid()
+    return serializer.validated_data
+
+
+def render_drf():
+    return BotResponseSerializer(RESPONSE).data
+
+
+class Command(BaseCommand):
+    help = 'Times the serialization of a typical api.ai request and response, through DRF and through the fast path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000, help='Runs per measurement.')
+        parser.add_argument('--repeat', type=int, default=5, help='Measurements, the best one counts.')
+
+    def handle(self, *args, **options):
+        cases = (
+            ('request, DRF', validate_drf),
+            ('request, fast path', lambda: bot_request.validate(PAYLOAD)),
+            ('response, DRF', render_drf),
+            ('response, fast path', lambda: bot_response.render(RESPONSE)),
+        )
+        for name, case in cases:
+            best = min(timeit.repeat(case, number=options['number'], repeat=options['repeat']))
+            self.stdout.write('{0:<20} {1:8.1f} us per call'.format(name, best / options['number'] * 1e6))
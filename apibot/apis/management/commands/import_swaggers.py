@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...bulk import BulkImport, CREATED, read_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        'Adds many APIs at once, from a JSON or CSV manifest with a name and a url per API, '
+        'or from a directory of Swagger files named after their APIs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='A .json or .csv manifest, or a directory of .json Swagger files.')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent downloads.')
+        parser.add_argument('--per-host', type=int, default=2, help='Concurrent downloads from one host.')
+        parser.add_argument('--timeout', type=float, help='Seconds to wait for a host.')
+        parser.add_argument('--batch-size', type=int, default=100, help='APIs inserted per query.')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['per_host'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers, --per-host and --batch-size must be at least 1.')
+        try:
+            items = read_manifest(options['source'])
+        except (OSError, ValueError) as e:
+            raise CommandError('Cannot read {0}: {1}'.format(options['source'], e))
+
+        importer = BulkImport(options['workers'], options['per_host'], options['timeout'], options['batch_size'])
+        counts = Counter()
+        start = time.time()
+        for result in importer.run(items):
+            counts[result.status] += 1
+            if result.status != CREATED:
+                self.stdout.write(self.style.ERROR('{0}: {1} - {2}'.format(result.name, result.status, result.detail)))
+            elif options['verbosity'] > 0:
+                self.stdout.write('{0}: {1}'.format(result.name, result.status))
+
+        self.stdout.write(self.style.SUCCESS('Imported {0} of {1} APIs in {2:.1f} s: {3}.'.format(
+            counts[CREATED], len(items), time.time() - start,
+            ', '.join('{0} {1}'.format(count, status) for status, count in sorted(counts.items())) or 'nothing to do')))
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from ...ingest import ingest_swagger
+from ...jobs import get_queue, RedisQueue
+from ...models import Swagger
+
+
+class Command(BaseCommand):
+    help = (
+        'Ingests the Swagger files of pending APIs, such as those never downloaded before ingestion existed: '
+        'through the job queue when there is one, else right here.'
+    )
+
+    def handle(self, *args, **options):
+        ids = list(Swagger.objects.filter(status=Swagger.PENDING).order_by('id').values_list('pk', flat=True))
+        queue = get_queue()
+        if isinstance(queue, RedisQueue):
+            for swagger_id in ids:
+                queue.enqueue('apibot.apis.ingest.ingest_swagger', swagger_id)
+            self.stdout.write(self.style.SUCCESS('Queued {0} pending APIs.'.format(len(ids))))
+            return
+
+        # Without Redis, the queues of the web processes cannot be reached
+        for swagger_id in ids:
+            ingest_swagger(swagger_id)
+        counts = Counter(Swagger.objects.filter(pk__in=ids).values_list('status', flat=True))
+        self.stdout.write(self.style.SUCCESS('Ingested {0} pending APIs: {1}.'.format(
+            len(ids), ', '.join('{0} {1}'.format(count, status) for status, count in sorted(counts.items())) or 'nothing to do')))
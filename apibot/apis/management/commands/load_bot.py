@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...loadgen import (
+    API_AI_TIMEOUT,
+    LoadGenerator,
+    load_vocabularies,
+    read_recorded,
+    recorded_conversations,
+    summarize,
+    synthetic_conversations,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Sends conversations to the bot webhook at a fixed or ramped rate, the way api.ai does, '
+        'and reports the throughput, latencies, errors and how many answers api.ai would have given up on. '
+        'Conversations are made up about the APIs asked about the most, or replayed from recorded traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/api/v1/apis/bot/', help='The bot webhook.')
+        parser.add_argument('--rate', type=float, default=10.0, help='Requests per second.')
+        parser.add_argument('--duration', type=float, default=60.0, help='Seconds to send requests for.')
+        parser.add_argument('--ramp', type=float, default=0.0, help='Seconds to grow the rate from --ramp-from.')
+        parser.add_argument('--ramp-from', type=float, default=1.0, help='Requests per second to start the ramp at.')
+        parser.add_argument(
+            '--recorded',
+            help='A file of recorded api.ai payloads, one JSON object per line, to replay instead of made up conversations.',
+        )
+        parser.add_argument('--apis', help='Comma separated names of the APIs to talk about.')
+        parser.add_argument('--count', type=int, default=50, help='How many of the APIs asked about the most to talk about.')
+        parser.add_argument('--max-turns', type=int, default=4, help='Turns of a made up conversation, at most.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the made up conversations.')
+        parser.add_argument('--connections', type=int, default=100, help='Connections to the bot, at most.')
+        parser.add_argument('--timeout', type=float, default=API_AI_TIMEOUT * 2, help='Seconds to wait for an answer.')
+        parser.add_argument(
+            '--deadline', type=float, default=API_AI_TIMEOUT,
+            help='Seconds after which api.ai gives up on an answer.',
+        )
+        parser.add_argument('--max-miss-rate', type=float, help='Fail when more answers miss the deadline, 0.01 being 1%%.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+
+    def get_conversations(self, options):
+        if options['recorded']:
+            try:
+                return recorded_conversations(read_recorded(options['recorded']))
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+        apis = [name.strip() for name in (options['apis'] or '').split(',') if name.strip()]
+        vocabularies = load_vocabularies(options['count'], apis=apis)
+        if not vocabularies:
+            raise CommandError('There is no ready API to talk about, add some or use --recorded.')
+        return synthetic_conversations(vocabularies, options['seed'], max(options['max_turns'], 1))
+
+    def handle(self, *args, **options):
+        if options['rate'] <= 0 or options['duration'] <= 0:
+            raise CommandError('--rate and --duration must be positive.')
+        generator = LoadGenerator(
+            options['url'], self.get_conversations(options), options['connections'], options['timeout'])
+        try:
+            samples = generator.run(options['rate'], options['duration'], options['ramp'], options['ramp_from'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        summary = summarize(samples, generator.elapsed, options['deadline'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+        else:
+            self.write_report(summary, generator.elapsed)
+
+        if options['max_miss_rate'] is not None and summary['miss_rate'] > options['max_miss_rate']:
+            raise CommandError('{0:.2%} of the answers missed the {1} s deadline, more than {2:.2%}.'.format(
+                summary['miss_rate'], options['deadline'], options['max_miss_rate']))
+
+    def write_report(self, summary, elapsed):
+        self.stdout.write('{0} requests in {1:.1f} s, the sender fell behind by {2:.1f} ms at most'.format(
+            summary['requests'], elapsed, summary['max_lag_ms']))
+        line = '{0:<24} {1:>8} {2:>8} {3:>8} {4:>8} {5:>8} {6:>7} {7:>7}'
+        self.stdout.write(line.format('action', 'requests', 'rps', 'p50 ms', 'p95 ms', 'p99 ms', 'errors', 'missed'))
+        rows = [('all', summary)] + list(summary['actions'].items())
+        for action, measures in rows:
+            self.stdout.write(
+                '{0:<24} {requests:8d} {throughput_rps:8.1f} {p50_ms:8.1f} {p95_ms:8.1f} {p99_ms:8.1f} '
+                '{error_rate:7.1%} {miss_rate:7.1%}'.format(action, **measures))
+        for error, count in summary['errors'].items():
+            self.stdout.write('{0}: {1}'.format(error, count))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from ...cache import content_hash
+from ...fetch import SpecFetcher, SwaggerFetchError
+from ...ingest import IngestError, validate_swaggerfile
+from ...models import FILE_URL_PREFIX, Swagger
+from ...store import write_store
+
+
+DURATION_UNITS = {
+    's': 'seconds',
+    'm': 'minutes',
+    'h': 'hours',
+    'd': 'days',
+}
+
+
+def parse_duration(value):
+    """
+    Parses durations such as 90s, 30m, 6h or 2d. A plain number means seconds.
+    :rtype: timedelta
+    """
+    match = re.match(r'^(\d+)([smhd]?)$', value.strip())
+    if not match:
+        raise CommandError('Invalid duration: {0}'.format(value))
+    return timedelta(**{DURATION_UNITS[match.group(2) or 's']: int(match.group(1))})
+
+
+class Command(BaseCommand):
+    help = 'Downloads the Swagger files of all ready APIs again, storing those that changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only refresh Swagger files not fetched within this long, e.g. 30m, 6h or 2d.',
+        )
+        parser.add_argument(
+            '--api',
+            action='append',
+            dest='apis',
+            help='Only refresh the API with this name. Can be given more than once.',
+        )
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent downloads.')
+        parser.add_argument('--per-host', type=int, default=2, help='Concurrent downloads from one host.')
+        parser.add_argument('--timeout', type=float, help='Seconds to wait for a host.')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Download every Swagger file in full instead of making conditional requests.',
+        )
+
+    def get_queryset(self, options):
+        # Pending and failed APIs belong to the ingestion jobs, see ingest.py,
+        # and imported files have no host to refresh them from
+        queryset = Swagger.objects.filter(status=Swagger.READY).exclude(
+            swaggerfile__startswith=FILE_URL_PREFIX,
+        ).defer(*Swagger.spec_fields).order_by('fetched', 'id')
+        if options['since']:
+            stale = timezone.now() - parse_duration(options['since'])
+            queryset = queryset.filter(Q(fetched__isnull=True) | Q(fetched__lt=stale))
+        if options['apis']:
+            queryset = queryset.filter(name__in=options['apis'])
+        return queryset
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['per_host'] < 1:
+            raise CommandError('--workers and --per-host must be at least 1.')
+
+        fetcher = SpecFetcher(options['workers'], options['per_host'], options['timeout'])
+        counts = {'changed': 0, 'unchanged': 0, 'failed': 0}
+        total_bytes = 0
+        start = time.time()
+
+        swaggers = self.get_queryset(options).iterator()
+        for swagger, result, error, elapsed in fetcher.fetch_all(swaggers, not options['force']):
+            if result is not None and not result.not_modified and content_hash(result.body) != swagger.spec_hash:
+                # An invalid new version does not replace the stored one
+                try:
+                    validate_swaggerfile(result.body, result.url)
+                except IngestError as e:
+                    result, error = None, SwaggerFetchError(str(e), result.status)
+            changed = swagger.record_fetch(result, error)
+            if swagger.fetch_error:
+                counts['failed'] += 1
+                self.stdout.write(self.style.ERROR('{0}: failed in {1:.0f} ms - {2}'.format(
+                    swagger.name, elapsed * 1000, swagger.fetch_error)))
+                continue
+
+            counts['changed' if changed else 'unchanged'] += 1
+            total_bytes += result.size
+            if options['verbosity'] > 0:
+                self.stdout.write('{0}: {1} in {2:.0f} ms, {3} bytes'.format(
+                    swagger.name, 'changed' if changed else 'unchanged', elapsed * 1000, result.size))
+
+        self.stdout.write(self.style.SUCCESS(
+            'Refreshed {0} APIs in {1:.1f} s: {changed} changed, {unchanged} unchanged, '
+            '{failed} failed, {2} bytes downloaded.'.format(
+                sum(counts.values()), time.time() - start, total_bytes, **counts)))
+
+        path = getattr(settings, 'APIBOT_SPEC_STORE_PATH', '')
+        if path:
+            start = time.time()
+            swaggers = Swagger.objects.filter(status=Swagger.READY).exclude(spec_hash='').order_by('id').iterator()
+            count = write_store(path, swaggers)
+            self.stdout.write(self.style.SUCCESS(
+                'Wrote {0} Swagger files to {1} in {2:.1f} s.'.format(count, path, time.time() - start)))
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...jobs import get_queue, RedisQueue
+
+
+class Command(BaseCommand):
+    help = 'Runs the jobs of the bot, such as ingesting the Swagger files of new APIs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Stop once there are no jobs left instead of waiting for more.',
+        )
+
+    def handle(self, *args, **options):
+        queue = get_queue()
+        if not isinstance(queue, RedisQueue):
+            raise CommandError('APIBOT_JOB_QUEUE_URL is not set, jobs run inside the web processes.')
+        self.stdout.write('Waiting for jobs in {0}'.format(queue.key))
+        queue.work(burst=options['burst'])
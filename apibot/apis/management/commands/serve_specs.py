@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...stubhost import ETAG_MODES, methods_option, StubSpecServer
+
+
+class Command(BaseCommand):
+    help = (
+        'Serves generated Swagger files over HTTP, from a host that can be slow, fail, '
+        'drip its answers or mishandle ETags, to test and load test the bot against. '
+        'The query string of a request can change every option, such as ?paths=1000&latency=0.5.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8001)
+        parser.add_argument('--paths', type=int, default=10, help='Paths of the Swagger files.')
+        parser.add_argument('--definitions', type=int, help='Definitions of the Swagger files, as many as paths by default.')
+        parser.add_argument('--methods', type=methods_option, default='get,put,delete', help='Methods of every path.')
+        parser.add_argument('--ref-depth', type=int, help='How many $refs a definition leads through.')
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument('--size', type=int, help='About how many bytes a Swagger file takes, at least.')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds before answering.')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='How often to fail, from 0 to 1.')
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument('--etag', choices=ETAG_MODES, default='strong')
+        parser.add_argument('--drip-bytes', type=int, default=0, help='Send the bodies this many bytes at a time.')
+        parser.add_argument('--drip-delay', type=float, default=0.0, help='Seconds between the parts of a body.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the errors.')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError('--error-rate is between 0 and 1.')
+        try:
+            server = StubSpecServer(
+                options['host'], options['port'], seed=options['seed'], verbose=options['verbosity'] > 1,
+                paths=options['paths'], definitions=options['definitions'], methods=options['methods'],
+                ref_depth=options['ref_depth'], tags=options['tags'], size=options['size'],
+                latency=options['latency'], error_rate=options['error_rate'], error_status=options['error_status'],
+                etag=options['etag'], drip_bytes=options['drip_bytes'], drip_delay=options['drip_delay'],
+            )
+        except OSError as e:
+            raise CommandError('Cannot listen on {0}:{1}: {2}'.format(options['host'], options['port'], e))
+        self.stdout.write('Serving Swagger files at {0}'.format(server.url()))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        self.stdout.write('Served {0} requests: {1}'.format(server.count, ', '.join(
+            '{0} x {1}'.format(count, status) for status, count in sorted(server.statuses.items(), key=lambda item: str(item[0])))))
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import os
+
+from django.conf import settings
+from prometheus_client import (
+    CollectorRegistry,
+    CONTENT_TYPE_LATEST,
+    Counter,
+    Gauge,
+    generate_latest,
+    Histogram,
+    REGISTRY,
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+
+# prometheus_client keeps the metrics of every process in files in this
+# directory when it is set, and a scrape adds them up. It must be set
+# before prometheus_client is imported, see config/gunicorn.py.
+MULTIPROCESS_DIR_VARIABLE = 'prometheus_multiproc_dir'
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+BOT_REQUEST_SECONDS = Histogram(
+    'apibot_bot_request_seconds', 'Seconds to answer the bot webhook, by action.',
+    ['action'], buckets=LATENCY_BUCKETS,
+)
+BOT_REQUEST_QUERIES = Histogram(
+    'apibot_bot_request_queries', 'Database queries to answer the bot webhook, by action.',
+    ['action'], buckets=QUERY_BUCKETS,
+)
+BOT_REQUESTS = Counter(
+    'apibot_bot_requests_total', 'Requests to the bot webhook, by action and HTTP status, 500 when one raised.',
+    ['action', 'status'],
+)
+SPEC_FETCH_SECONDS = Histogram(
+    'apibot_spec_fetch_seconds', 'Seconds to download a Swagger file, by host.',
+    ['host'], buckets=LATENCY_BUCKETS,
+)
+SPEC_FETCHES = Counter(
+    'apibot_spec_fetches_total', 'Downloads of Swagger files, by host and HTTP status.',
+    ['host', 'status'],
+)
+SPEC_FETCH_BYTES = Counter(
+    'apibot_spec_fetch_bytes_total', 'Bytes of Swagger files downloaded, by host.',
+    ['host'],
+)
+SPEC_PARSE_SECONDS = Histogram(
+    'apibot_spec_parse_seconds', 'Seconds to parse a Swagger file, by where it was read from.',
+    ['source'], buckets=LATENCY_BUCKETS,
+)
+SPEC_CACHE_LOOKUPS = Counter(
+    'apibot_spec_cache_lookups_total',
+    'Parsed Swagger files asked for, by where they were found: memory is a hit of the process cache.',
+    ['source'],
+)
+SPEC_CACHE_EVICTIONS = Counter(
+    'apibot_spec_cache_evictions_total', 'Parsed Swagger files dropped to stay within the memory budget.',
+)
+SPEC_CACHE_BYTES = Gauge(
+    'apibot_spec_cache_bytes', 'Memory taken by parsed Swagger files, over all live processes.',
+    multiprocess_mode='livesum',
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    'apibot_response_cache_lookups_total', 'Cacheable bot answers asked for, by hit or miss.',
+    ['result'],
+)
+
+
+def observe_fetch(host, status, seconds, size=0):
+    """
+    :param status: The HTTP status, or None when the host did not answer
+    """
+    SPEC_FETCH_SECONDS.labels(host).observe(seconds)
+    SPEC_FETCHES.labels(host, str(status or 'error')).inc()
+    if size:
+        SPEC_FETCH_BYTES.labels(host).inc(size)
+
+
+def observe_bot_request(action, status, seconds, queries):
+    BOT_REQUESTS.labels(action, str(status)).inc()
+    BOT_REQUEST_SECONDS.labels(action).observe(seconds)
+    BOT_REQUEST_QUERIES.labels(action).observe(queries)
+
+
+class QueryCounter(object):
+    """
+    Counts the queries made on a connection, through its debug cursor,
+    since Django 1.10 has no other way to see them. The queries logged
+    on the way are forgotten afterwards, unless something else asked
+    for them.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.forced = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        self.initial = len(connection.queries_log)
+
+    def stop(self):
+        """
+        :rtype: int - the number of queries since the counter was made
+        """
+        connection = self.connection
+        count = len(connection.queries_log) - self.initial
+        connection.force_debug_cursor = self.forced
+        if not self.forced and not settings.DEBUG:
+            connection.queries_log.clear()
+        return max(count, 0)
+
+
+class JobQueueCollector(object):
+    """
+    Reads the depth of the ingestion queue when the metrics are scraped.
+    """
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from .jobs import get_queue
+        yield GaugeMetricFamily(
+            'apibot_job_queue_depth',
+            'Jobs waiting in the queue: the Redis one, or the one of the scraped process without Redis.',
+            value=get_queue().depth(),
+        )
+
+
+def multiprocess_dir():
+    return os.environ.get(MULTIPROCESS_DIR_VARIABLE, '')
+
+
+def mark_process_dead(pid):
+    """
+    Stops counting the gauges of a process that exited. Its counters
+    and histograms stay, since they add up to the totals.
+    """
+    path = multiprocess_dir()
+    if path:
+        multiprocess.mark_process_dead(pid, path)
+
+
+REGISTRY.register(JobQueueCollector())
+
+
+def get_registry():
+    """
+    :rtype: CollectorRegistry - with the metrics of every process
+        when there are several, and the depth of the queue
+    """
+    path = multiprocess_dir()
+    if not path:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path)
+    registry.register(JobQueueCollector())
+    return registry
+
+
+def render_metrics():
+    """
+    :rtype: tuple - (the metrics in the Prometheus text format, its content type)
+    """
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.10.7 on 2026-10-18 12:46
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0002_auto_20170801_0257'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='swagger',
+            name='etag',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='ETag'),
+        ),
+        migrations.AddField(
+            model_name='swagger',
+            name='fetch_error',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Error of the last fetch'),
+        ),
+        migrations.AddField(
+            model_name='swagger',
+            name='fetch_status',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='HTTP status of the last fetch'),
+        ),
+        migrations.AddField(
+            model_name='swagger',
+            name='fetched',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Last fetched'),
+        ),
+        migrations.AddField(
+            model_name='swagger',
+            name='last_modified',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Last-Modified'),
+        ),
+        migrations.AddField(
+            model_name='swagger',
+            name='spec_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Swagger file SHA-256'),
+        ),
+        migrations.AddField(
+            model_name='swagger',
+            name='spec_json',
+            field=models.BinaryField(null=True, verbose_name='Swagger file as compressed JSON'),
+        ),
+        migrations.AddField(
+            model_name='swagger',
+            name='spec_raw',
+            field=models.BinaryField(null=True, verbose_name='Swagger file as downloaded'),
+        ),
+    ]
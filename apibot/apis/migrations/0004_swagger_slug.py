@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models, transaction, DatabaseError
+from django.utils.text import slugify
+
+
+SLUG_MAX_LENGTH = 100
+
+
+def fill_slugs(apps, schema_editor):
+    Swagger = apps.get_model('apis', 'Swagger')
+    taken = set()
+    for swagger in Swagger.objects.order_by('id'):
+        base = slugify(swagger.name, allow_unicode=True).casefold() or swagger.name.strip().casefold()
+        slug, n = base[:SLUG_MAX_LENGTH], 1
+        # Names used to be allowed to clash; Swagger.save() keeps these slugs
+        while slug in taken:
+            n += 1
+            suffix = '-{0}'.format(n)
+            slug = base[:SLUG_MAX_LENGTH - len(suffix)] + suffix
+        taken.add(slug)
+        Swagger.objects.filter(pk=swagger.pk).update(slug=slug)
+
+
+def add_trigram_index(apps, schema_editor):
+    # Optional: fuzzy name lookups on PostgreSQL use pg_trgm and this index
+    # if we are allowed to enable it, see SwaggerQuerySet.resolve()
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic():
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            schema_editor.execute(
+                'CREATE INDEX apis_swagger_slug_trgm ON apis_swagger USING gin (slug gin_trgm_ops)')
+    except DatabaseError:
+        pass
+
+
+def remove_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS apis_swagger_slug_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0003_swagger_spec_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='swagger',
+            name='slug',
+            field=models.CharField(default='', editable=False, max_length=100, verbose_name='Normalized name'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='swagger',
+            name='slug',
+            field=models.CharField(editable=False, max_length=100, unique=True, verbose_name='Normalized name'),
+        ),
+        migrations.RunPython(add_trigram_index, remove_trigram_index),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+def mark_pending(apps, schema_editor):
+    # APIs added before Swagger files were stored were downloaded on their
+    # first question; now the ingestion does it, see `manage.py ingest_pending`
+    Swagger = apps.get_model('apis', 'Swagger')
+    Swagger.objects.filter(status='ready', spec_hash='').update(status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0005_swagger_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_pending, migrations.RunPython.noop),
+    ]
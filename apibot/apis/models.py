@@ -1,21 +1,144 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 
-import requests
-from django.db import models
+import json
+import zlib
+
+from django.db import connections, models
+from django.db.models.functions import Length
+from django.utils import timezone
+from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from model_utils.models import TimeStampedModel
-from swagger_parser import SwaggerParser
+
+from .cache import spec_cache, content_hash
+from .fetch import fetch_spec, SwaggerFetchError
+from .timing import phase
+
+
+SLUG_MAX_LENGTH = 100
+# The URLs of Swagger files imported from a directory, see bulk.read_manifest()
+FILE_URL_PREFIX = 'file:'
+
+# Whether pg_trgm is enabled, by database alias, see has_trigrams()
+_trigrams = {}
+
+
+def normalize_name(name):
+    """
+    Returns the form of an API name we look it up by, e.g. 'Pet Store' -> 'pet-store'.
+    """
+    slug = slugify(name, allow_unicode=True).casefold() or name.strip().casefold()
+    # casefold() can make a name longer, e.g. 'ß' -> 'ss'
+    return slug[:SLUG_MAX_LENGTH]
+
+
+def has_trigrams(connection):
+    """
+    Whether fuzzy name lookups can use pg_trgm, which migration 0004
+    enables when the database lets it. Checked once per process.
+    :rtype: bool
+    """
+    if connection.alias not in _trigrams:
+        enabled = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                enabled = cursor.fetchone() is not None
+        if enabled:
+            # What django.contrib.postgres registers, without the whole app
+            from django.contrib.postgres.lookups import TrigramSimilar
+            models.CharField.register_lookup(TrigramSimilar)
+        _trigrams[connection.alias] = enabled
+    return _trigrams[connection.alias]
+
+
+class SwaggerQuerySet(models.QuerySet):
+
+    def resolve(self, name):
+        """
+        Finds an API by name, the way a user would type it.
+        An exact match on the normalized name hits a unique index. Otherwise
+        the closest name containing or resembling the input wins, ranked by
+        trigram similarity when PostgreSQL has pg_trgm, whose index serves
+        both filters, else by prefix and then by length.
+        :raises Swagger.DoesNotExist: when no name comes close
+        :rtype: Swagger
+        """
+        slug = normalize_name(name)
+        try:
+            return self.get(slug=slug)
+        except self.model.DoesNotExist:
+            pass
+
+        if has_trigrams(connections[self.db]):
+            from django.contrib.postgres.search import TrigramSimilarity
+            # slug % input, unlike an annotated similarity, can use the index;
+            # it matches above pg_trgm.similarity_threshold, 0.3 by default
+            candidates = self.filter(
+                models.Q(slug__contains=slug) | models.Q(slug__trigram_similar=slug),
+            ).annotate(
+                similarity=TrigramSimilarity('slug', slug),
+            ).order_by('-similarity', 'slug')
+        else:
+            candidates = self.filter(slug__contains=slug).annotate(
+                prefix=models.Case(
+                    models.When(slug__startswith=slug, then=models.Value(0)),
+                    default=models.Value(1),
+                    output_field=models.IntegerField(),
+                ),
+                length=Length('slug'),
+            ).order_by('prefix', 'length', 'slug')
+
+        swagger = candidates.first()
+        if swagger is None:
+            raise self.model.DoesNotExist('No API matches {0}'.format(name))
+        return swagger
 
 
 class Swagger(TimeStampedModel):
     """
     A class to describe a Swagger file.
+
+    Besides the URL, we keep a copy of the Swagger file itself so that
+    answering the bot never depends on the host of the file.
     """
 
+    # Fields holding the stored Swagger file, which is big.
+    # Leave them out with .defer() when only the metadata is needed.
+    spec_fields = ('spec_raw', 'spec_json', )
+    # Fields updated by every fetch of the Swagger file
+    fetch_fields = ('fetched', 'etag', 'last_modified', 'fetch_status', 'fetch_error', )
+
+    # New APIs stay pending until their Swagger file is ingested in the background
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (READY, _('Ready')),
+        (FAILED, _('Failed')),
+    )
+
+    objects = SwaggerQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        swagger = super(Swagger, cls).from_db(db, field_names, values)
+        swagger._saved_name = swagger.__dict__.get('name')
+        return swagger
+
+    def save(self, *args, **kwargs):
+        # Only a new name gets a new slug: names that used to clash kept
+        # the slugs migration 0004 made unique, e.g. 'pet-store-2'
+        if not self.slug or self.name != getattr(self, '_saved_name', None):
+            self.slug = normalize_name(self.name)
+        super(Swagger, self).save(*args, **kwargs)
+        self._saved_name = self.name
+
     swaggerfile = models.URLField(
         _('Swagger file URL'),
         max_length=200,
@@ -23,10 +146,170 @@ class Swagger(TimeStampedModel):
     name = models.CharField(
         max_length=100,
     )
+    slug = models.CharField(
+        _('Normalized name'),
+        max_length=SLUG_MAX_LENGTH,
+        unique=True,
+        editable=False,
+    )
+    spec_raw = models.BinaryField(
+        _('Swagger file as downloaded'),
+        null=True,
+        editable=False,
+    )
+    spec_json = models.BinaryField(
+        _('Swagger file as compressed JSON'),
+        null=True,
+        editable=False,
+    )
+    spec_hash = models.CharField(
+        _('Swagger file SHA-256'),
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
+    fetched = models.DateTimeField(
+        _('Last fetched'),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    etag = models.CharField(
+        _('ETag'),
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    last_modified = models.CharField(
+        _('Last-Modified'),
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
+    fetch_status = models.PositiveSmallIntegerField(
+        _('HTTP status of the last fetch'),
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    fetch_error = models.CharField(
+        _('Error of the last fetch'),
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    status = models.CharField(
+        _('Ingestion status'),
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=READY,
+        editable=False,
+    )
+
+    def store_swaggerfile(self, body, etag='', last_modified=''):
+        """
+        Keeps a copy of a downloaded Swagger file. Does not save the instance.
+        :param body: The Swagger file as bytes
+        :rtype: bool - whether the content changed
+        """
+        specification = json.loads(body.decode('utf-8'))
+        digest = content_hash(body)
+        changed = digest != self.spec_hash
+
+        self.spec_raw = body
+        self.spec_json = zlib.compress(
+            json.dumps(specification, separators=(',', ':')).encode('utf-8'))
+        self.spec_hash = digest
+        self.etag = etag
+        self.last_modified = last_modified
+        return changed
+
+    @property
+    def is_file(self):
+        """
+        Whether the Swagger file was imported from a file, which is never fetched.
+        """
+        return self.swaggerfile.startswith(FILE_URL_PREFIX)
+
+    def cache_validators(self, conditional=True):
+        """
+        Returns the ETag and Last-Modified of the stored Swagger file,
+        to make a conditional request for it.
+        :rtype: tuple
+        """
+        if conditional and self.spec_hash:
+            return self.etag, self.last_modified
+        return '', ''
+
+    def fetch_swaggerfile(self, conditional=True, session=None, save=True):
+        """
+        Downloads the Swagger file and stores it.
+        Unless conditional is False, an unchanged file costs a single 304.
+        :rtype: FetchResult
+        """
+        etag, last_modified = self.cache_validators(conditional)
+        try:
+            with phase('fetch'):
+                result = fetch_spec(self.swaggerfile, etag, last_modified, session=session)
+        except SwaggerFetchError as e:
+            self.record_fetch(error=e, save=save)
+            raise
+        self.record_fetch(result, save=save)
+        if self.fetch_error:
+            raise SwaggerFetchError(self.fetch_error, self.fetch_status)
+        return result
+
+    def record_fetch(self, result=None, error=None, save=True):
+        """
+        Stores the outcome of downloading the Swagger file.
+        :param result: A FetchResult
+        :param error: A SwaggerFetchError, when the download failed
+        :rtype: bool - whether the content changed
+        """
+        changed = False
+        self.fetched = timezone.now()
+        if result is not None and result.not_modified:
+            self.etag = result.etag
+            self.last_modified = result.last_modified
+        elif result is not None:
+            try:
+                changed = self.store_swaggerfile(result.body, result.etag, result.last_modified)
+            except ValueError as e:
+                error = SwaggerFetchError(_('Not a JSON file: {0}').format(e), result.status)
+
+        if error is not None:
+            self.fetch_status = error.status
+            self.fetch_error = str(error)[:255]
+        else:
+            self.fetch_status = result.status
+            self.fetch_error = ''
+
+        if save and self.pk:
+            # Only a new version of the Swagger file counts as a modification
+            update_fields = list(self.fetch_fields)
+            if changed:
+                update_fields += self.spec_fields + ('spec_hash', 'modified', )
+            self.save(update_fields=update_fields)
+        return changed
+
+    def load_swaggerfile(self):
+        """
+        Returns the stored Swagger file as compressed JSON.
+        Only the ingestion downloads it, never a question.
+        :rtype: bytes
+        :raises ValueError: when it was never downloaded
+        """
+        if not self.spec_hash:
+            raise ValueError('The Swagger file of {0} was never downloaded'.format(self))
+        return bytes(self.spec_json)
+
+    def get_spec(self):
+        """
+        Returns the parsed Swagger file together with its indexes.
+        The Swagger file is read from the database and parsed only once per version.
+        :rtype: ParsedSpec
+        """
+        return spec_cache.get(self)
 
     def parse_swaggerfile(self):
-        # Load the Swagger file from remote location
-        swaggerfile = requests.get(self.swaggerfile)
-        #  Parse the Swagger file
-        parser = SwaggerParser(swagger_dict=swaggerfile.json())
-        return parser
+        return self.get_spec().parser
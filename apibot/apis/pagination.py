@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from rest_framework.pagination import CursorPagination, _positive_int
+
+
+class SwaggerCursorPagination(CursorPagination):
+    """
+    Pages through the APIs in the order they were last modified,
+    so syncing clients can pick up where they left off.
+    """
+    ordering = ('modified', 'id', )
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        # CursorPagination ignores page_size_query_param in this version of DRF
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size,
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import re
+from collections.abc import Mapping
+
+from django.conf import settings
+
+
+# Added to the spec by the validator of swagger_parser
+IGNORED_KEYS = ('x-scope', )
+REF = re.compile(r'^#/(?:definitions|parameters|responses)/(.+)$')
+WHITESPACE = re.compile(r'\s+')
+
+
+def summarize_ref(ref):
+    """
+    Returns what a $ref points to, e.g. '#/definitions/Pet' -> '<Pet>',
+    instead of expanding it.
+    """
+    match = REF.match(ref)
+    return '<{0}>'.format(match.group(1)) if match else '<{0}>'.format(ref)
+
+
+def is_ref(value):
+    return isinstance(value, dict) and len(value) == 1 and isinstance(value.get('$ref'), str)
+
+
+def is_leaf(value):
+    return not isinstance(value, (Mapping, list, tuple)) or not value or is_ref(value)
+
+
+def format_leaf(value):
+    if is_ref(value):
+        return summarize_ref(value['$ref'])
+    if isinstance(value, str):
+        # Descriptions have words split over lines
+        return WHITESPACE.sub(' ', value).strip()
+    if isinstance(value, tuple):
+        return json.dumps(list(value))
+    return json.dumps(value)
+
+
+def format_collapsed(value):
+    if isinstance(value, Mapping):
+        return '{{{0} keys}}'.format(len(value))
+    return '[{0} items]'.format(len(value))
+
+
+def iter_lines(value, max_depth, depth=0):
+    """
+    Yields the lines of an indented outline of a spec fragment, lazily,
+    so that nothing past the character budget gets formatted.
+    Nested $refs are summarized, and anything deeper than max_depth
+    is collapsed to its size.
+    """
+    pad = '  ' * depth
+    if isinstance(value, Mapping):
+        items = ((str(key), item) for key, item in value.items() if key not in IGNORED_KEYS)
+        prefix = '{0}{1}:'
+    else:
+        items = (('', item) for item in value)
+        prefix = '{0}-'
+    for key, item in items:
+        if key == '$ref' and isinstance(item, str):
+            yield '{0} {1}\n'.format(prefix.format(pad, key), summarize_ref(item))
+        elif is_leaf(item):
+            yield '{0} {1}\n'.format(prefix.format(pad, key), format_leaf(item))
+        elif depth + 1 >= max_depth:
+            yield '{0} {1}\n'.format(prefix.format(pad, key), format_collapsed(item))
+        else:
+            yield '{0}\n'.format(prefix.format(pad, key))
+            for line in iter_lines(item, max_depth, depth + 1):
+                yield line
+
+
+def render(value, max_chars=None, max_depth=None, offset=0):
+    """
+    Formats a spec fragment within a character budget.
+    :param value: A definition, operation or path from a Swagger file
+    :param max_chars: The budget, APIBOT_RENDER_MAX_CHARS by default
+    :param max_depth: How deep to go, APIBOT_RENDER_MAX_DEPTH by default
+    :param offset: Where the previous part stopped, to show more
+    :rtype: tuple - (text, offset of the rest or None when there is no rest)
+    """
+    if max_chars is None:
+        max_chars = getattr(settings, 'APIBOT_RENDER_MAX_CHARS', 3000)
+    if max_depth is None:
+        max_depth = getattr(settings, 'APIBOT_RENDER_MAX_DEPTH', 6)
+    if is_leaf(value):
+        return format_leaf(value), None
+
+    pieces = []
+    size = 0
+    skipped = 0
+    for line in iter_lines(value, max_depth):
+        if skipped < offset:
+            if skipped + len(line) <= offset:
+                skipped += len(line)
+                continue
+            line = line[offset - skipped:]
+            skipped = offset
+        pieces.append(line)
+        size += len(line)
+        if size > max_chars:
+            text = ''.join(pieces)[:max_chars]
+            # Rather stop at the end of a line
+            end = text.rfind('\n')
+            if end > max_chars // 2:
+                text = text[:end + 1]
+            return text.rstrip('\n'), offset + len(text)
+    return ''.join(pieces).rstrip('\n'), None
@@ -6,48 +6,154 @@ from __future__ import absolute_import, unicode_literals
 # v Descriptions have words split over lines
 # v when no operationId available, button does not work
 # - create new API fails
-# - Split code into functions to make it more readable
+# v Split code into functions to make it more readable
 # - Security definitions
-import pprint
-import re
+import hashlib
 
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from django.utils.translation import ugettext_lazy as _
-from django.core.exceptions import ObjectDoesNotExist
 
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
-from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
-from swagger_spec_validator import validate_spec_url
-
+from rest_framework.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED, HTTP_400_BAD_REQUEST
+
+from .bulk import BulkImport, manifest_items, parse_manifest
+from .cache import get_last_deletion, spec_cache
+from .fastpath import bot_request
+from .fetch import SwaggerFetchError
+from .handlers import get_handler
+from .ingest import IngestError, queue_ingest, validate_swaggerfile
+from .metrics import observe_bot_request, QueryCounter
 from .models import Swagger
-from .serializers import (
-    SwaggerSerializer,
-    BotSerializer,
-    BotResponseSerializer,
-    #    FBQuickRepliesSerializer,
-    #    FBQuickRepliesListSerializer,
-    #    DataSerializer,
-    #    SLActionsSerializer,
-    #    SLAttachmentsSerializer,
-    #    SLAttachmentsListSerializer,
-)
-from .lists import (
-    info_fields,
-    general_data,
-    swagger_fields,
-)
-from ..utils.utils import url_is_alive
+from .pagination import SwaggerCursorPagination
+from .serializers import SwaggerSerializer
+from .timing import annotate, log_timer, phase, start_timer, stop_timer
 
 
 class SwaggerViewSet(ModelViewSet):
     """
     Retrieve, update or delete a Swagger instance.
+
+    Listing supports incremental sync: pages are ordered by modification
+    time, ?modified_since= only returns what changed after a timestamp,
+    and conditional requests get a 304 when nothing changed at all.
+    New APIs are pending until their Swagger file is ingested,
+    ?status= lists the pending, ready or failed ones.
     """
     queryset = Swagger.objects.all()
     serializer_class = SwaggerSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, )
+    pagination_class = SwaggerCursorPagination
+
+    def get_queryset(self):
+        queryset = super(SwaggerViewSet, self).get_queryset().defer(*Swagger.spec_fields)
+        modified_since = self.request.query_params.get('modified_since')
+        if modified_since:
+            try:
+                modified_since = parse_datetime(modified_since)
+            except ValueError:
+                modified_since = None
+            if modified_since is None:
+                raise ValidationError({'modified_since': [_('Enter a valid ISO 8601 date and time.')]})
+            queryset = queryset.filter(modified__gt=modified_since)
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status=status)
+        return queryset
+
+    def get_list_validators(self, queryset):
+        """
+        Returns the ETag and Last-Modified of a listing. Deleting an API
+        does not touch the others, so the count is part of the ETag and
+        the time of the last deletion counts as a modification.
+        :rtype: tuple - (str, datetime)
+        """
+        summary = queryset.order_by().aggregate(last_modified=Max('modified'), count=Count('id'))
+        last_modified = max(filter(None, (summary['last_modified'], get_last_deletion())))
+        version = '{0}:{1}:{2}'.format(
+            last_modified.isoformat(),
+            summary['count'],
+            self.request.META.get('QUERY_STRING', ''),
+        )
+        return quote_etag(hashlib.md5(version.encode('utf-8')).hexdigest()), last_modified
+
+    def is_not_modified(self, etag, last_modified):
+        if_none_match = self.request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = [value.strip() for value in if_none_match.split(',')]
+            # Weak comparison is enough for GET
+            return '*' in etags or etag in etags or 'W/' + etag in etags
+        if_modified_since = parse_http_date_safe(self.request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since:
+            return int(last_modified.timestamp()) <= if_modified_since
+        return False
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators(self.filter_queryset(self.get_queryset()))
+        if self.is_not_modified(etag, last_modified):
+            response = Response(status=HTTP_304_NOT_MODIFIED)
+        else:
+            response = super(SwaggerViewSet, self).list(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def fetch_swaggerfile(self, instance, conditional=True):
+        try:
+            result = instance.fetch_swaggerfile(conditional=conditional, save=False)
+            if not result.not_modified:
+                validate_swaggerfile(result.body, result.url)
+        except (SwaggerFetchError, IngestError) as e:
+            raise ValidationError({'swaggerfile': [str(e)]})
+        instance.save()
+
+    def perform_create(self, serializer):
+        # The Swagger file gets ingested in the background,
+        # poll the API until its status is no longer pending
+        serializer.save(status=Swagger.PENDING)
+        queue_ingest(serializer.instance)
+
+    def perform_update(self, serializer):
+        url = serializer.instance.swaggerfile
+        super(SwaggerViewSet, self).perform_update(serializer)
+        if not serializer.instance.is_file:
+            self.fetch_swaggerfile(serializer.instance, conditional=serializer.instance.swaggerfile == url)
+        spec_cache.invalidate(serializer.instance.pk)
+
+    def perform_destroy(self, instance):
+        swagger_id = instance.pk
+        super(SwaggerViewSet, self).perform_destroy(instance)
+        spec_cache.invalidate(swagger_id)
+
+    @list_route(methods=['post'])
+    def bulk(self, request):
+        """
+        Adds many APIs at once, from a list of objects with a name and a
+        swaggerfile, or from an uploaded JSON or CSV manifest.
+        Like any new API, they are pending until their Swagger file is ingested.
+        """
+        manifest = request.FILES.get('manifest')
+        try:
+            if manifest is not None:
+                items = parse_manifest(
+                    manifest.read().decode('utf-8'),
+                    'csv' if manifest.name.lower().endswith('.csv') else 'json',
+                )
+            else:
+                items = manifest_items(request.data)
+        except ValueError as e:
+            raise ValidationError({'manifest': [str(e)]})
+
+        results = BulkImport().queue(items)
+        return Response({'results': [result._asdict() for result in results]}, status=HTTP_200_OK)
 
 
 class BotView(APIView):
@@ -60,574 +166,61 @@ class BotView(APIView):
     The endpoint is built for the api.ai platform:
     * https://docs.api.ai/docs/query#post-query
     * https://docs.api.ai/docs/webhook#webhook-example
+
+    Every action is answered by its own handler, see handlers.py.
+
+    Answers tell how long each phase took in a Server-Timing header,
+    and every request gets a line in the apibot.apis.timing log.
     """
 
-    def get_api(self, parameters, contexts):
-        if 'api' in parameters:
-            return parameters['api']
-        elif contexts:
-            for context in contexts:
-                if 'api' in context['parameters']:
-                    return context['parameters']['api']
-        return None
+    # The action of the request, for the metrics, as long as it is not known
+    metric_action = 'invalid'
 
-    def get_parser(self, api):
-        """
-        We might be getting the API name from paramaters straight or
-        from passed context
-        """
+    def dispatch(self, request, *args, **kwargs):
+        # Rather than initial() and finalize_response(), which an uncaught exception skips
+        timer = start_timer()
+        self.queries = QueryCounter(connection)
+        response = None
         try:
-            return Swagger.objects.get(name__icontains=api).parse_swaggerfile()
-        except Exception:
-            return None
+            rendered = super(BotView, self).dispatch(request, *args, **kwargs)
+            # Now rather than on the way out, to know its size
+            with phase('encode'):
+                rendered.render()
+            response = rendered
+            return response
+        finally:
+            self.record(timer, request, response)
 
     def post(self, request, format=None):
-        # Some docs:
-        # Slack
-        # Basic formatting: https://api.slack.com/docs/message-formatting
-        generic_error_msg = _(
-            'Something went wrong here... I will tell the developers and hopefully they will manage to fix this.')
-        not_existing_msg = _('This information is not defined in the Swagger file. Sorry!')
-        not_defined_msg = _(
-            'This data is not part of the OpenAPI specifications: https://github.com/OAI/OpenAPI-Specification')
-        no_api_msg = _('We do not have information about this API. Feel free to add it yourself!')
-
-        serializer = BotSerializer(data=request.data)
-        output_data = {}
-
-        if serializer.is_valid():
-            # All the APIs
-            queryset = Swagger.objects.all()
-
-            # Parse some of the input from api.ai
-            parameters = serializer.validated_data['result']['parameters']
-            contexts = serializer.validated_data['result']['contexts']
-            # metadata = serializer.validated_data['result']['metadata']
-            action = serializer.validated_data['result']['action']
-
-            # Check what type of data we need to return
-
-            # List all APIs
-            ###############
-            if action == 'api.list':
-                api_list = queryset.values_list('name', flat=True).order_by('name')
-
-                # Define buttons for Slack
-                actions = []
-
-                for api in api_list:
-                    actions.append({
-                        'name': api,
-                        'text': api,
-                        'value': _('Use {0}').format(api),
-                    })
-
-                attachments = {
-                    'text': _('Which API you want to know more about? Here are top APIs:'),
-                    'fallback': generic_error_msg,
-                    'callback_id': 'api_list',
-                    'actions': actions,
-                }
-
-                attachments_text = _(('\n').join([
-                    'We have these APIs:',
-                    '{0}'.format('\n'.join(api_list)),
-                    'If you want to know more about a certain API, just tell me you want to *use* that one.',
-                    'You can also *create* a new API if you have a URL to a valid Swagger file.',
-                ]))
-
-                attachments_list = {
-                    'text': attachments_text,
-                    'attachments': [attachments, ],
-                }
-
-                data_response = {
-                    'slack': attachments_list,
-                }
-
-                output_data['data'] = data_response
-
-                output_data['displayText'] = attachments_text
-
-            # Add a new API
-            ###############
-            elif action == 'api.create':
-                try:
-                    # TODO
-                    # Bugfix
-                    # we lose the http(s):// from Slack input
-                    # verify and add it if necessary
-
-                    # This is ugly - no way out to get a serializer field name
-                    # with a dot in the name
-                    request_url = request.data['result']['contexts'][0]['parameters']['url.original']
-                    if url_is_alive(request_url):
-                        url = request_url
-                    elif url_is_alive('https://' + request_url):
-                        url = 'https://' + request_url
-                    elif url_is_alive('http://' + request_url):
-                        url = 'http://' + request_url
-
-                    else:
-                        output_data['displayText'] = _(
-                            '{0} - This is an invalid URL!').format(request_url)
-
-                    # # Do we have a valid URL?
-                    # validate_url = URLValidator()
-                    # try:
-                    #     validate_url(parameters['url'])
-                    #     url = parameters['url']
-                    # # The http got stripped out
-                    # except ValidationError:
-                    #     try:
-                    #         validate_url('http://{0}'.format(parameters['url']))
-                    #         url = 'http://{0}'.format(parameters['url'])
-                    #     except ValidationError:
-                    #         output_data['displayText'] = _('This is an invalid URL!')
-
-                    if(url):
-                        # API with same name exists
-                        if(queryset.filter(name=parameters['api'])):
-                            output_data['displayText'] = _('An API with this name already exists!')
-                        # API with same URL exists
-                        elif(queryset.filter(swaggerfile=url)):
-                            output_data['displayText'] = _(
-                                'An API pointing to this URL already exists!')
-                        # Create new API
-                        else:
-                            # Validate the URL that it is a Swagger 2.0 file
-                            try:
-                                # Validate the JSON file. Will throw an exception
-                                # if the file is not valid
-                                validate_spec_url(url)
-                                # Create new API
-                                Swagger.objects.create(
-                                    name=parameters['api'],
-                                    swaggerfile=url,
-                                )
-                                output_data['displayText'] = _('New API added, thanks!')
-                            except:
-                                output_data['displayText'] = _(
-                                    'This is not a valid Swagger 2.0 file.')
-                except KeyError:
-                    output_data['displayText'] = _(
-                        'I need a name and URL pointing to a OpenAPI json specification in order to create a new API.')
-
-            # Information about specific API
-            ################################
-            elif action == 'api.info':
-                try:
-                    api = self.get_api(parameters, contexts)
-                    parser = self.get_parser(api)
-                    # Do we have a request for generic information of this API?
-                    if parameters['data'] in info_fields:
-                        try:
-                            output_data['displayText'] = _('Here is the *{0}* you asked for *{1}*:\n{2}').format(
-                                parameters['data'],
-                                api,
-                                parser.specification['info'][parameters['data']],
-                            )
-                        except:
-                            output_data['displayText'] = not_existing_msg
-
-                    # Do we have Swagger object fields?
-                    elif parameters['data'] in swagger_fields:
-                        try:
-                            output_data['displayText'] = _('Here is the *{0}* you asked for *{1}*:\n{2}').format(
-                                parameters['data'],
-                                api,
-                                parser.specification[parameters['data']]
-                            )
-                        except:
-                            output_data['displayText'] = not_existing_msg
-
-                    # Some general data about the API
-                    elif parameters['data'] in general_data:
-                        # List all the paths
-                        # TODO
-                        # Add buttons
-                        if parameters['data'] == 'paths':
-                            paths = parser.paths.keys()
-                            if(paths):
-                                # Define buttons for Slack
-                                actions = []
-
-                                for path in paths:
-                                    actions.append({
-                                        'name': path,
-                                        'text': path,
-                                        'value': _('Explain path {0}').format(path),
-                                    }
-                                    )
-
-                                attachments = {
-                                    'text': _('Which path you want to know more about? Here are the top paths:'),
-                                    'fallback': generic_error_msg,
-                                    'callback_id': 'paths',
-                                    'actions': actions,
-                                }
-                                attachments_list = {
-                                    'text': _('Here is a *list of paths* defined:\n{0}').format('\n'.join(paths)),
-                                    'attachments': [attachments, ],
-                                }
-                                data_response = {
-                                    'slack': attachments_list,
-                                }
-
-                                output_data['data'] = data_response
-
-                                output_data['displayText'] = _('Here is the *{0}* you asked for *{1}*:\n{2}').format(
-                                    parameters['data'],
-                                    api,
-                                    '\n'.join(paths)
-                                )
-                            else:
-                                output_data['displayText'] = _(
-                                    'There are no paths defined in this OpenAPI specification.')
-
-                        # List all the operations
-                        elif parameters['data'] == 'operations':
-                            operations = parser.operation.keys()
-                            if(operations):
-                                # Define buttons for Slack
-                                actions = []
-
-                                for operation in operations:
-                                    actions.append({
-                                        'name': operation,
-                                        'text': operation,
-                                        'value': _('Explain operation {0}').format(operation),
-                                    })
-
-                                attachments = {
-                                    'text': _('Which operation you want to know more about? Here are the top operations:'),
-                                    'fallback': generic_error_msg,
-                                    'callback_id': 'operations',
-                                    'actions': actions,
-                                }
-                                attachments_list = {
-                                    'text': _('Here is a *list of operations* defined:\n{0}').format('\n'.join(operations)),
-                                    'attachments': [attachments, ],
-                                }
-                                data_response = {
-                                    'slack': attachments_list,
-                                }
-
-                                output_data['data'] = data_response
-
-                                output_data['displayText'] = _('Here is the *{0}* you asked for *{1}*:\n{2}').format(
-                                    parameters['data'],
-                                    api,
-                                    '\n'.join(operations)
-                                )
-                            else:
-                                output_data['displayText'] = _(
-                                    'There are no operations defined in this OpenAPI specification.')
-
-                        # List all the objects
-                        elif parameters['data'] == 'definitions':
-                            definitions = parser.specification['definitions'].keys()
-                            if(definitions):
-                                # Define buttons for Slack
-                                actions = []
-
-                                for definition in definitions:
-                                    actions.append({
-                                        'name': definition,
-                                        'text': definition,
-                                        'value': _('Explain object {0}').format(definition),
-                                    }
-                                    )
-
-                                attachments = {
-                                    'text': _('Which object you want to know more about? Here are top objects:'),
-                                    'fallback': generic_error_msg,
-                                    'callback_id': 'object_definitions',
-                                    'actions': actions,
-                                }
-                                attachments_list = {
-                                    'text': _('Here is a *list of objects* defined:\n{0}').format('\n'.join(definitions)),
-                                    'attachments': [attachments, ],
-                                }
-                                data_response = {
-                                    'slack': attachments_list,
-                                }
-
-                                output_data['data'] = data_response
-
-                                # And display text
-                                output_data['displayText'] = '\n'.join(definitions)
-                            else:
-                                # And display text
-                                output_data['displayText'] = _(
-                                    'No objects are defined in this OpenAPI specification.')
-
-                    # No idea what they want...
-                    # TODO: start logging these so we can analyze
-                    else:
-                        output_data['displayText'] = not_defined_msg
-
-                except ObjectDoesNotExist:
-                    output_data['displayText'] = no_api_msg
-                # except Exception:
-                #     output_data['displayText'] = generic_error_msg
-                except Exception as e:
-                    output_data['displayText'] = str(e)
-            # Object definitions for specific API
-            #####################################
-            elif action == 'api.object-definition':
-                try:
-                    # TODO
-                    # Give an example can be added explicitly
-                    api = self.get_api(parameters, contexts)
-                    parser = self.get_parser(api)
-                    # Sometimes the keys are stored in lower or titlecase.
-                    # We deal with that.
-                    if(parameters['object'] in parser.specification['definitions']):
-                        definition = parser.specification['definitions'][parameters['object']]
-                    elif(parameters['object'].lower() in parser.specification['definitions']):
-                        definition = parser.specification['definitions'][parameters['object'].lower(
-                        )]
-                    else:
-                        definition = parser.specification['definitions'][parameters['object'].title(
-                        )]
-
-                    # Are there linked operations to this object?
-                    # TODO
-                    # Follow-up on https://github.com/OAI/OpenAPI-Specification/issues/1097
-                    # Now comes a dirty and messy method filled with assumptions
-                    # But it's the best we can do so far
-
-                    # 1. Check for schema references to the object
-                    # 1.1 parameters
-                    # (Pdb) parser.paths['/v2/pet']['put']['parameters']['body']['schema']['$ref']
-                    # parser.paths[path][method]['parameters']['body']['schema']['$ref']
-                    # Loop through every path, method
-                    # 1.2 Response
-                    # (Pdb) parser.paths['/v2/pet/{petId}']['get']['responses']['200']['schema']['$ref']
-                    # parser.paths[path][method]['responses'][status-code]['schema']['$ref']
-                    # Loop through every path, method, status-code
-                    # result: '#/definitions/<object>' - regex
-                    # 2. Check for tags using the same name
-                    # (Pdb) parser.operation['getInventory'][2]
-                    # parser.operation[operation][2]
-                    # Loop through operations
-                    # 'store'
-                    # 3. Check for paths containing the same name - regex
-                    # 4. Check for operations containing the same name - regex
-
-                    operations = []
-
-                    for path in parser.specification['paths']:
-                        for method in parser.specification['paths'][path]:
-                            # Sometimes we don't have the operationID defined
-                            # Show method and path instead
-                            if('operationId' in parser.specification['paths'][path][method]):
-                                operation = {
-                                    'type': 'operation',
-                                    'value': parser.specification['paths'][path][method]['operationId'],
-                                }
-                            else:
-                                operation = {
-                                    'type': 'path',
-                                    'value': _('{0} {1}').format(method.upper(), path, ),
-                                }
-
-                            # Do we have tags referencing the object?
-                            if('tags' in parser.specification['paths'][path][method]):
-                                if(parameters['object'].lower() in [tag.lower() for tag in parser.specification['paths'][path][method]['tags']]):
-                                    operation['path'] = path
-                                    operation['method'] = method
-                                    operations.append(operation)
-                                    break
-
-                            # Do we have the name of the object in the path somewhere?
-                            if(parameters['object'].lower() in path):
-                                operation['path'] = path
-                                operation['method'] = method
-                                operations.append(operation)
-                                break
-
-                            # Do we have the name of the object in the operation name somewhere?
-                            if(parameters['object'].lower() in operation):
-                                operation['path'] = path
-                                operation['method'] = method
-                                operations.append(operation)
-                                break
-
-                            # Do we have input parameters referencing the object? e.g. PUT or POST methods
-                            if('parameters' in parser.specification['paths'][path][method]):
-                                for parameter in parser.specification['paths'][path][method]['parameters']:
-                                    # Regex the object out
-                                    try:
-                                        match = re.match(r'#/definitions/(\w+)',
-                                                         parameter['schema']['$ref'])
-                                        # Does the object match the input from user?
-                                        if(match and match.group(1).lower() == parameters['object'].lower()):
-                                            operation['path'] = path
-                                            operation['method'] = method
-                                            operations.append(operation)
-                                            break
-                                    except Exception:
-                                        pass
-
-                            # Do we have responses referencing the object? e.g. GET methods
-                            if('responses' in parser.specification['paths'][path][method]):
-                                try:
-                                    responses = parser.specification['paths'][path][method]['responses']
-                                    for status_code in responses:
-                                        if('schema' in responses[status_code]):
-                                            # In case of a list of objects
-                                            if('items' in responses[status_code]['schema']):
-                                                match = re.match(
-                                                    r'#/definitions/(\w+)', responses[status_code]['schema']['items']['$ref'])
-                                                # Does the object match the input from user?
-                                                if(match and match.group(1).lower() == parameters['object'].lower()):
-                                                    operation['path'] = path
-                                                    operation['method'] = method
-                                                    operations.append(operation)
-                                                    break
-                                            # In case of a single item
-                                            else:
-                                                match = re.match(
-                                                    r'#/definitions/(\w+)', responses[status_code]['schema']['$ref'])
-                                                # Does the object match the input from user?
-                                                if(match and match.group(1).lower() == parameters['object'].lower()):
-                                                    operation['path'] = path
-                                                    operation['method'] = method
-                                                    operations.append(operation)
-                                                    break
-
-                                except Exception:
-                                    pass
-
-                    if(operations and definition):
-                        # Define buttons for Slack
-                        actions = []
-
-                        for operation in operations:
-                            actions.append({
-                                'name': operation['value'],
-                                'text': operation['value'],
-                                'value': _('Explain {0} {1}').format(operation['type'], operation['value'] if operation['type'] == 'operation' else operation['path']),
-                            }
-                            )
-
-                        attachments = {
-                            'text': _('Which operation you want to know more about? Here are top operations:'),
-                            'fallback': generic_error_msg,
-                            'callback_id': 'object_definition',
-                            'actions': actions,
-                        }
-                        attachments_list = {
-                            'text': _('Here is the object definition for *{0}*:\n{1}\n\nI also found these operations linked to it:\n{2}').format(
-                                parameters['object'],
-                                pprint.pformat(definition),
-                                '\n'.join(operation['value'] for operation in operations),
-                            ),
-                            'attachments': [attachments, ],
-                        }
-                        data_response = {
-                            'slack': attachments_list,
-                        }
-
-                        output_data['data'] = data_response
-
-                        # And display text
-                        output_data['displayText'] = '\n'.join(
-                            operation['value'] for operation in operations)
-                    elif(definition):
-                        output_data['displayText'] = _('Here is the object definition for *{0}*:\n{1}').format(
-                            parameters['object'],
-                            pprint.pformat(definition),
-                        )
-                except KeyError:
-                    output_data['displayText'] = not_defined_msg
-
-                except ObjectDoesNotExist:
-                    output_data['displayText'] = no_api_msg
-
-            # Operation definitions for specific API
-            ########################################
-            elif action == 'api.operation':
-                try:
-                    api = self.get_api(parameters, contexts)
-                    parser = self.get_parser(api)
-                    try:
-                        output_data['displayText'] = _('Here is the operation definition for *{0}*:\n{1}').format(
-                            parameters['operation'],
-                            pprint.pformat(parser.operation[parameters['operation']]),
-                        )
-                    except KeyError:
-                        output_data['displayText'] = not_defined_msg
-
-                except ObjectDoesNotExist:
-                    output_data['displayText'] = no_api_msg
-
-            # Path info for specific API
-            ############################
-            elif action == 'api.path':
-                try:
-                    api = self.get_api(parameters, contexts)
-                    parser = self.get_parser(api)
-                    try:
-                        # TODO
-                        # This is a dirty dirty fix because due to a bug
-                        # in api.ai, the leading / gets stripped
-                        # Occasionally check if this is resolved
-                        # https://discuss.api.ai/t/slashes-are-removed/5595
-                        if parameters['path'] in parser.paths:
-                            path = parameters['path']
-                        elif '/' + parameters['path'] in parser.paths:
-                            path = '/' + parameters['path']
-                        elif parser.base_path + '/' + parameters['path'] in parser.paths:
-                            path = parser.base_path + '/' + parameters['path']
-
-                        output_data['displayText'] = _('Here is the path definition for *{0}*:\n{1}').format(
-                            path,
-                            pprint.pformat(parser.paths[path]),
-                        )
-
-                        output_data['displayText'] = pprint.pformat(parser.paths[path])
-
-                    except KeyError:
-                        output_data['displayText'] = not_defined_msg
-                    except Exception:
-                        output_data['displayText'] = generic_error_msg
-
-                except ObjectDoesNotExist:
-                    output_data['displayText'] = no_api_msg
-                except Exception:
-                    output_data['displayText'] = generic_error_msg
-
-            # TODO
-            # "securityDefinitions"
-            # "securityDefinitions":{
-            #    "petstore_auth":{
-            #       "type":"oauth2",
-            #       "authorizationUrl":"http://petstore.swagger.io/oauth/dialog",
-            #       "flow":"implicit",
-            #       "scopes":{
-            #          "write:pets":"modify pets in your account",
-            #          "read:pets":"read your pets"
-            #       }
-            #    },
-            #    "api_key":{
-            #       "type":"apiKey",
-            #       "name":"api_key",
-            #       "in":"header"
-            #    }
-
-            # Fallback response
-            ###################
-
-            # We have no idea what this intent is...
-            else:
-                output_data['displayText'] = not_defined_msg
-
-            # For now duplicate the display text and speech
-            output_data['speech'] = output_data['displayText']
-            serializer = BotResponseSerializer(output_data)
-            return Response(serializer.data, status=HTTP_200_OK)
-        else:
-            return Response(serializer.errors, status=HTTP_400_BAD_REQUEST)
+        with phase('validate'):
+            validated_data, errors = bot_request.validate(request.data)
+        if errors:
+            return Response(errors, status=HTTP_400_BAD_REQUEST)
+
+        # Parse some of the input from api.ai
+        result = validated_data['result']
+        handler = get_handler(result.get('action', ''))(request, result['parameters'], result.get('contexts', []))
+        annotate(action=result.get('action', ''), api=handler.get_api() or '')
+        # Only known actions, so that anyone posting cannot make up new series
+        self.metric_action = handler.action or 'unknown'
+        return Response(handler.respond(), status=HTTP_200_OK)
+
+    def record(self, timer, request, response):
+        """
+        Logs and measures a request, answered or not.
+        :param response: None when an exception was not caught, which makes a 500
+        """
+        stop_timer()
+        queries = self.queries.stop()
+        status = response.status_code if response is not None else 500
+        observe_bot_request(self.metric_action, status, timer.total(), queries)
+        timer.fields['status'] = status
+        timer.fields['queries'] = queries
+        try:
+            timer.fields['request_bytes'] = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            timer.fields['request_bytes'] = 0
+        timer.fields['response_bytes'] = len(response.content) if response is not None else 0
+        if response is not None and getattr(settings, 'APIBOT_SERVER_TIMING', True):
+            response['Server-Timing'] = timer.server_timing()
+        log_timer(timer)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import re
+from collections import Counter, defaultdict
+
+
+WORD = re.compile(r'[^\W_]+')
+
+# How much a match on something other than the name itself counts
+TAG_WEIGHT = 0.9
+SUMMARY_WEIGHT = 0.8
+
+
+def normalize(text):
+    """
+    Keeps only the letters and digits of a text, casefolded.
+    """
+    return ''.join(WORD.findall(text.casefold()))
+
+
+def trigrams(text):
+    """
+    Returns the trigrams of a normalized text, padded so that
+    the start of a word weighs more than its middle.
+    """
+    padded = '  {0} '.format(text)
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex(object):
+    """
+    Finds the terms most similar to a query, by the trigrams they share.
+    """
+
+    # Trigrams used by more terms than this are too common to narrow
+    # down the candidates, e.g. the 'get' of every getter
+    common = 256
+    # How many candidates get their similarity computed exactly
+    candidates = 50
+
+    def __init__(self):
+        self.terms = []
+        self.documents = []
+        self._term_ids = {}
+        self._trigrams = []
+        self._postings = defaultdict(list)
+
+    def add(self, text, document, weight=1.0):
+        term = normalize(text)
+        if len(term) < 2:
+            return
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self.terms)
+            self.terms.append(term)
+            self.documents.append({})
+            self._trigrams.append(frozenset(trigrams(term)))
+            for trigram in self._trigrams[term_id]:
+                self._postings[trigram].append(term_id)
+        documents = self.documents[term_id]
+        documents[document] = max(weight, documents.get(document, 0))
+
+    def search(self, query, limit=5, threshold=0.3):
+        query = normalize(query)
+        if not query:
+            return []
+        query_trigrams = trigrams(query)
+
+        postings = sorted(
+            (self._postings[trigram] for trigram in query_trigrams if trigram in self._postings),
+            key=len,
+        )
+        shared = Counter()
+        for i, term_ids in enumerate(postings):
+            # Always use the rarest trigrams, however common they are
+            if i >= 3 and len(term_ids) > self.common:
+                break
+            shared.update(term_ids)
+
+        scores = {}
+        for term_id, _ in shared.most_common(self.candidates):
+            term = self.terms[term_id]
+            # Dice coefficient over trigrams, plus a bonus for prefixes
+            term_trigrams = self._trigrams[term_id]
+            score = 2.0 * len(query_trigrams & term_trigrams) / (len(query_trigrams) + len(term_trigrams))
+            if score < threshold:
+                continue
+            if term.startswith(query):
+                score += 0.2
+            for document, weight in self.documents[term_id].items():
+                if score * weight > scores.get(document, 0):
+                    scores[document] = score * weight
+
+        return sorted(scores, key=lambda document: (-scores[document], document))[:limit]
+
+
+class SearchIndex(object):
+    """
+    Trigram indexes over the operations, paths and definitions of a
+    Swagger file, to suggest what the user might have meant.
+
+    Operations are found by their operationId, tags and the words of
+    their summary, paths by the path itself and its tags, and
+    definitions by their name.
+    Every distinct term is indexed once, however many documents use it.
+    """
+
+    kinds = ('operation', 'path', 'definition', )
+
+    def __init__(self, specification, base_path=''):
+        self.indexes = dict((kind, TrigramIndex()) for kind in self.kinds)
+        operations = self.indexes['operation']
+        paths = self.indexes['path']
+
+        for path, methods in specification.get('paths', {}).items():
+            full_path = '{0}{1}'.format(base_path, path)
+            paths.add(path, full_path)
+            for method, operation in methods.items():
+                if not isinstance(operation, dict):
+                    continue
+                for tag in operation.get('tags', []):
+                    paths.add(tag, full_path, TAG_WEIGHT)
+                if 'operationId' not in operation:
+                    continue
+                operation_id = operation['operationId']
+                operations.add(operation_id, operation_id)
+                for tag in operation.get('tags', []):
+                    operations.add(tag, operation_id, TAG_WEIGHT)
+                for word in WORD.findall(operation.get('summary', '')):
+                    operations.add(word, operation_id, SUMMARY_WEIGHT)
+
+        for name in specification.get('definitions', {}):
+            self.indexes['definition'].add(name, name)
+
+    def search(self, query, kind, limit=5, threshold=0.3):
+        """
+        Returns the keys most similar to the query, best first.
+        :param query: What the user typed
+        :param kind: 'operation', 'path' or 'definition'
+        :param limit: The maximum number of results
+        :param threshold: The minimum similarity, between 0 and 1
+        :rtype: list
+        """
+        return self.indexes[kind].search(query, limit, threshold)
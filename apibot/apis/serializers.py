@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
 
+from django.utils.translation import ugettext_lazy as _
 from rest_framework.serializers import (
     Serializer,
     ModelSerializer,
@@ -10,9 +11,10 @@ from rest_framework.serializers import (
     BooleanField,
     ListField,
     DictField,
+    ValidationError,
 )
 
-from .models import Swagger
+from .models import Swagger, normalize_name
 
 
 class SwaggerSerializer(ModelSerializer):
@@ -26,11 +28,30 @@ class SwaggerSerializer(ModelSerializer):
             'id',
             'swaggerfile',
             'name',
+            'spec_hash',
+            'fetched',
+            'fetch_status',
+            'fetch_error',
+            'status',
         )
         read_only_fields = (
             'id',
+            'spec_hash',
+            'fetched',
+            'fetch_status',
+            'fetch_error',
+            'status',
         )
 
+    def validate_name(self, value):
+        # Names must stay distinct once normalized, e.g. 'Pet Store' and 'pet-store'
+        others = Swagger.objects.filter(slug=normalize_name(value))
+        if self.instance is not None:
+            others = others.exclude(pk=self.instance.pk)
+        if others.exists():
+            raise ValidationError(_('An API with this name already exists!'))
+        return value
+
 
 # Incoming requests
 class BotParametersSerializer(Serializer):
@@ -44,6 +65,9 @@ class BotParametersSerializer(Serializer):
     endpoint = CharField(required=False, allow_blank=True, max_length=100)
     url = CharField(required=False, allow_blank=True, max_length=255)
     urloriginal = CharField(required=False, allow_blank=True, max_length=255)
+    cursor = CharField(required=False, allow_blank=True, max_length=100)
+    offset = CharField(required=False, allow_blank=True, max_length=10)
+    show_more = CharField(required=False, allow_blank=True, max_length=100)
 
 
 class BotMetadataSerializer(Serializer):
@@ -148,5 +172,8 @@ class BotResponseSerializer(Serializer):
     speech = CharField()
     displayText = CharField()
     data = DataSerializer(required=False)
-    contextOut = ContextOutSerializer(required=False)
+    contextOut = ListField(
+        child=ContextOutSerializer(),
+        required=False,
+    )
     source = CharField(default='apinf-bot')
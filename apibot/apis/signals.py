@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_api_list, record_deletion
+from .models import Swagger
+
+
+@receiver(post_save, sender=Swagger)
+def swagger_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Fetching the Swagger file again does not change the list of APIs
+    if created or update_fields is None or 'name' in update_fields:
+        invalidate_api_list()
+
+
+@receiver(post_delete, sender=Swagger)
+def swagger_deleted(sender, instance, **kwargs):
+    invalidate_api_list()
+    record_deletion()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import sys
+import threading
+from collections.abc import Mapping
+
+from django.utils.functional import cached_property
+
+
+HTTP_VERBS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch')
+# Longer strings, mostly descriptions, are only shared within a spec
+INTERN_MAX_LENGTH = 64
+
+
+def unescape_pointer(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+class Compactor(object):
+    """
+    Builds a compact Swagger file while it is decoded.
+
+    Keys and short strings are interned, so that 'type', 'string' or
+    'description' exist once in a process, whatever the number of specs.
+    Identical objects and arrays, like the schemas repeated across
+    operations, are stored once per spec. Nodes are thus shared and
+    must not be modified.
+    Also adds up the memory the spec takes.
+    """
+
+    def __init__(self):
+        self._shared = {}
+        self.size = 0
+        self.nodes = 0
+        self.shared_nodes = 0
+
+    def token(self, value):
+        if isinstance(value, (dict, list)):
+            # Children are compacted first, so equal children are the same object
+            return (None, id(value))
+        return (type(value), value)
+
+    def share(self, value, token):
+        self.nodes += 1
+        shared = self._shared.get(token)
+        if shared is not None:
+            self.shared_nodes += 1
+            return shared
+        self._shared[token] = value
+        self.size += sys.getsizeof(value)
+        return value
+
+    def string(self, value):
+        if len(value) <= INTERN_MAX_LENGTH:
+            value = sys.intern(value)
+        return self.share(value, (str, value))
+
+    def value(self, value):
+        if isinstance(value, str):
+            return self.string(value)
+        if isinstance(value, list):
+            items = [self.value(item) for item in value]
+            return self.share(items, (list, ) + tuple(self.token(item) for item in items))
+        if isinstance(value, dict):
+            # Compacted by object_pairs_hook already
+            return value
+        return self.share(value, self.token(value))
+
+    def object(self, pairs):
+        node = dict((sys.intern(key), self.value(value)) for key, value in pairs)
+        return self.share(node, (dict, ) + tuple((key, self.token(value)) for key, value in node.items()))
+
+    def loads(self, text):
+        specification = json.loads(text, object_pairs_hook=self.object)
+        # Only needed while decoding
+        self._shared = {}
+        return specification
+
+
+def load_spec(body):
+    """
+    Decodes a Swagger file into its compact form.
+    :param body: The raw Swagger file
+    :rtype: tuple - (specification, Compactor with the memory metrics)
+    """
+    compactor = Compactor()
+    return compactor.loads(body.decode('utf-8')), compactor
+
+
+class Operation(Mapping):
+    """
+    One method of a path, as SwaggerParser.paths has it.
+    """
+
+    __slots__ = ('parameters', 'responses', 'consumes')
+
+    def __init__(self, parameters, responses, consumes=None):
+        self.parameters = parameters
+        self.responses = responses
+        self.consumes = consumes
+
+    def __getitem__(self, key):
+        if key in self.__slots__ and (key != 'consumes' or self.consumes is not None):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (key for key in self.__slots__ if key != 'consumes' or self.consumes is not None)
+
+    def __len__(self):
+        return 2 if self.consumes is None else 3
+
+
+class LazyPaths(Mapping):
+    """
+    The paths of a Swagger file as SwaggerParser.paths has them,
+    keyed by basePath + path, but each path is only put together
+    when it is asked for, and then kept.
+    """
+
+    def __init__(self, spec):
+        self._spec = spec
+        self._prefix = spec.base_path
+        self._items = spec.specification.get('paths') or {}
+        self._built = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        try:
+            return self._built[key]
+        except KeyError:
+            pass
+        if not key.startswith(self._prefix):
+            raise KeyError(key)
+        path_item = self._items[key[len(self._prefix):]]
+        with self._lock:
+            if key not in self._built:
+                self._built[key] = self._spec.build_path(path_item)
+            return self._built[key]
+
+    def __iter__(self):
+        return ('{0}{1}'.format(self._prefix, path) for path in self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key.startswith(self._prefix) and key[len(self._prefix):] in self._items
+
+
+class LazySpec(object):
+    """
+    A read-only view of a Swagger file exposing what the bot uses of
+    SwaggerParser: specification, base_path, paths and operation.
+
+    SwaggerParser validates the whole file and builds every path and
+    every example object up front, although a question is about one of
+    them. Here the file is only decoded once; $refs and paths are
+    resolved when first needed and memoized. The file must have been
+    validated before it was stored, see ingest.validate_swaggerfile().
+    """
+
+    def __init__(self, specification):
+        """
+        :param specification: The decoded Swagger file, which is not modified
+        """
+        self.specification = specification
+        self.base_path = specification.get('basePath', '')
+        self._refs = {}
+
+    @cached_property
+    def paths(self):
+        return LazyPaths(self)
+
+    @cached_property
+    def operation(self):
+        """
+        Maps operationIds to (path, method, first tag or None), as SwaggerParser does.
+        """
+        operations = {}
+        for path, path_item in (self.specification.get('paths') or {}).items():
+            for method, action in path_item.items():
+                if method in HTTP_VERBS and 'operationId' in action:
+                    tags = action.get('tags')
+                    operations[action['operationId']] = (
+                        '{0}{1}'.format(self.base_path, path), method, tags[0] if tags else None,
+                    )
+        return operations
+
+    def resolve(self, node):
+        """
+        Follows a local $ref, e.g. {'$ref': '#/parameters/limit'}.
+        :param node: Any node of the Swagger file
+        :rtype: The node it refers to, or itself if it is not a $ref
+        """
+        if not isinstance(node, dict) or '$ref' not in node:
+            return node
+        ref = node['$ref']
+        try:
+            return self._refs[ref]
+        except KeyError:
+            pass
+        if not ref.startswith('#/'):
+            raise KeyError('Only local $refs are resolved, not {0}'.format(ref))
+        target = self.specification
+        for token in ref[2:].split('/'):
+            target = target[unescape_pointer(token)]
+        self._refs[ref] = target
+        return target
+
+    def build_path(self, path_item):
+        """
+        Puts one path together as SwaggerParser.get_paths_data() does:
+        for each method, its parameters by name, path parameters first,
+        its responses and what it consumes.
+        """
+        shared = [self.resolve(parameter) for parameter in path_item.get('parameters', [])]
+        path = {}
+        for method, action in path_item.items():
+            if method not in HTTP_VERBS:
+                continue
+            parameters = {}
+            for parameter in shared + [self.resolve(parameter) for parameter in action.get('parameters', [])]:
+                parameters[parameter['name']] = parameter
+            path[method] = Operation(parameters, action.get('responses', {}), action.get('consumes'))
+        return path
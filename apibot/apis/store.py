@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.utils.functional import cached_property
+
+from .spec import LazySpec
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'APIBOTS1'
+# Magic, then the offset and length of the table of specs
+HEADER = struct.Struct('<8sQQ')
+
+
+def dumps(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+class StoreWriter(object):
+    """
+    Writes a spec store. Every definition and path of a spec is a JSON
+    fragment of its own, so that a reader decodes only what it needs.
+    Each spec has an index of its fragments, and the table at the end
+    of the file gives the content hash and the index of each spec.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.table = {}
+        self.stream.write(HEADER.pack(MAGIC, 0, 0))
+
+    def write(self, data):
+        """
+        :rtype: list - [offset, length] of the data in the file
+        """
+        offset = self.stream.tell()
+        self.stream.write(data)
+        return [offset, len(data)]
+
+    def add(self, swagger_id, digest, specification):
+        index = {
+            'keys': list(specification),
+            'rest': self.write(dumps(dict(
+                (key, value) for key, value in specification.items() if key not in ('paths', 'definitions')))),
+        }
+        for key in ('paths', 'definitions'):
+            index[key] = [[name] + self.write(dumps(value)) for name, value in (specification.get(key) or {}).items()]
+        index['operation'] = [[operation_id] + list(value) for operation_id, value in LazySpec(specification).operation.items()]
+        self.table[str(swagger_id)] = [digest] + self.write(dumps(index))
+
+    def close(self):
+        offset, length = self.write(dumps(self.table))
+        self.stream.seek(0)
+        self.stream.write(HEADER.pack(MAGIC, offset, length))
+
+
+def write_store(path, swaggers):
+    """
+    Writes the specs of APIs to a new store, then puts it in place of
+    the old one with a rename, so readers never see a partial file.
+    :param path: Where the store goes
+    :param swaggers: Swagger instances with their spec fields loaded
+    :rtype: int - the number of specs written
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.apibot-specs-')
+    try:
+        with os.fdopen(fd, 'wb') as stream:
+            writer = StoreWriter(stream)
+            for swagger in swaggers:
+                try:
+                    specification = json.loads(zlib.decompress(bytes(swagger.spec_json)).decode('utf-8'))
+                except Exception:
+                    logger.exception('Cannot store the Swagger file of %s', swagger)
+                    continue
+                writer.add(swagger.pk, swagger.spec_hash, specification)
+            writer.close()
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return len(writer.table)
+
+
+class Fragments(Mapping):
+    """
+    The definitions or the paths of a stored spec, decoded one at a
+    time when asked for and not kept, so that they stay in the page
+    cache shared by every process rather than in each process.
+    """
+
+    def __init__(self, buffer, entries):
+        self._buffer = buffer
+        self._entries = OrderedDict((name, (offset, length)) for name, offset, length in entries)
+
+    def __getitem__(self, key):
+        offset, length = self._entries[key]
+        return json.loads(self._buffer[offset:offset + length].decode('utf-8'))
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+class StoredSpecification(Mapping):
+    """
+    A Swagger file read from a spec store, which reads like the decoded file.
+    """
+
+    def __init__(self, buffer, index, index_size=0):
+        self._buffer = buffer
+        self._index = index
+        # What reading it costs the process
+        self.index_size = index_size
+        self._fragments = {
+            'paths': Fragments(buffer, index['paths']),
+            'definitions': Fragments(buffer, index['definitions']),
+        }
+
+    @cached_property
+    def _rest(self):
+        offset, length = self._index['rest']
+        return json.loads(self._buffer[offset:offset + length].decode('utf-8'))
+
+    def __getitem__(self, key):
+        if key in self._fragments:
+            return self._fragments[key]
+        return self._rest[key]
+
+    def __iter__(self):
+        return iter(self._index['keys'])
+
+    def __len__(self):
+        return len(self._index['keys'])
+
+    def __contains__(self, key):
+        return key in self._index['keys']
+
+
+class StoredSpec(LazySpec):
+    """
+    A LazySpec of a stored Swagger file, whose operations come
+    from the index of the store.
+    """
+
+    @cached_property
+    def operation(self):
+        return dict(
+            (operation_id, (path, method, tag))
+            for operation_id, path, method, tag in self.specification._index['operation']
+        )
+
+
+class SpecStore(object):
+    """
+    Reads a spec store through mmap, so that all the processes of a
+    node share one copy of it.
+    The store is rewritten with a rename, which is noticed within
+    check_interval seconds; readers of the old one keep their mapping.
+    """
+
+    check_interval = 1.0
+
+    def __init__(self, path):
+        self.path = path
+        # The mapped file and its table, swapped together
+        self._snapshot = (None, {})
+        self._stat = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    def _check(self):
+        if time.time() - self._checked < self.check_interval:
+            return
+        with self._lock:
+            self._checked = time.time()
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                self._snapshot, self._stat = (None, {}), None
+                return
+            stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if stat == self._stat:
+                return
+            try:
+                with open(self.path, 'rb') as f:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, offset, length = HEADER.unpack(buffer[:HEADER.size])
+                if magic != MAGIC:
+                    raise ValueError('Not a spec store')
+                table = json.loads(buffer[offset:offset + length].decode('utf-8'))
+            except (OSError, ValueError, struct.error):
+                logger.exception('Cannot read the spec store %s', self.path)
+                self._snapshot, self._stat = (None, {}), None
+                return
+            self._snapshot, self._stat = (buffer, table), stat
+
+    def get(self, swagger_id, digest):
+        """
+        :rtype: StoredSpecification or None - the stored Swagger file,
+            if the store has this version of it
+        """
+        self._check()
+        buffer, table = self._snapshot
+        entry = table.get(str(swagger_id))
+        if entry is None or entry[0] != digest:
+            return None
+        _, offset, length = entry
+        return StoredSpecification(buffer, json.loads(buffer[offset:offset + length].decode('utf-8')), length)
+
+
+_stores = {}
+
+
+def get_spec_store():
+    """
+    Returns the store at APIBOT_SPEC_STORE_PATH, or None if there is none.
+    """
+    path = getattr(settings, 'APIBOT_SPEC_STORE_PATH', '')
+    if not path:
+        return None
+    if path not in _stores:
+        _stores[path] = SpecStore(path)
+    return _stores[path]
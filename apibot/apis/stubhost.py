@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from .cache import content_hash
+from .synthetic import generate_spec, METHODS
+
+
+def methods_option(value):
+    methods = tuple(method.strip().lower() for method in value.split(',') if method.strip())
+    if not methods:
+        raise ValueError('methods is a comma separated list of HTTP methods')
+    return methods
+
+
+def optional_int(value):
+    return int(value) if value not in ('', 'none') else None
+
+
+# What a host does, as (type, default); every one can be changed per request in the query string
+OPTIONS = OrderedDict((
+    # The generated Swagger file, see generate_spec()
+    ('paths', (int, 10)),
+    ('definitions', (optional_int, None)),
+    ('methods', (methods_option, METHODS)),
+    ('ref_depth', (optional_int, None)),
+    ('tags', (int, 10)),
+    ('size', (optional_int, None)),
+    # Another version of the same Swagger file
+    ('version', (int, 0)),
+    # Seconds before the host answers
+    ('latency', (float, 0.0)),
+    # How often it answers error_status instead, from 0 to 1
+    ('error_rate', (float, 0.0)),
+    ('error_status', (int, 503)),
+    # Always answers this status when it is not 200
+    ('status', (int, 200)),
+    # 'strong', 'weak', 'none' or 'changing', a new ETag on every answer
+    ('etag', (str, 'strong')),
+    # Sends the body drip_bytes at a time, drip_delay seconds apart
+    ('drip_bytes', (int, 0)),
+    ('drip_delay', (float, 0.0)),
+))
+ETAG_MODES = ('strong', 'weak', 'none', 'changing')
+
+
+class StubSpecHandler(BaseHTTPRequestHandler):
+    # Keeps connections open, like the hosts of real APIs
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        server = self.server
+        server.started()
+        status = None
+        try:
+            try:
+                options = server.get_options(urlparse(self.path).query)
+            except ValueError as e:
+                status = 400
+                return self.send_text(status, str(e), send_body)
+
+            if options['latency'] > 0:
+                time.sleep(options['latency'])
+            status = options['status']
+            if status == 200 and server.fails(options['error_rate']):
+                status = options['error_status']
+            if status != 200:
+                return self.send_text(status, 'Stub error {0}'.format(status), send_body)
+
+            body, digest = server.get_body(options)
+            etag = self.make_etag(options['etag'], digest, server.count)
+            if etag and self.headers.get('If-None-Match') == etag:
+                status = 304
+                self.send_response(status)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            if send_body:
+                self.drip(body, options['drip_bytes'], options['drip_delay'])
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up, as clients with a timeout do
+            self.close_connection = True
+        finally:
+            server.finished(status)
+
+    def make_etag(self, mode, digest, count):
+        if mode == 'strong':
+            return '"{0}"'.format(digest)
+        if mode == 'weak':
+            return 'W/"{0}"'.format(digest)
+        if mode == 'changing':
+            return '"{0}-{1}"'.format(digest, count)
+        return ''
+
+    def drip(self, body, drip_bytes, drip_delay):
+        if drip_bytes <= 0:
+            self.wfile.write(body)
+            return
+        for i in range(0, len(body), drip_bytes):
+            if i:
+                time.sleep(drip_delay)
+            self.wfile.write(body[i:i + drip_bytes])
+            self.wfile.flush()
+
+    def send_text(self, status, text, send_body):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super(StubSpecHandler, self).log_message(format, *args)
+
+
+class StubSpecServer(ThreadingMixIn, HTTPServer):
+    """
+    An HTTP host of generated Swagger files for tests, benchmarks and
+    load tests, which can be slow, fail, drip its answers or mishandle
+    ETags. Any path serves a Swagger file; OPTIONS lists what the query
+    string can change, and the keyword arguments change the defaults.
+
+        with StubSpecServer(latency=0.2) as host:
+            fetch_spec(host.url(paths=1000, etag='none'))
+
+    It also counts the requests it got, by status, and how many it
+    served at the same time at most.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, seed=0, verbose=False, **options):
+        unknown = set(options) - set(OPTIONS)
+        if unknown:
+            raise ValueError('Unknown options: {0}'.format(', '.join(sorted(unknown))))
+        HTTPServer.__init__(self, (host, port), StubSpecHandler)
+        self.defaults = dict((name, default) for name, (_type, default) in OPTIONS.items())
+        self.defaults.update(options)
+        self.verbose = verbose
+        self.random = random.Random(seed)
+        self.bodies = {}
+        self.count = 0
+        self.statuses = Counter()
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def get_options(self, query):
+        """
+        :raises ValueError: when the query string has an unknown or invalid option
+        :rtype: dict
+        """
+        options = dict(self.defaults)
+        for name, value in parse_qsl(query, keep_blank_values=True):
+            if name not in OPTIONS:
+                raise ValueError('Unknown option {0}'.format(name))
+            options[name] = OPTIONS[name][0](value)
+        if options['etag'] not in ETAG_MODES:
+            raise ValueError('etag is one of {0}'.format(', '.join(ETAG_MODES)))
+        return options
+
+    def get_body(self, options):
+        """
+        :rtype: tuple - (the Swagger file as bytes, its content hash)
+        """
+        key = (options['paths'], options['definitions'], options['methods'], options['ref_depth'],
+               options['tags'], options['size'], options['version'])
+        with self.lock:
+            if key in self.bodies:
+                return self.bodies[key]
+        spec = generate_spec(
+            options['paths'], options['definitions'], methods=options['methods'],
+            ref_depth=options['ref_depth'], tags=options['tags'], size=options['size'],
+        )
+        spec['info']['version'] = '1.0.{0}'.format(options['version'])
+        body = json.dumps(spec).encode('utf-8')
+        with self.lock:
+            self.bodies[key] = (body, content_hash(body))
+            return self.bodies[key]
+
+    def fails(self, error_rate):
+        with self.lock:
+            return self.random.random() < error_rate
+
+    def started(self):
+        with self.lock:
+            self.count += 1
+            self.concurrent += 1
+            self.max_concurrent = max(self.max_concurrent, self.concurrent)
+
+    def finished(self, status):
+        with self.lock:
+            self.concurrent -= 1
+            self.statuses[status] += 1
+
+    def url(self, path='/swagger.json', **options):
+        """
+        :param options: Options of this request, from OPTIONS
+        :rtype: str
+        """
+        host, port = self.server_address[:2]
+        url = 'http://{0}:{1}{2}'.format(host, port, path)
+        if options:
+            query = sorted(
+                (name, ','.join(value) if isinstance(value, (list, tuple)) else 'none' if value is None else value)
+                for name, value in options.items()
+            )
+            url = '{0}?{1}'.format(url, urlencode(query))
+        return url
+
+    def start(self):
+        """
+        Serves from a thread of its own.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, name='stub-spec-host', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+
+
+def definition_name(i):
+    return 'Model{0}'.format(i)
+
+
+def resource_path(i):
+    return '/resources{0}/{{id}}'.format(i)
+
+
+def operation_id(method, i):
+    return '{0}Resource{1}'.format(method, i)
+
+
+METHODS = ('get', 'put', 'delete')
+SUMMARIES = {
+    'get': 'Find resource {0} by id',
+    'put': 'Update resource {0}',
+    'post': 'Create resource {0}',
+    'patch': 'Change resource {0}',
+    'delete': 'Delete resource {0}',
+}
+WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor')
+
+
+def make_operation(method, i, model, tags):
+    operation = {
+        'tags': tags,
+        'summary': SUMMARIES.get(method, method.capitalize() + ' resource {0}').format(i),
+        'operationId': operation_id(method, i),
+    }
+    if method in ('put', 'post', 'patch'):
+        operation['consumes'] = ['application/json']
+        operation['parameters'] = [{'name': 'body', 'in': 'body', 'required': True, 'schema': model}]
+    if method == 'delete':
+        operation['responses'] = {'204': {'description': 'Deleted'}}
+    elif method in ('head', 'options'):
+        operation['responses'] = {'200': {'description': 'successful operation'}}
+    else:
+        operation['responses'] = {'200': {'description': 'successful operation', 'schema': model}}
+        if method == 'get':
+            operation['responses']['404'] = {'description': 'Not found'}
+    return operation
+
+
+def make_definition(i, definitions, ref_depth):
+    definition = {
+        'type': 'object',
+        'required': ['id', 'name'],
+        'properties': {
+            'id': {'type': 'integer', 'format': 'int64'},
+            'name': {'type': 'string', 'example': 'name {0}'.format(i)},
+            'status': {'type': 'string', 'description': 'The status', 'enum': ['available', 'pending', 'sold']},
+            'created': {'type': 'string', 'format': 'date-time'},
+        },
+    }
+    if ref_depth is None:
+        # A tree about log2(definitions) deep
+        parent = i // 2
+    elif i % (ref_depth + 1) != ref_depth and i + 1 < definitions:
+        # Chains of ref_depth $refs
+        parent = i + 1
+    else:
+        return definition
+    definition['properties']['parent'] = {'$ref': '#/definitions/{0}'.format(definition_name(parent))}
+    return definition
+
+
+def pad(spec, size):
+    """
+    Lengthens the descriptions of the operations until the Swagger file
+    is about size bytes as JSON.
+    """
+    operations = [
+        operation for path in spec['paths'].values()
+        for method, operation in sorted(path.items()) if method != 'parameters'
+    ]
+    missing = size - len(json.dumps(spec))
+    if missing <= 0 or not operations:
+        return spec
+    # Each description costs its key too
+    length = max(-(-missing // len(operations)) - len('"description": "", '), 1)
+    for i, operation in enumerate(operations):
+        words = []
+        while sum(len(word) + 1 for word in words) < length:
+            words.append(WORDS[(i + len(words)) % len(WORDS)])
+        operation['description'] = ' '.join(words)[:length]
+    return spec
+
+
+def generate_spec(paths=10, definitions=None, methods=METHODS, ref_depth=None, tags=10, size=None):
+    """
+    Generates a valid Swagger 2.0 file shaped like a real one, for
+    benchmarks and load tests. The same arguments always give the same file.
+    :param paths: The number of paths
+    :param definitions: The number of definitions, as many as paths by default
+    :param methods: The methods of every path
+    :param ref_depth: How many $refs a definition leads through, by default
+        definitions make a tree about log2(definitions) deep
+    :param tags: The number of tags operations are spread over
+    :param size: About how many bytes the file should take, at least
+    :rtype: dict
+    """
+    if definitions is None:
+        definitions = paths
+    definitions = max(definitions, 1)
+    tags = max(tags, 1)
+    spec = {
+        'swagger': '2.0',
+        'info': {
+            'title': 'Synthetic API',
+            'description': 'A generated API with {0} paths and {1} definitions.'.format(paths, definitions),
+            'version': '1.0.0',
+            'termsOfService': 'http://example.com/terms/',
+            'contact': {'email': 'api@example.com'},
+            'license': {'name': 'Apache 2.0', 'url': 'http://www.apache.org/licenses/LICENSE-2.0.html'},
+        },
+        'host': 'api.example.com',
+        'basePath': '/v1',
+        'schemes': ['https', 'http'],
+        'produces': ['application/json'],
+        'tags': [{'name': 'group{0}'.format(i), 'description': 'Group {0}'.format(i)} for i in range(tags)],
+        'paths': {},
+        'definitions': {},
+    }
+
+    for i in range(definitions):
+        spec['definitions'][definition_name(i)] = make_definition(i, definitions, ref_depth)
+
+    for i in range(paths):
+        model = {'$ref': '#/definitions/{0}'.format(definition_name(i % definitions))}
+        path = {
+            'parameters': [{'name': 'id', 'in': 'path', 'required': True, 'type': 'integer', 'format': 'int64'}],
+        }
+        for method in methods:
+            path[method] = make_operation(method, i, model, ['group{0}'.format(i % tags)])
+        spec['paths'][resource_path(i)] = path
+
+    if size:
+        pad(spec, size)
+    return spec
+
+
+def generate_body(paths=10, definitions=None, **options):
+    """
+    :param options: The other arguments of generate_spec()
+    :rtype: bytes - the generated Swagger file as JSON
+    """
+    return json.dumps(generate_spec(paths, definitions, **options)).encode('utf-8')
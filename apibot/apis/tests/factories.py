@@ -0,0 +1,37 @@
+import os
+
+import factory
+
+
+PETSTORE = os.path.join(os.path.dirname(__file__), 'petstore.json')
+
+
+def petstore_body():
+    with open(PETSTORE, 'rb') as swaggerfile:
+        return swaggerfile.read()
+
+
+class SwaggerFactory(factory.django.DjangoModelFactory):
+    name = factory.Sequence(lambda n: 'api-{0}'.format(n))
+    swaggerfile = factory.Sequence(lambda n: 'http://example.com/{0}/swagger.json'.format(n))
+
+    class Meta:
+        model = 'apis.Swagger'
+
+
+def bot_payload(action, lang='en', contexts=None, **parameters):
+    """
+    Builds the body api.ai posts to the bot webhook.
+    """
+    return {
+        'lang': lang,
+        'timestamp': '2017-08-01T12:00:00.000Z',
+        'sessionId': 'test-session',
+        'result': {
+            'parameters': parameters,
+            'contexts': contexts or [],
+            'resolvedQuery': 'test',
+            'source': 'agent',
+            'action': action,
+        },
+    }
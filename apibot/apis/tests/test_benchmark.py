@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from swagger_spec_validator.validator20 import validate_spec
+from test_plus.test import TestCase
+
+from ..benchmark import BotBenchmark, compare, is_test_database, percentile
+from ..models import Swagger
+from ..synthetic import generate_spec
+from .factories import SwaggerFactory
+
+
+class TestBenchmarkBot(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.baseline = os.path.join(self.directory, 'baseline.json')
+
+    def call_command(self, *args):
+        out = StringIO()
+        call_command('benchmark_bot', '--sizes', '5', '--catalogs', '3', '--runs', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_baseline(self):
+        swagger = SwaggerFactory(name='kept')
+        out = self.call_command('--baseline', self.baseline, '--save-baseline')
+        self.assertIn('paths=5', out)
+        self.assertIn('catalog=3', out)
+        # Nothing stays behind
+        self.assertEqual(list(Swagger.objects.all()), [swagger])
+
+        with open(self.baseline) as f:
+            baseline = json.load(f)
+        self.assertIn('paths=5 api.path', baseline)
+        self.assertIn('catalog=3 api.list', baseline)
+        # Latencies depend on the machine, so a shared baseline leaves them out
+        self.assertEqual(sorted(baseline['paths=5 api.path']), ['peak_kb', 'queries'])
+        with self.assertRaisesRegex(CommandError, 'no p95_ms'):
+            self.call_command('--baseline', self.baseline, '--latency')
+        for measures in baseline.values():
+            measures['queries'] = 0
+        with open(self.baseline, 'w') as f:
+            json.dump(baseline, f)
+        with self.assertRaisesRegex(CommandError, 'queries instead of 0'):
+            self.call_command('--baseline', self.baseline)
+
+    def test_compare(self):
+        before = {'a': {'queries': 2, 'p95_ms': 10.0, 'peak_kb': 100.0}}
+        self.assertEqual(compare({'a': {'queries': 2, 'p95_ms': 14.0, 'peak_kb': 120.0}}, before, latency=True), [])
+        self.assertEqual(len(compare({'a': {'queries': 3, 'p95_ms': 20.0, 'peak_kb': 100.0}}, before, latency=True)), 2)
+        self.assertEqual(len(compare({'a': {'queries': 2, 'p95_ms': 20.0, 'peak_kb': 100.0}}, before)), 0)
+
+    def test_only_on_test_database(self):
+        with mock.patch('apibot.apis.benchmark.is_test_database', return_value=False):
+            with self.assertRaises(RuntimeError):
+                BotBenchmark(1).setup(1, 1)
+        self.assertTrue(is_test_database(connection))
+
+    def test_percentile(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 3)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+
+    def test_generated_spec_is_valid(self):
+        validate_spec(generate_spec(20, 10))
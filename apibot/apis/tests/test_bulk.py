@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from test_plus.test import TestCase
+
+from ..bulk import BulkImport, parse_manifest, read_manifest
+from ..models import Swagger
+from .factories import SwaggerFactory, petstore_body
+
+
+def fake_get(url, headers=None, timeout=None):
+    if 'broken' in url:
+        return mock.Mock(status_code=404, content=b'', headers={})
+    if 'invalid' in url:
+        return mock.Mock(status_code=200, content=b'{"swagger": "2.0"}', headers={})
+    return mock.Mock(status_code=200, content=petstore_body(), headers={})
+
+
+class TestManifest(TestCase):
+
+    def test_json(self):
+        items = parse_manifest(json.dumps([{'name': 'Pets', 'url': 'http://example.com/pets.json'}]))
+        self.assertEqual(items[0].name, 'Pets')
+        self.assertEqual(items[0].url, 'http://example.com/pets.json')
+
+    def test_csv(self):
+        items = parse_manifest('name,swaggerfile\nPets,http://example.com/pets.json\n', 'csv')
+        self.assertEqual(items[0].url, 'http://example.com/pets.json')
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_manifest('{"name": "Pets"}')
+
+    def test_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'petstore.json'), 'wb') as f:
+            f.write(petstore_body())
+        items = read_manifest(directory)
+        self.assertEqual([item.name for item in items], ['petstore'])
+        self.assertTrue(items[0].url.startswith('file://'))
+        results = list(BulkImport().run(items))
+        self.assertEqual(results[0].status, 'created')
+        swagger = Swagger.objects.get(name='petstore')
+        self.assertEqual(results[0].id, swagger.pk)
+        self.assertTrue(swagger.spec_hash)
+        # Kept as imported, refresh_swaggers leaves it alone
+        self.assertTrue(swagger.is_file)
+
+
+class TestBulkImport(TestCase):
+
+    def setUp(self):
+        SwaggerFactory(name='Taken')
+
+    def run_import(self, manifest):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'manifest.json')
+        with open(path, 'w') as f:
+            json.dump(manifest, f)
+        out = StringIO()
+        with mock.patch('requests.Session.get', side_effect=fake_get):
+            call_command('import_swaggers', path, '--batch-size', '2', stdout=out)
+        return out.getvalue()
+
+    def test_import(self):
+        out = self.run_import([
+            {'name': 'One', 'url': 'http://one.example.com/swagger.json'},
+            {'name': 'Two', 'url': 'http://two.example.com/swagger.json'},
+            {'name': 'Three', 'url': 'http://three.example.com/swagger.json'},
+            {'name': 'three', 'url': 'http://example.com/again.json'},
+            {'name': 'Taken', 'url': 'http://example.com/taken.json'},
+            {'name': 'Broken', 'url': 'http://example.com/broken.json'},
+            {'name': 'Invalid', 'url': 'http://example.com/invalid.json'},
+            {'name': '', 'url': 'http://example.com/nameless.json'},
+        ])
+        self.assertIn('Imported 3 of 8 APIs', out)
+        self.assertIn('three: invalid', out)
+        self.assertIn('Taken: exists', out)
+        self.assertIn('Broken: failed', out)
+        self.assertIn('Invalid: failed', out)
+        created = Swagger.objects.filter(name__in=['One', 'Two', 'Three'])
+        self.assertEqual(created.count(), 3)
+        for swagger in created:
+            self.assertEqual(swagger.status, Swagger.READY)
+            self.assertEqual(swagger.slug, swagger.name.lower())
+            self.assertTrue(swagger.spec_hash)
+            self.assertEqual(swagger.get_spec().parser.base_path, '/v2')
+
+    def test_same_url(self):
+        SwaggerFactory(name='Existing', swaggerfile='http://example.com/existing.json')
+        SwaggerFactory(name='Failed', swaggerfile='http://example.com/failed.json', status=Swagger.FAILED)
+        with mock.patch('apibot.apis.bulk.enqueue') as enqueue:
+            results = BulkImport().queue(parse_manifest(json.dumps([
+                {'name': 'One', 'url': 'http://example.com/one.json'},
+                {'name': 'Two', 'url': 'http://example.com/one.json'},
+                {'name': 'Three', 'url': 'http://example.com/existing.json'},
+                {'name': 'Four', 'url': 'http://example.com/failed.json'},
+            ])))
+        statuses = dict((result.name, result.status) for result in results)
+        self.assertEqual(statuses, {'One': 'pending', 'Two': 'invalid', 'Three': 'exists', 'Four': 'pending'})
+        self.assertEqual(enqueue.call_count, 2)
+
+    def test_name_taken_meanwhile(self):
+        importer = BulkImport()
+        swaggers = [Swagger(name='Taken', slug='taken', swaggerfile='http://example.com/a.json'),
+                    Swagger(name='Free', slug='free', swaggerfile='http://example.com/b.json')]
+        results = importer.insert(swaggers, 'created')
+        self.assertEqual([result.status for result in results], ['exists', 'created'])
+        self.assertEqual(results[1].id, Swagger.objects.get(slug='free').pk)
+
+
+class TestBulkEndpoint(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.make_user())
+
+    def test_bulk(self):
+        with mock.patch('apibot.apis.bulk.enqueue') as enqueue:
+            response = self.client.post('/api/v1/apis/apis/bulk/', [
+                {'name': 'One', 'swaggerfile': 'http://one.example.com/swagger.json'},
+                {'name': 'one', 'swaggerfile': 'http://example.com/again.json'},
+                {'name': 'Two', 'swaggerfile': 'file:///etc/passwd'},
+            ], format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['invalid', 'invalid', 'pending'])
+        # Validated as by the API itself
+        self.assertEqual(results[1]['name'], 'Two')
+        self.assertEqual(results[1]['detail'], 'Enter a valid URL.')
+        swagger = Swagger.objects.get(slug='one')
+        self.assertEqual(swagger.status, Swagger.PENDING)
+        enqueue.assert_called_once_with('apibot.apis.ingest.ingest_swagger', swagger.pk)
+
+    def test_csv_manifest(self):
+        manifest = StringIO('name,url\nOne,http://one.example.com/swagger.json\n')
+        manifest.name = 'apis.csv'
+        with mock.patch('apibot.apis.bulk.enqueue'):
+            response = self.client.post('/api/v1/apis/apis/bulk/', {'manifest': manifest}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['status'], 'pending')
+
+    def test_invalid_manifest(self):
+        response = self.client.post('/api/v1/apis/apis/bulk/', {'name': 'One'}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.core.cache import cache
+from test_plus.test import TestCase
+
+from ..cache import SpecCache, content_hash
+from ..models import Swagger
+from .factories import SwaggerFactory, petstore_body
+
+
+class TestSpecCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.cache = SpecCache()
+        self.swagger = SwaggerFactory()
+        self.swagger.store_swaggerfile(petstore_body())
+        self.swagger.save()
+        self.swagger = Swagger.objects.defer(*Swagger.spec_fields).get(pk=self.swagger.pk)
+
+    def test_get_parses_once(self):
+        first = self.cache.get(self.swagger)
+        with self.assertNumQueries(0):
+            second = self.cache.get(self.swagger)
+        self.assertIs(first, second)
+        self.assertEqual(first.key, (self.swagger.pk, content_hash(petstore_body())))
+        self.assertIn('/v2/pet', first.parser.paths)
+
+    def test_shared_tier_is_used_by_other_processes(self):
+        self.cache.get(self.swagger)
+        swagger = Swagger.objects.defer(*Swagger.spec_fields).get(pk=self.swagger.pk)
+        with self.assertNumQueries(0):
+            entry = SpecCache().get(swagger)
+        self.assertEqual(entry.content_hash, self.swagger.spec_hash)
+
+    def test_new_version_gets_new_entry(self):
+        first = self.cache.get(self.swagger)
+        self.swagger.store_swaggerfile(petstore_body().replace(b'Swagger Petstore', b'Petstore'))
+        second = self.cache.get(self.swagger)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.parser.specification['info']['title'], 'Petstore')
+
+    def test_invalidate(self):
+        first = self.cache.get(self.swagger)
+        self.cache.invalidate(self.swagger.pk)
+        self.assertIsNot(first, self.cache.get(self.swagger))
+
+    def test_max_bytes(self):
+        with self.settings(APIBOT_SPEC_CACHE_MAX_BYTES=1024):
+            first = self.cache.get(self.swagger)
+            self.assertIsNot(first, self.cache.get(self.swagger))
+
+    def test_stats(self):
+        entry = self.cache.get(self.swagger)
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['bytes'], entry.size)
+        self.assertEqual(stats['body_bytes'], entry.body_size)
+        self.assertGreater(stats['shared_nodes'], 0)
+
+    def test_never_fetches_missing_swaggerfile(self):
+        swagger = SwaggerFactory()
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            with self.assertRaises(ValueError):
+                self.cache.get(swagger)
+        self.assertFalse(get.called)
@@ -0,0 +1,112 @@
+import copy
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..fastpath import bot_request, bot_response
+from ..serializers import BotSerializer, BotResponseSerializer
+from .factories import bot_payload
+
+
+def drf_validate(data):
+    serializer = BotSerializer(data=data)
+    if serializer.is_valid():
+        return serializer.validated_data, None
+    return None, serializer.errors
+
+
+def variant(change):
+    payload = bot_payload('api.path', api='petstore', path='/pet', contexts=[
+        {'name': 'api', 'lifespan': 5, 'parameters': {'api': 'petstore', 'url.original': 'example.com'}},
+    ])
+    payload['result']['metadata'] = {'intentId': 'x', 'webhookUsed': 'true', 'intentName': 'path'}
+    change(payload)
+    return payload
+
+
+def setter(*keys):
+    def change(value):
+        def apply(payload):
+            target = payload
+            for key in keys[:-1]:
+                target = target[key]
+            if value is KeyError:
+                del target[keys[-1]]
+            else:
+                target[keys[-1]] = value
+        return apply
+    return change
+
+
+PAYLOADS = [
+    variant(lambda payload: None),
+    variant(setter('result', 'parameters', 'path')('  /pet/{petId}  ')),
+    variant(setter('result', 'parameters', 'path')('   ')),
+    variant(setter('result', 'parameters', 'path')(12)),
+    variant(setter('result', 'parameters', 'path')(True)),
+    variant(setter('result', 'parameters', 'path')(None)),
+    variant(setter('result', 'parameters', 'path')(['/pet'])),
+    variant(setter('result', 'parameters', 'method')('x' * 11)),
+    variant(setter('result', 'parameters')('petstore')),
+    variant(setter('result', 'contexts')({'name': 'api'})),
+    variant(setter('result', 'contexts')([])),
+    variant(setter('result', 'contexts')(KeyError)),
+    variant(setter('result', 'contexts', 0, 'lifespan')('five')),
+    variant(setter('result', 'contexts', 0, 'parameters')(KeyError)),
+    variant(setter('result', 'metadata', 'webhookUsed')('maybe')),
+    variant(setter('result', 'action')('')),
+    variant(setter('result', 'resolvedQuery')('')),
+    variant(setter('result', 'source')(KeyError)),
+    variant(setter('lang')(None)),
+    variant(setter('sessionId')(' ')),
+    [],
+    {},
+]
+
+RESPONSES = [
+    {'displayText': 'Hi', 'speech': 'Hi'},
+    {'displayText': 'Hi', 'speech': 'Hi', 'source': 'elsewhere', 'contextOut': [
+        {'name': 'api_list', 'lifespan': '1', 'parameters': {'cursor': 'pet', 'page': 2, 'none': None}},
+    ]},
+    {'displayText': 'Hi', 'speech': 'Hi', 'data': {'slack': {'text': 'Hi', 'attachments': [
+        {'text': 'Pick one', 'fallback': 'Oops', 'callback_id': 'paths', 'actions': [
+            {'name': '/pet', 'text': '/pet', 'value': 'Explain path /pet'},
+            {'name': '/store', 'type': 'select'},
+        ]},
+        None,
+    ]}}},
+    {'displayText': 'Hi', 'speech': 'Hi', 'data': None},
+]
+
+
+class TestFastPath(SimpleTestCase):
+
+    def test_same_validation_as_drf(self):
+        for payload in PAYLOADS:
+            expected = drf_validate(copy.deepcopy(payload))
+            self.assertEqual(bot_request.validate(copy.deepcopy(payload)), expected, payload)
+
+    def test_valid_payload_skips_drf(self):
+        validated_data = bot_request._read(copy.deepcopy(PAYLOADS[0]))
+        self.assertEqual(validated_data['result']['contexts'][0]['parameters'], {'api': 'petstore'})
+
+    def test_same_rendering_as_drf(self):
+        for output_data in RESPONSES:
+            self.assertEqual(
+                json.dumps(bot_response.render(output_data)),
+                json.dumps(BotResponseSerializer(output_data).data),
+            )
+
+    def test_missing_required_output(self):
+        with self.assertRaises(KeyError):
+            bot_response.render({'displayText': 'Hi'})
+
+
+class TestBenchmarkSerializers(SimpleTestCase):
+
+    def test_output(self):
+        out = StringIO()
+        call_command('benchmark_serializers', number=1, repeat=1, stdout=out)
+        self.assertIn('response, fast path', out.getvalue())
@@ -0,0 +1,78 @@
+import threading
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from ..fetch import candidate_urls, probe_spec_url, SpecFetcher, SwaggerFetchError
+from .factories import petstore_body
+
+
+def fake_get(alive, delay=0):
+    def get(url, headers=None, timeout=None):
+        if url.startswith('https:'):
+            time.sleep(delay)
+        if url not in alive:
+            raise requests.ConnectionError('{0} is down'.format(url))
+        return mock.Mock(status_code=200, content=petstore_body(), headers={})
+    return get
+
+
+class TestProbeSpecUrl(SimpleTestCase):
+
+    def test_candidate_urls(self):
+        self.assertEqual(candidate_urls('http://example.com/a.json'), ['http://example.com/a.json'])
+        self.assertEqual(candidate_urls(' example.com/a.json'), ['https://example.com/a.json', 'http://example.com/a.json'])
+
+    def test_prefers_https(self):
+        with mock.patch('apibot.apis.fetch.requests.get', side_effect=fake_get(['https://example.com/a.json', 'http://example.com/a.json'])) as get:
+            result = probe_spec_url('example.com/a.json')
+        self.assertEqual(result.url, 'https://example.com/a.json')
+        self.assertEqual(result.body, petstore_body())
+        # HTTP never had to be tried
+        self.assertEqual(get.call_count, 1)
+
+    def test_slow_https(self):
+        alive = ['https://example.com/a.json', 'http://example.com/a.json']
+        with mock.patch('apibot.apis.fetch.requests.get', side_effect=fake_get(alive, delay=0.3)) as get:
+            result = probe_spec_url('example.com/a.json', head_start=0.05)
+        # Tried once HTTPS had its head start, but HTTPS still wins
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(result.url, 'https://example.com/a.json')
+
+    def test_falls_back_to_http(self):
+        with mock.patch('apibot.apis.fetch.requests.get', side_effect=fake_get(['http://example.com/a.json'])) as get:
+            result = probe_spec_url('example.com/a.json', timeout=(1, 2))
+        self.assertEqual(result.url, 'http://example.com/a.json')
+        for call in get.call_args_list:
+            self.assertEqual(call[1]['timeout'], (1, 2))
+
+    def test_nothing_answers(self):
+        with mock.patch('apibot.apis.fetch.requests.get', side_effect=fake_get([])):
+            with self.assertRaises(SwaggerFetchError):
+                probe_spec_url('example.com/a.json')
+
+
+class TestSpecFetcher(SimpleTestCase):
+
+    def test_slow_host_does_not_hold_up_others(self):
+        fast_done = threading.Event()
+
+        def fetch(url):
+            if 'slow' in url:
+                # Only returns before the timeout when the fast host got a thread meanwhile
+                return fast_done.wait(2)
+            fast_done.set()
+            return True
+
+        urls = ['http://slow.example.com/{0}.json'.format(i) for i in range(4)] + ['http://fast.example.com/a.json']
+        fetcher = SpecFetcher(workers=2, per_host=1)
+        results = [(url, future.result()) for url, future in fetcher.schedule(fetch, urls, lambda url: url)]
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result for _url, result in results))
+
+    def test_no_host(self):
+        fetcher = SpecFetcher(workers=3, per_host=1)
+        results = list(fetcher.schedule(lambda item: item * 2, [1, 2, 3], lambda item: None))
+        self.assertEqual(sorted(future.result() for _item, future in results), [2, 4, 6])
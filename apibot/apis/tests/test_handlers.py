@@ -0,0 +1,112 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import response_cache, spec_cache
+from ..handlers import BotHandler, get_handler, InfoHandler, ListHandler, timings, UnknownHandler
+from ..models import Swagger
+from .factories import SwaggerFactory
+from .test_restviews import BaseBotTestCase
+
+
+class EchoHandler(BotHandler):
+    action = 'test.echo'
+
+    def handle(self):
+        return {'displayText': self.parameters.get('data', '')}
+
+
+class TestDispatch(BaseBotTestCase):
+
+    def test_built_in(self):
+        self.assertIs(get_handler('api.list'), ListHandler)
+        self.assertIs(get_handler('api.unknown'), UnknownHandler)
+
+    def test_registered_through_settings(self):
+        with self.settings(APIBOT_BOT_HANDLERS=['apibot.apis.tests.test_handlers.EchoHandler']):
+            self.assertIs(get_handler('test.echo'), EchoHandler)
+            self.assertEqual(self.ask('test.echo', data='hello')['displayText'], 'hello')
+        self.assertIn('not part of the OpenAPI specifications', self.ask('test.echo', data='hello')['displayText'])
+
+    def test_timings(self):
+        timings.reset()
+        self.ask('api.info', api='petstore', data='paths')
+        self.ask('api.info', api='petstore', data='operations')
+        self.assertEqual(timings.snapshot()['api.info']['count'], 2)
+
+    def test_benchmark(self):
+        seconds = InfoHandler.benchmark({'api': 'petstore', 'data': 'definitions'}, number=3)
+        self.assertEqual(len(seconds), 3)
+
+
+class TestInfo(BaseBotTestCase):
+
+    def test_paths(self):
+        data = self.ask('api.info', api='petstore', data='paths')
+        self.assertIn('/pet/findByStatus', data['displayText'])
+        self.assertEqual(data['data']['slack']['attachments'][0]['callback_id'], 'paths')
+
+    def test_title(self):
+        data = self.ask('api.info', api='petstore', data='title')
+        self.assertIn('Swagger Petstore', data['displayText'])
+
+    def test_never_downloaded(self):
+        SwaggerFactory(name='Old Store', swaggerfile='http://example.com/old.json')
+        with mock.patch('apibot.apis.fetch.requests.get') as get, \
+                mock.patch('apibot.apis.ingest.enqueue') as enqueue:
+            data = self.ask('api.info', api='Old Store', data='title')
+        self.assertFalse(get.called)
+        self.assertIn('still reading', data['displayText'])
+        swagger = Swagger.objects.get(slug='old-store')
+        self.assertEqual(swagger.status, Swagger.PENDING)
+        enqueue.assert_called_once_with('apibot.apis.ingest.ingest_swagger', swagger.pk)
+
+    def test_unknown_api(self):
+        data = self.ask('api.operation', api='xyzzy', operation='getPetById')
+        self.assertIn('We do not have information about this API', data['displayText'])
+
+
+class TestResponseCache(BaseBotTestCase):
+
+    def selects(self, action, **parameters):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.ask(action, **parameters)
+        return data, [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+
+    def test_cached(self):
+        data, _ = self.selects('api.operation', api='petstore', operation='getPetById')
+        spec_cache.clear()
+        with mock.patch('apibot.apis.handlers.OperationHandler.handle_spec') as handle_spec:
+            cached, selects = self.selects('api.operation', api='petstore', operation='getPetById')
+        self.assertFalse(handle_spec.called)
+        self.assertEqual(cached, data)
+        # Finding the version of the Swagger file is all it takes
+        self.assertEqual(len(selects), 1)
+
+    def test_shared_between_processes(self):
+        data = self.ask('api.path', api='petstore', path='pet')
+        response_cache.clear()
+        with mock.patch('apibot.apis.handlers.PathHandler.handle_spec') as handle_spec:
+            self.assertEqual(self.ask('api.path', api='petstore', path='pet'), data)
+        self.assertFalse(handle_spec.called)
+
+    def test_new_version_of_swaggerfile(self):
+        self.ask('api.info', api='petstore', data='title')
+        specification = json.loads(self.swagger.spec_raw.decode('utf-8'))
+        specification['info']['title'] = 'Pet Shop'
+        self.swagger.store_swaggerfile(json.dumps(specification).encode('utf-8'))
+        self.swagger.save()
+        self.assertIn('Pet Shop', self.ask('api.info', api='petstore', data='title')['displayText'])
+
+    def test_keyed_by_parameters(self):
+        self.assertIn('getPetById', self.ask('api.operation', api='petstore', operation='getPetById')['displayText'])
+        self.assertIn('addPet', self.ask('api.operation', api='petstore', operation='addPet')['displayText'])
+
+    def test_errors_are_not_cached(self):
+        spec_cache.clear()
+        with mock.patch('apibot.apis.models.Swagger.get_spec', side_effect=RuntimeError('Redis timed out')):
+            data = self.ask('api.info', api='petstore', data='title')
+        self.assertIn('Something went wrong', data['displayText'])
+        self.assertIn('Swagger Petstore', self.ask('api.info', api='petstore', data='title')['displayText'])
@@ -0,0 +1,114 @@
+import json
+import re
+
+from test_plus.test import TestCase
+
+from ..index import build_definition_index, normalize_path, LookupTable, SubstringMatcher
+from .factories import petstore_body
+
+
+def scan(specification, object_name):
+    """
+    The linear scan BotView used to run on every request.
+    """
+    operations = []
+    for path in specification['paths']:
+        for method in specification['paths'][path]:
+            spec = specification['paths'][path][method]
+            if 'operationId' in spec:
+                operation = {'type': 'operation', 'value': spec['operationId']}
+            else:
+                operation = {'type': 'path', 'value': '{0} {1}'.format(method.upper(), path)}
+            operation['path'] = path
+            operation['method'] = method
+
+            if 'tags' in spec and object_name.lower() in [tag.lower() for tag in spec['tags']]:
+                operations.append(operation)
+                break
+            if object_name.lower() in path:
+                operations.append(operation)
+                break
+            if object_name.lower() in spec.get('operationId', '').lower():
+                operations.append(operation)
+                break
+            for parameter in spec.get('parameters', []):
+                try:
+                    match = re.match(r'#/definitions/(\w+)', parameter['schema']['$ref'])
+                    if match and match.group(1).lower() == object_name.lower():
+                        operations.append(operation)
+                        break
+                except Exception:
+                    pass
+            try:
+                responses = spec['responses']
+                for status_code in responses:
+                    if 'schema' in responses[status_code]:
+                        schema = responses[status_code]['schema']
+                        ref = schema['items']['$ref'] if 'items' in schema else schema['$ref']
+                        match = re.match(r'#/definitions/(\w+)', ref)
+                        if match and match.group(1).lower() == object_name.lower():
+                            operations.append(operation)
+                            break
+            except Exception:
+                pass
+    return operations
+
+
+class TestDefinitionIndex(TestCase):
+
+    def setUp(self):
+        self.specification = json.loads(petstore_body().decode('utf-8'))
+        self.index = build_definition_index(self.specification)
+
+    def test_matches_scan(self):
+        for name in self.specification['definitions']:
+            self.assertEqual(
+                self.index.get(name.lower(), []),
+                scan(self.specification, name),
+                name,
+            )
+
+    def test_linked_operations(self):
+        values = [operation['value'] for operation in self.index['pet']]
+        self.assertIn('addPet', values)
+        self.assertIn('getPetById', values)
+        self.assertNotIn('getInventory', values)
+
+    def test_response_items(self):
+        self.specification['definitions']['Bird'] = {'type': 'object'}
+        self.specification['paths']['/birds'] = {
+            'get': {
+                'responses': {'200': {'schema': {'type': 'array', 'items': {'$ref': '#/definitions/Bird'}}}},
+            },
+        }
+        index = build_definition_index(self.specification)
+        self.assertEqual(index['bird'], [{'type': 'path', 'value': 'GET /birds', 'path': '/birds', 'method': 'get'}])
+
+    def test_substring_matcher(self):
+        matcher = SubstringMatcher({'pet', 'order', 'user'})
+        self.assertEqual(matcher.find('/store/order/{orderid}'), {'order'})
+        self.assertEqual(matcher.find('getpetbyid'), {'pet'})
+
+
+class TestLookupTable(TestCase):
+
+    def test_names(self):
+        table = LookupTable(['Pet', 'pet', 'Order', 'ApiResponse'])
+        self.assertEqual(table['pet'], 'pet')
+        self.assertEqual(table['Pet'], 'Pet')
+        self.assertEqual(table['ORDER'], 'Order')
+        self.assertEqual(table['apiresponse'], 'ApiResponse')
+        self.assertNotIn('unicorn', table)
+        with self.assertRaises(KeyError):
+            table['unicorn']
+
+    def test_paths(self):
+        table = LookupTable(['/v2/pet', '/v2/pet/{petId}'], normalize_path, '/v2')
+        self.assertEqual(table['/v2/pet'], '/v2/pet')
+        self.assertEqual(table['v2/pet/'], '/v2/pet')
+        self.assertEqual(table['pet'], '/v2/pet')
+        self.assertEqual(table['/PET/{petid}'], '/v2/pet/{petId}')
+        self.assertIsNone(table.get('store'))
+
+    def test_normalize_path(self):
+        self.assertEqual(normalize_path('//V2/Pet/'), 'v2/pet')
@@ -0,0 +1,32 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from test_plus.test import TestCase
+
+from ..models import Swagger
+from .factories import SwaggerFactory, petstore_body
+
+
+class TestIngestPending(TestCase):
+
+    def test_ingests_pending(self):
+        pending = SwaggerFactory(name='pending', status=Swagger.PENDING)
+        ready = SwaggerFactory(name='ready')
+        out = StringIO()
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = mock.Mock(status_code=200, content=petstore_body(), headers={})
+            call_command('ingest_pending', stdout=out)
+        self.assertEqual(get.call_count, 1)
+        pending = Swagger.objects.get(pk=pending.pk)
+        self.assertEqual(pending.status, Swagger.READY)
+        self.assertTrue(pending.spec_hash)
+        self.assertFalse(Swagger.objects.get(pk=ready.pk).spec_hash)
+        self.assertIn('Ingested 1 pending APIs: 1 ready.', out.getvalue())
+
+    def test_queues_pending(self):
+        pending = SwaggerFactory(name='pending', status=Swagger.PENDING)
+        with self.settings(APIBOT_JOB_QUEUE_URL='redis://localhost:6379/0'), \
+                mock.patch('apibot.apis.jobs.RedisQueue.enqueue') as enqueue:
+            call_command('ingest_pending', stdout=StringIO())
+        enqueue.assert_called_once_with('apibot.apis.ingest.ingest_swagger', pending.pk)
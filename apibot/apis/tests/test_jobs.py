@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..jobs import LocalQueue
+
+calls = []
+
+
+def remember(*args):
+    calls.append(args)
+
+
+def fail():
+    raise ValueError('Bad job')
+
+
+class TestLocalQueue(SimpleTestCase):
+
+    def setUp(self):
+        del calls[:]
+
+    def test_run_pending(self):
+        queue = LocalQueue(thread=False)
+        queue.enqueue('apibot.apis.tests.test_jobs.remember', 1, 'a')
+        self.assertEqual(calls, [])
+        queue.run_pending()
+        self.assertEqual(calls, [(1, 'a')])
+
+    def test_failing_job(self):
+        queue = LocalQueue(thread=False)
+        queue.enqueue('apibot.apis.tests.test_jobs.fail')
+        queue.enqueue('apibot.apis.tests.test_jobs.remember', 2)
+        with mock.patch('apibot.apis.jobs.logger') as logger:
+            queue.run_pending()
+        self.assertTrue(logger.exception.called)
+        self.assertEqual(calls, [(2, )])
@@ -0,0 +1,170 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from io import StringIO
+from socketserver import ThreadingMixIn
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings, SimpleTestCase
+from rest_framework.test import APIClient
+from test_plus.test import TestCase
+
+from ..loadgen import (
+    LoadGenerator,
+    load_vocabularies,
+    read_recorded,
+    recorded_conversations,
+    Sample,
+    schedule,
+    summarize,
+    synthetic_conversations,
+)
+from ..models import Swagger
+from ..synthetic import generate_body
+from .factories import bot_payload
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        action = payload['result']['action']
+        status = 500 if action == 'fail' else 200
+        body = json.dumps({'displayText': action, 'contextOut': [
+            {'name': 'show_more', 'lifespan': 1, 'parameters': {'show_more': action, 'offset': '1'}},
+        ]}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if action == 'close':
+            # As servers do with connections idle for too long, without a Connection: close
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class WebhookServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class TestLoadGenerator(SimpleTestCase):
+
+    def setUp(self):
+        self.server = WebhookServer(('127.0.0.1', 0), WebhookHandler)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = 'http://127.0.0.1:{0}/api/v1/apis/bot/'.format(self.server.server_address[1])
+
+    def test_schedule(self):
+        self.assertEqual(len(list(schedule(10, 2))), 20)
+        ramped = list(schedule(10, 2, ramp=2, start_rate=2))
+        self.assertLess(len(ramped), 20)
+        self.assertGreater(len(ramped), 8)
+
+    def test_run(self):
+        conversations = recorded_conversations([
+            read_recorded_lines([bot_payload('api.info', data='title'), bot_payload('fail')])[0],
+        ])
+        generator = LoadGenerator(self.url, conversations, connections=2)
+        samples = generator.run(rate=50, duration=0.4)
+        self.assertEqual(len(samples), 20)
+        self.assertEqual(sorted(set(sample.action for sample in samples)), ['api.info', 'fail'])
+        # Conversations start while others wait for their answers
+        failed = [sample for sample in samples if sample.action == 'fail']
+        self.assertTrue(all(sample.error == 'HTTP 500' for sample in failed))
+        summary = summarize(samples, generator.elapsed)
+        self.assertEqual(summary['errors'], {'HTTP 500': len(failed)})
+        self.assertEqual(summary['actions']['api.info']['error_rate'], 0.0)
+
+    def test_retries_closed_connections(self):
+        conversations = recorded_conversations(read_recorded_lines([bot_payload('close')]))
+        generator = LoadGenerator(self.url, conversations, connections=1)
+        samples = generator.run(rate=50, duration=0.2)
+        self.assertGreater(len(samples), 5)
+        self.assertEqual([sample.error for sample in samples], [None] * len(samples))
+
+    def test_connection_refused(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        conversations = recorded_conversations(read_recorded_lines([bot_payload('api.list')]))
+        generator = LoadGenerator('http://127.0.0.1:{0}/'.format(port), conversations)
+        samples = generator.run(rate=20, duration=0.1)
+        self.assertTrue(samples)
+        self.assertEqual(summarize(samples, generator.elapsed)['miss_rate'], 1.0)
+
+    def test_summarize(self):
+        samples = [Sample('a', 200, latency / 1000.0, 0.0, None) for latency in range(1, 101)]
+        samples.append(Sample('b', None, 6.0, 0.0, 'timeout'))
+        summary = summarize(samples, 10.0)
+        self.assertEqual(summary['requests'], 101)
+        self.assertEqual(summary['throughput_rps'], 10.0)
+        self.assertAlmostEqual(summary['actions']['a']['p50_ms'], 51.0)
+        self.assertAlmostEqual(summary['miss_rate'], 1 / 101.0)
+        self.assertEqual(summary['actions']['b']['miss_rate'], 1.0)
+
+
+def read_recorded_lines(payloads):
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    with os.fdopen(fd, 'w') as recorded:
+        for payload in payloads:
+            recorded.write(json.dumps(payload) + '\n\n')
+    try:
+        return read_recorded(path)
+    finally:
+        os.unlink(path)
+
+
+class TestConversations(TestCase):
+
+    def setUp(self):
+        for paths in (5, 200):
+            swagger = Swagger(name='synthetic-{0}'.format(paths), swaggerfile='http://example.com/{0}.json'.format(paths))
+            swagger.store_swaggerfile(generate_body(paths))
+            swagger.save()
+
+    def test_read_recorded(self):
+        payloads = [bot_payload('api.list'), bot_payload('api.info', data='title'), bot_payload('api.list')]
+        payloads[1]['sessionId'] = 'other'
+        conversations = read_recorded_lines(payloads)
+        self.assertEqual([len(conversation.payloads) for conversation in conversations], [2, 1])
+        with self.assertRaisesRegex(ValueError, 'Line 1'):
+            read_recorded_lines([['not', 'a', 'payload']])
+
+    @override_settings(APIBOT_RENDER_MAX_CHARS=200)
+    def test_synthetic_conversations_are_answered(self):
+        vocabularies = load_vocabularies()
+        self.assertEqual(sorted(vocabulary.api for vocabulary in vocabularies), ['synthetic-200', 'synthetic-5'])
+        self.assertIn('/v1/resources0/{id}', vocabularies[0].paths)
+
+        client = APIClient()
+        actions = set()
+        conversations = synthetic_conversations(vocabularies, seed=1)
+        for _i in range(40):
+            conversation = next(conversations)
+            while not conversation.done:
+                action, payload = conversation.next_payload()
+                actions.add(action)
+                response = client.post('/api/v1/apis/bot/', payload, format='json')
+                self.assertEqual(response.status_code, 200, payload)
+                self.assertNotIn('We do not have information', response.data.get('displayText', ''))
+                conversation.answered(response.data)
+        self.assertIn('api.show-more', actions)
+        self.assertIn('api.object-definition', actions)
+        self.assertEqual(list(synthetic_conversations(vocabularies, seed=1).__next__().next_payload()),
+                         list(synthetic_conversations(vocabularies, seed=1).__next__().next_payload()))
+
+    def test_command_without_apis(self):
+        Swagger.objects.all().delete()
+        with self.assertRaisesRegex(CommandError, 'no ready API'):
+            call_command('load_bot', '--duration', '0.1', stdout=StringIO())
@@ -0,0 +1,165 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings, SimpleTestCase
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from test_plus.test import TestCase
+
+from ..cache import response_cache, spec_cache
+from ..fetch import fetch_spec, SwaggerFetchError
+from ..jobs import LocalQueue
+from ..metrics import QueryCounter
+from ..models import Swagger
+from ..stubhost import StubSpecServer
+from .factories import bot_payload, petstore_body, SwaggerFactory
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetricsView(TestCase):
+
+    def setUp(self):
+        spec_cache.clear()
+        response_cache.clear()
+        swagger = SwaggerFactory(name='petstore')
+        swagger.store_swaggerfile(petstore_body())
+        swagger.save()
+        self.client = APIClient()
+
+    def test_bot_requests(self):
+        count = sample('apibot_bot_request_seconds_count', action='api.operation')
+        hits = sample('apibot_response_cache_lookups_total', result='hit')
+        parsed = sample('apibot_spec_parse_seconds_count', source='body')
+        for _i in range(2):
+            self.client.post('/api/v1/apis/bot/', bot_payload('api.operation', api='petstore', operation='addPet'), format='json')
+        self.client.post('/api/v1/apis/bot/', bot_payload('made.up'), format='json')
+
+        self.assertEqual(sample('apibot_bot_request_seconds_count', action='api.operation'), count + 2)
+        self.assertEqual(sample('apibot_response_cache_lookups_total', result='hit'), hits + 1)
+        self.assertEqual(sample('apibot_spec_parse_seconds_count', source='body'), parsed + 1)
+        self.assertGreater(sample('apibot_bot_request_queries_sum', action='api.operation'), 0)
+        self.assertGreater(sample('apibot_spec_cache_bytes'), 0)
+        self.assertGreater(sample('apibot_bot_request_seconds_count', action='unknown'), 0)
+        self.assertEqual(sample('apibot_bot_request_seconds_count', action='made.up'), 0)
+        self.assertGreater(sample('apibot_bot_requests_total', action='api.operation', status='200'), 0)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'apibot_bot_request_seconds_bucket{action="api.operation"', response.content)
+        self.assertIn(b'apibot_job_queue_depth', response.content)
+
+    def test_failed_requests(self):
+        count = sample('apibot_bot_request_seconds_count', action='api.list')
+        failed = sample('apibot_bot_requests_total', action='api.list', status='500')
+        with mock.patch('apibot.apis.handlers.ListHandler.handle', side_effect=RuntimeError('Boom')):
+            with self.assertRaises(RuntimeError):
+                self.client.post('/api/v1/apis/bot/', bot_payload('api.list'), format='json')
+        self.assertEqual(sample('apibot_bot_request_seconds_count', action='api.list'), count + 1)
+        self.assertEqual(sample('apibot_bot_requests_total', action='api.list', status='500'), failed + 1)
+
+    @override_settings(APIBOT_METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret', REMOTE_ADDR='203.0.113.7').status_code, 200)
+
+    @override_settings(APIBOT_METRICS_TOKEN='')
+    def test_without_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 403)
+
+    def test_query_counter(self):
+        counter = QueryCounter(connection)
+        list(Swagger.objects.all())
+        list(Swagger.objects.all())
+        self.assertEqual(counter.stop(), 2)
+        if not settings.DEBUG:
+            self.assertEqual(len(connection.queries_log), 0)
+        self.assertFalse(connection.force_debug_cursor)
+
+    @override_settings(APIBOT_SPEC_CACHE_MAX_BYTES=1)
+    def test_evictions(self):
+        evictions = sample('apibot_spec_cache_evictions_total')
+        spec_cache._put_local(mock_entry(1, 1))
+        spec_cache._put_local(mock_entry(2, 1))
+        self.assertEqual(sample('apibot_spec_cache_evictions_total'), evictions + 1)
+        self.assertEqual(sample('apibot_spec_cache_bytes'), 1)
+
+
+def mock_entry(swagger_id, size):
+    class Entry(object):
+        key = (swagger_id, 'digest')
+    entry = Entry()
+    entry.size = size
+    return entry
+
+
+class TestFetchMetrics(SimpleTestCase):
+
+    def test_by_host(self):
+        with StubSpecServer(paths=3) as host:
+            netloc = '{0}:{1}'.format(*host.server_address[:2])
+            fetches = sample('apibot_spec_fetches_total', host=netloc, status='200')
+            size = sample('apibot_spec_fetch_bytes_total', host=netloc)
+            result = fetch_spec(host.url())
+            with self.assertRaises(SwaggerFetchError):
+                fetch_spec(host.url(status=500))
+        self.assertEqual(sample('apibot_spec_fetches_total', host=netloc, status='200'), fetches + 1)
+        self.assertEqual(sample('apibot_spec_fetches_total', host=netloc, status='500'), 1)
+        self.assertEqual(sample('apibot_spec_fetch_bytes_total', host=netloc), size + len(result.body))
+        self.assertGreaterEqual(sample('apibot_spec_fetch_seconds_count', host=netloc), 2)
+
+    def test_queue_depth(self):
+        queue = LocalQueue(thread=False)
+        queue.enqueue('apibot.apis.ingest.ingest_swagger', 1)
+        self.assertEqual(queue.depth(), 1)
+
+
+WORKER = '''
+import django
+django.setup()
+from apibot.apis.metrics import observe_bot_request, SPEC_CACHE_BYTES
+observe_bot_request('api.list', 200, 0.02, 1)
+SPEC_CACHE_BYTES.set(100)
+'''
+
+SCRAPER = '''
+import django
+django.setup()
+from apibot.apis.metrics import render_metrics
+print(render_metrics()[0].decode('utf-8'))
+'''
+
+
+class TestMultiProcess(SimpleTestCase):
+    """
+    Runs processes the way gunicorn workers do, each with files of its own.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.env = dict(os.environ, prometheus_multiproc_dir=self.directory)
+
+    def run_python(self, code):
+        return subprocess.check_output([sys.executable, '-c', code], env=self.env, stderr=subprocess.DEVNULL).decode('utf-8')
+
+    def test_adds_up_processes(self):
+        self.run_python(WORKER)
+        self.run_python(WORKER)
+        lines = self.run_python(SCRAPER).splitlines()
+        self.assertIn('apibot_bot_request_seconds_count{action="api.list"} 2.0', lines)
+        self.assertIn('apibot_bot_request_queries_sum{action="api.list"} 2.0', lines)
+        self.assertIn('apibot_bot_requests_total{action="api.list",status="200"} 2.0', lines)
+        self.assertIn('apibot_spec_cache_bytes 200.0', lines)
+        self.assertIn('apibot_job_queue_depth 0.0', lines)
@@ -0,0 +1,109 @@
+import zlib
+from unittest import mock
+
+from test_plus.test import TestCase
+
+from ..cache import content_hash
+from ..fetch import SwaggerFetchError
+from ..models import Swagger, normalize_name
+from .factories import SwaggerFactory, petstore_body
+
+
+def fake_response(status_code=200, content=b'', headers=None):
+    return mock.Mock(status_code=status_code, content=content, headers=headers or {})
+
+
+class TestSwagger(TestCase):
+
+    def setUp(self):
+        self.swagger = SwaggerFactory()
+        self.body = petstore_body()
+
+    def test__str__(self):
+        self.assertEqual(self.swagger.__str__(), self.swagger.name)
+
+    def test_fetch_swaggerfile(self):
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = fake_response(content=self.body, headers={'ETag': '"v1"'})
+            self.swagger.fetch_swaggerfile()
+
+        swagger = Swagger.objects.get(pk=self.swagger.pk)
+        self.assertEqual(bytes(swagger.spec_raw), self.body)
+        self.assertIn(b'"swagger":"2.0"', zlib.decompress(bytes(swagger.spec_json)))
+        self.assertEqual(swagger.spec_hash, content_hash(self.body))
+        self.assertEqual(swagger.etag, '"v1"')
+        self.assertEqual(swagger.fetch_status, 200)
+        self.assertIsNotNone(swagger.fetched)
+
+    def test_fetch_swaggerfile_not_modified(self):
+        self.swagger.store_swaggerfile(self.body, etag='"v1"')
+        self.swagger.save()
+        modified = self.swagger.modified
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = fake_response(status_code=304)
+            result = self.swagger.fetch_swaggerfile()
+
+        self.assertTrue(result.not_modified)
+        self.assertEqual(get.call_args[1]['headers'], {'If-None-Match': '"v1"'})
+        swagger = Swagger.objects.get(pk=self.swagger.pk)
+        self.assertEqual(swagger.fetch_status, 304)
+        self.assertEqual(swagger.modified, modified)
+
+    def test_fetch_swaggerfile_error(self):
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = fake_response(status_code=404)
+            with self.assertRaises(SwaggerFetchError):
+                self.swagger.fetch_swaggerfile()
+
+        swagger = Swagger.objects.get(pk=self.swagger.pk)
+        self.assertEqual(swagger.fetch_status, 404)
+        self.assertTrue(swagger.fetch_error)
+        self.assertEqual(swagger.spec_hash, '')
+
+    def test_parse_swaggerfile_does_not_fetch(self):
+        self.swagger.store_swaggerfile(self.body)
+        self.swagger.save()
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            parser = self.swagger.parse_swaggerfile()
+        self.assertFalse(get.called)
+        self.assertEqual(parser.base_path, '/v2')
+
+
+class TestSwaggerResolve(TestCase):
+
+    def setUp(self):
+        self.petstore = SwaggerFactory(name='Pet Store')
+        self.petstore_v3 = SwaggerFactory(name='Pet Store v3')
+        self.github = SwaggerFactory(name='GitHub')
+
+    def test_slug(self):
+        self.assertEqual(self.petstore.slug, 'pet-store')
+        self.assertEqual(normalize_name('  Ünïcode API '), 'ünïcode-api')
+
+    def test_exact(self):
+        self.assertEqual(Swagger.objects.resolve('pet store'), self.petstore)
+        self.assertEqual(Swagger.objects.resolve('PET-STORE-V3'), self.petstore_v3)
+
+    def test_closest(self):
+        # Used to raise MultipleObjectsReturned
+        self.assertEqual(Swagger.objects.resolve('pet'), self.petstore)
+        self.assertEqual(Swagger.objects.resolve('hub'), self.github)
+
+    def test_no_match(self):
+        with self.assertRaises(Swagger.DoesNotExist):
+            Swagger.objects.resolve('unicorn')
+
+    def test_long_slug(self):
+        # casefold() makes it 200 characters long
+        self.assertEqual(normalize_name('ß' * 100), 's' * 100)
+
+    def test_save_keeps_unique_slug(self):
+        # As migration 0004 left a name that used to clash
+        Swagger.objects.filter(pk=self.petstore_v3.pk).update(name='pet store', slug='pet-store-2')
+        swagger = Swagger.objects.get(pk=self.petstore_v3.pk)
+        swagger.save()
+        self.assertEqual(Swagger.objects.get(pk=swagger.pk).slug, 'pet-store-2')
+
+        swagger.name = 'Pet Store v4'
+        swagger.save()
+        self.assertEqual(Swagger.objects.get(pk=swagger.pk).slug, 'pet-store-v4')
@@ -0,0 +1,97 @@
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.utils import timezone
+from test_plus.test import TestCase
+
+from ..management.commands.refresh_swaggers import parse_duration
+from ..models import Swagger
+from ..store import SpecStore
+from .factories import SwaggerFactory, petstore_body
+
+
+def fake_get(url, headers=None, timeout=None):
+    if 'broken' in url:
+        return mock.Mock(status_code=500, content=b'', headers={})
+    if 'invalid' in url:
+        return mock.Mock(status_code=200, content=b'{"swagger": "1.2"}', headers={})
+    if headers.get('If-None-Match') == '"v1"':
+        return mock.Mock(status_code=304, content=b'', headers={})
+    return mock.Mock(status_code=200, content=petstore_body(), headers={'ETag': '"v1"'})
+
+
+class TestRefreshSwaggers(TestCase):
+
+    def setUp(self):
+        self.fresh = SwaggerFactory(name='fresh')
+        self.fresh.store_swaggerfile(petstore_body(), etag='"v1"')
+        self.fresh.fetched = timezone.now()
+        self.fresh.save()
+        self.stale = SwaggerFactory(name='stale')
+        self.broken = SwaggerFactory(name='broken', swaggerfile='http://example.com/broken.json')
+
+    def call_command(self, *args):
+        out = StringIO()
+        with mock.patch('requests.Session.get', side_effect=fake_get) as get:
+            call_command('refresh_swaggers', *args, stdout=out)
+        return out.getvalue(), get
+
+    def test_refresh_all(self):
+        out, get = self.call_command()
+        self.assertEqual(get.call_count, 3)
+        self.assertIn('fresh: unchanged', out)
+        self.assertIn('stale: changed', out)
+        self.assertIn('broken: failed', out)
+        self.assertIn('1 changed, 1 unchanged, 1 failed', out)
+        self.assertEqual(Swagger.objects.get(pk=self.stale.pk).etag, '"v1"')
+        self.assertEqual(Swagger.objects.get(pk=self.broken.pk).fetch_status, 500)
+
+    def test_skips_apis_not_ready(self):
+        SwaggerFactory(name='pending', swaggerfile='example.com/pending.json', status=Swagger.PENDING)
+        SwaggerFactory(name='failed', swaggerfile='http://example.com/failed.json', status=Swagger.FAILED)
+        out, get = self.call_command()
+        self.assertEqual(get.call_count, 3)
+        self.assertNotIn('pending:', out)
+        self.assertNotIn('failed:', out)
+
+    def test_skips_imported_files(self):
+        SwaggerFactory(name='file', swaggerfile='file:///srv/specs/file.json')
+        out, get = self.call_command()
+        self.assertEqual(get.call_count, 3)
+        self.assertNotIn('file:', out)
+
+    def test_invalid_new_version(self):
+        self.fresh.swaggerfile = 'http://example.com/invalid.json'
+        self.fresh.save()
+        out, get = self.call_command('--api', 'fresh')
+        self.assertIn('fresh: failed', out)
+        swagger = Swagger.objects.get(pk=self.fresh.pk)
+        self.assertIn('not a valid Swagger 2.0 file', swagger.fetch_error)
+        self.assertEqual(bytes(swagger.spec_raw), petstore_body())
+
+    def test_since(self):
+        out, get = self.call_command('--since', '1h')
+        self.assertEqual(get.call_count, 2)
+        self.assertNotIn('fresh:', out)
+
+    def test_force(self):
+        out, get = self.call_command('--force', '--api', 'fresh')
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(get.call_args[1]['headers'], {})
+
+    def test_writes_spec_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'specs')
+            with self.settings(APIBOT_SPEC_STORE_PATH=path):
+                out, get = self.call_command()
+            self.assertIn('Wrote 2 Swagger files', out)
+            self.assertIsNotNone(SpecStore(path).get(self.fresh.pk, self.fresh.spec_hash))
+
+    def test_parse_duration(self):
+        self.assertEqual(parse_duration('90'), timedelta(seconds=90))
+        self.assertEqual(parse_duration('6h'), timedelta(hours=6))
+        self.assertEqual(parse_duration('2d'), timedelta(days=2))
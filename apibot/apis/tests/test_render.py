@@ -0,0 +1,48 @@
+from django.test import SimpleTestCase
+
+from ..render import render
+
+
+PET = {
+    'type': 'object',
+    'required': ['name', 'photoUrls'],
+    'properties': {
+        'id': {'type': 'integer', 'format': 'int64'},
+        'category': {'$ref': '#/definitions/Category'},
+        'name': {'type': 'string', 'example': 'doggie'},
+        'tags': {'type': 'array', 'items': {'$ref': '#/definitions/Tag'}},
+        'status': {'type': 'string', 'description': 'pet status\n   in the store', 'enum': ['available', 'sold']},
+    },
+}
+
+
+class TestRender(SimpleTestCase):
+
+    def test_outline(self):
+        text, offset = render(PET)
+        self.assertIsNone(offset)
+        self.assertIn('required:\n  - name\n  - photoUrls\n', text)
+        self.assertIn('  category: <Category>\n', text)
+        self.assertIn('    items: <Tag>\n', text)
+        self.assertIn('    description: pet status in the store\n', text)
+        self.assertIn('    format: int64\n', text)
+
+    def test_max_depth(self):
+        text, offset = render(PET, max_depth=2)
+        self.assertIn('  tags: {2 keys}\n', text)
+        self.assertIn('  status: {3 keys}', text)
+
+    def test_parts(self):
+        whole, _ = render(PET)
+        parts = []
+        offset = 0
+        while offset is not None:
+            text, offset = render(PET, max_chars=80, offset=offset)
+            self.assertLessEqual(len(text), 80)
+            parts.append(text)
+        self.assertGreater(len(parts), 3)
+        self.assertEqual('\n'.join(parts), whole)
+
+    def test_leaf(self):
+        self.assertEqual(render({'$ref': '#/definitions/Pet'}), ('<Pet>', None))
+        self.assertEqual(render({}), ('{}', None))
@@ -0,0 +1,318 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from test_plus.test import TestCase
+
+from ..cache import response_cache, spec_cache
+from ..ingest import ingest_swagger
+from ..models import Swagger
+from .factories import SwaggerFactory, petstore_body, bot_payload
+
+
+class BaseBotTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        spec_cache.clear()
+        response_cache.clear()
+        self.client = APIClient()
+        self.swagger = SwaggerFactory(name='petstore')
+        self.swagger.store_swaggerfile(petstore_body())
+        self.swagger.save()
+
+    def ask(self, action, **parameters):
+        response = self.client.post('/api/v1/apis/bot/', bot_payload(action, **parameters), format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+
+class TestBotObjectDefinition(BaseBotTestCase):
+
+    def test_linked_operations(self):
+        data = self.ask('api.object-definition', api='petstore', object='pet')
+        values = data['displayText'].split('\n')
+        self.assertIn('addPet', values)
+        self.assertIn('getPetById', values)
+        actions = data['data']['slack']['attachments'][0]['actions']
+        self.assertIn('Explain operation addPet', [action['value'] for action in actions])
+
+    def test_any_casing(self):
+        data = self.ask('api.object-definition', api='petstore', object='APIRESPONSE')
+        self.assertEqual(data['displayText'], 'uploadFile')
+
+    def test_unknown_object(self):
+        data = self.ask('api.object-definition', api='petstore', object='unicorn')
+        self.assertIn('not part of the OpenAPI specifications', data['displayText'])
+
+
+class TestBotOperation(BaseBotTestCase):
+
+    def test_any_casing(self):
+        data = self.ask('api.operation', api='petstore', operation='GETPETBYID')
+        self.assertIn('*getPetById*', data['displayText'])
+
+    def test_unknown_operation(self):
+        data = self.ask('api.operation', api='petstore', operation='xyzzy')
+        self.assertIn('not part of the OpenAPI specifications', data['displayText'])
+
+
+class TestBotPath(BaseBotTestCase):
+
+    def test_without_slash_and_base_path(self):
+        data = self.ask('api.path', api='petstore', path='pet/{petId}')
+        self.assertIn('Pet not found', data['displayText'])
+
+    def test_unknown_path(self):
+        data = self.ask('api.path', api='petstore', path='unicorns')
+        self.assertIn('not part of the OpenAPI specifications', data['displayText'])
+
+
+class TestBotShowMore(BaseBotTestCase):
+
+    def test_show_more(self):
+        with self.settings(APIBOT_RENDER_MAX_CHARS=200):
+            data = self.ask('api.path', api='petstore', path='pet')
+            self.assertIn('show more', data['displayText'])
+            self.assertLess(len(data['displayText']), 300)
+            context = data['contextOut'][0]
+            self.assertEqual(context['name'], 'show_more')
+            self.assertEqual(context['parameters']['show_more'], 'api.path')
+
+            data = self.ask('api.show-more', contexts=data['contextOut'])
+            self.assertNotEqual(data['contextOut'][0]['parameters']['offset'], context['parameters']['offset'])
+
+    def test_nothing_more(self):
+        data = self.ask('api.show-more')
+        self.assertEqual(data['displayText'], 'There is nothing more to show.')
+
+
+class TestBotSuggestions(BaseBotTestCase):
+
+    def test_operation(self):
+        data = self.ask('api.operation', api='petstore', operation='getPetByld')
+        self.assertIn('Did you mean', data['displayText'])
+        actions = data['data']['slack']['attachments'][0]['actions']
+        self.assertEqual(actions[0]['value'], 'Explain operation getPetById')
+
+    def test_object(self):
+        data = self.ask('api.object-definition', api='petstore', object='Ordr')
+        actions = data['data']['slack']['attachments'][0]['actions']
+        self.assertEqual(actions[0]['value'], 'Explain object Order')
+
+    def test_path(self):
+        data = self.ask('api.path', api='petstore', path='store/ordr')
+        actions = data['data']['slack']['attachments'][0]['actions']
+        self.assertEqual(actions[0]['value'], 'Explain path /v2/store/order')
+
+
+class TestSwaggerViewSet(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.make_user())
+
+    def create(self, name, status_code=200):
+        response = self.client.post('/api/v1/apis/apis/', {
+            'name': name,
+            'swaggerfile': 'http://example.com/swagger.json',
+        }, format='json')
+        if response.status_code == 201:
+            with mock.patch('apibot.apis.fetch.requests.get') as get:
+                get.return_value = mock.Mock(status_code=status_code, content=petstore_body(), headers={})
+                ingest_swagger(response.data['id'])
+        return response
+
+    def test_create_is_pending(self):
+        response = self.create('Pet Store')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], 'pending')
+
+    def test_create_stores_swaggerfile(self):
+        response = self.create('Pet Store')
+        response = self.client.get('/api/v1/apis/apis/{0}/'.format(response.data['id']))
+        self.assertEqual(Swagger.objects.get(pk=response.data['id']).slug, 'pet-store')
+        self.assertEqual(response.data['status'], 'ready')
+        self.assertEqual(response.data['fetch_status'], 200)
+        self.assertTrue(response.data['spec_hash'])
+
+    def test_update_validates_swaggerfile(self):
+        response = self.create('Pet Store')
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = mock.Mock(status_code=200, content=b'{"swagger": "1.2"}', headers={})
+            response = self.client.patch('/api/v1/apis/apis/{0}/'.format(response.data['id']), {
+                'swaggerfile': 'http://example.com/v2/swagger.json',
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not a valid Swagger 2.0 file', response.data['swaggerfile'][0])
+        self.assertEqual(bytes(Swagger.objects.get(name='Pet Store').spec_raw), petstore_body())
+
+    def test_create_duplicate_name(self):
+        self.create('Pet Store')
+        response = self.create('pet-store')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data)
+
+    def test_create_unreachable_swaggerfile(self):
+        response = self.create('Pet Store', status_code=404)
+        response = self.client.get('/api/v1/apis/apis/', {'status': 'failed'})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['fetch_status'], 404)
+        self.assertIn('invalid URL', response.data['results'][0]['fetch_error'])
+
+
+class TestSwaggerViewSetList(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.swaggers = [SwaggerFactory(name=name) for name in ('GitHub', 'Slack', 'Trello')]
+
+    def test_pages_in_modification_order(self):
+        response = self.client.get('/api/v1/apis/apis/', {'page_size': 2})
+        self.assertEqual([api['name'] for api in response.data['results']], ['GitHub', 'Slack'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([api['name'] for api in response.data['results']], ['Trello'])
+        self.assertIsNone(response.data['next'])
+
+    def test_modified_since(self):
+        since = self.swaggers[0].modified.isoformat().replace('+00:00', 'Z')
+        response = self.client.get('/api/v1/apis/apis/', {'modified_since': since})
+        self.assertEqual([api['name'] for api in response.data['results']], ['Slack', 'Trello'])
+
+    def test_invalid_modified_since(self):
+        response = self.client.get('/api/v1/apis/apis/', {'modified_since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_modified(self):
+        response = self.client.get('/api/v1/apis/apis/')
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get('/api/v1/apis/apis/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        last_modified = response['Last-Modified']
+        response = self.client.get('/api/v1/apis/apis/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        self.swaggers[1].delete()
+        response = self.client.get('/api/v1/apis/apis/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        # The others were not modified, but the list was
+        response = self.client.get('/api/v1/apis/apis/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+
+class TestBotCreate(BaseBotTestCase):
+
+    def create(self, name, url):
+        return self.ask('api.create', api=name, contexts=[{
+            'name': 'create',
+            'parameters': {'url.original': url},
+        }])
+
+    def test_create(self):
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            data = self.create('Pet Store 2', 'example.com/swagger.json')
+            self.assertIn('Ask me if it is ready', data['displayText'])
+            self.assertFalse(get.called)
+            self.assertIn('still reading', self.ask('api.status', api='Pet Store 2')['displayText'])
+
+            get.return_value = mock.Mock(status_code=200, content=petstore_body(), headers={})
+            ingest_swagger(Swagger.objects.get(slug='pet-store-2').pk)
+            # Downloaded once, from the preferred candidate
+            self.assertEqual(get.call_count, 1)
+
+        self.assertIn('is ready', self.ask('api.status', api='Pet Store 2')['displayText'])
+        swagger = Swagger.objects.get(slug='pet-store-2')
+        self.assertEqual(swagger.swaggerfile, 'https://example.com/swagger.json')
+        self.assertEqual(bytes(swagger.spec_raw), petstore_body())
+
+    def test_create_again_after_failure(self):
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = mock.Mock(status_code=200, content=b'{"swagger": "1.2"}', headers={})
+            self.create('Pet Store 2', 'example.com/swagger.json')
+            ingest_swagger(Swagger.objects.get(slug='pet-store-2').pk)
+        self.assertIn('not a valid Swagger 2.0 file', self.ask('api.status', api='Pet Store 2')['displayText'])
+
+        data = self.create('Pet Store 2', 'example.com/v2/swagger.json')
+        self.assertIn('Ask me if it is ready', data['displayText'])
+        self.assertEqual(Swagger.objects.get(slug='pet-store-2').status, Swagger.PENDING)
+
+    def test_create_again_same_url_after_failure(self):
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = mock.Mock(status_code=503, content=b'', headers={})
+            self.create('Pet Store 2', 'http://example.com/swagger.json')
+            ingest_swagger(Swagger.objects.get(slug='pet-store-2').pk)
+        self.assertEqual(Swagger.objects.get(slug='pet-store-2').status, Swagger.FAILED)
+
+        data = self.create('Pet Store 2', 'http://example.com/swagger.json')
+        self.assertIn('Ask me if it is ready', data['displayText'])
+        self.assertEqual(Swagger.objects.get(slug='pet-store-2').status, Swagger.PENDING)
+
+    def test_same_url_pending_twice(self):
+        # As two creations at the same time leave them
+        first = SwaggerFactory(name='Pet Store 2', swaggerfile='http://example.com/swagger.json', status=Swagger.PENDING)
+        second = SwaggerFactory(name='Pet Store 3', swaggerfile='http://example.com/swagger.json', status=Swagger.PENDING)
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = mock.Mock(status_code=200, content=petstore_body(), headers={})
+            # The newer one runs first, and still leaves the URL to the older one
+            ingest_swagger(second.pk)
+            ingest_swagger(first.pk)
+        self.assertEqual(Swagger.objects.get(pk=first.pk).status, Swagger.READY)
+        second = Swagger.objects.get(pk=second.pk)
+        self.assertEqual(second.status, Swagger.FAILED)
+        self.assertEqual(second.fetch_error, 'An API pointing to this URL already exists!')
+
+    def test_same_url_as_failed(self):
+        SwaggerFactory(name='Broken', swaggerfile='http://example.com/swagger.json', status=Swagger.FAILED)
+        self.create('Pet Store 2', 'http://example.com/swagger.json')
+        with mock.patch('apibot.apis.fetch.requests.get') as get:
+            get.return_value = mock.Mock(status_code=200, content=petstore_body(), headers={})
+            ingest_swagger(Swagger.objects.get(slug='pet-store-2').pk)
+        self.assertEqual(Swagger.objects.get(slug='pet-store-2').status, Swagger.READY)
+
+    def test_existing_name(self):
+        data = self.create('PetStore', 'example.com/swagger.json')
+        self.assertEqual(data['displayText'], 'An API with this name already exists!')
+
+    def test_missing_url(self):
+        data = self.ask('api.create', api='Pet Store 2')
+        self.assertIn('I need a name and URL', data['displayText'])
+
+
+class TestBotList(BaseBotTestCase):
+
+    def setUp(self):
+        super(TestBotList, self).setUp()
+        for name in ('GitHub', 'Slack', 'Trello'):
+            SwaggerFactory(name=name)
+
+    def test_list(self):
+        data = self.ask('api.list')
+        self.assertIn('GitHub\npetstore\nSlack\nTrello', data['displayText'])
+        self.assertNotIn('contextOut', data)
+
+    def test_pages(self):
+        with self.settings(APIBOT_API_LIST_PAGE_SIZE=3):
+            data = self.ask('api.list')
+            self.assertIn('GitHub\npetstore\nSlack\n', data['displayText'])
+            self.assertNotIn('Trello', data['displayText'])
+            actions = data['data']['slack']['attachments'][0]['actions']
+            self.assertEqual(actions[-1]['name'], 'next_page')
+            self.assertEqual(data['contextOut'][0]['name'], 'api_list')
+
+            data = self.ask('api.list', contexts=data['contextOut'])
+            self.assertIn('Trello', data['displayText'])
+            self.assertNotIn('GitHub', data['displayText'])
+
+    def test_cached_until_apis_change(self):
+        self.ask('api.list')
+        with CaptureQueriesContext(connection) as queries:
+            self.ask('api.list')
+        # Only the savepoint of ATOMIC_REQUESTS
+        self.assertFalse([query for query in queries if 'SELECT' in query['sql']])
+        SwaggerFactory(name='Zendesk')
+        self.assertIn('Zendesk', self.ask('api.list')['displayText'])
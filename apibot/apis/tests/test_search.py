@@ -0,0 +1,40 @@
+import json
+
+from test_plus.test import TestCase
+
+from ..search import normalize, SearchIndex, TrigramIndex
+from .factories import petstore_body
+
+
+class TestSearchIndex(TestCase):
+
+    def setUp(self):
+        specification = json.loads(petstore_body().decode('utf-8'))
+        self.index = SearchIndex(specification, specification['basePath'])
+
+    def test_misspelled_operation(self):
+        self.assertEqual(self.index.search('getPetByld', 'operation')[0], 'getPetById')
+        self.assertEqual(self.index.search('findpetsbystatsu', 'operation')[0], 'findPetsByStatus')
+
+    def test_summary_words(self):
+        self.assertIn('getInventory', self.index.search('inventries', 'operation'))
+
+    def test_path(self):
+        self.assertEqual(self.index.search('store/ordr', 'path')[0], '/v2/store/order')
+
+    def test_definition(self):
+        self.assertEqual(self.index.search('Ordr', 'definition'), ['Order'])
+
+    def test_nothing_close(self):
+        self.assertEqual(self.index.search('xyzzy', 'definition'), [])
+        self.assertEqual(self.index.search('', 'definition'), [])
+
+    def test_common_trigrams(self):
+        index = TrigramIndex()
+        index.common = 2
+        for name in ('getPet', 'getOrder', 'getUser', 'getStore'):
+            index.add(name, name)
+        self.assertEqual(index.search('getUsr')[0], 'getUser')
+
+    def test_normalize(self):
+        self.assertEqual(normalize('/v2/Pet/{petId}'), 'v2petpetid')
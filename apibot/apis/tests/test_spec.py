@@ -0,0 +1,87 @@
+import json
+import os
+
+from django.test import SimpleTestCase
+from swagger_parser import SwaggerParser
+
+from ..spec import LazySpec, load_spec
+
+
+with open(os.path.join(os.path.dirname(__file__), 'petstore.json')) as f:
+    PETSTORE = f.read()
+
+
+def without_scope(value):
+    # The validator of SwaggerParser adds x-scope to what it visits
+    if isinstance(value, dict):
+        return dict((key, without_scope(item)) for key, item in value.items() if key != 'x-scope')
+    if isinstance(value, list):
+        return [without_scope(item) for item in value]
+    return value
+
+
+class TestLazySpec(SimpleTestCase):
+
+    def setUp(self):
+        self.spec = LazySpec(json.loads(PETSTORE))
+        self.parser = SwaggerParser(swagger_dict=json.loads(PETSTORE))
+
+    def test_same_as_swagger_parser(self):
+        self.assertEqual(self.spec.base_path, self.parser.base_path)
+        self.assertEqual(self.spec.operation, self.parser.operation)
+        self.assertEqual(list(self.spec.paths), list(self.parser.paths))
+        for path in self.parser.paths:
+            self.assertEqual(self.spec.paths[path], without_scope(self.parser.paths[path]))
+
+    def test_paths_are_built_on_demand(self):
+        self.assertEqual(self.spec.paths._built, {})
+        self.assertIn('/v2/pet/{petId}', self.spec.paths)
+        self.assertNotIn('/pet/{petId}', self.spec.paths)
+        self.assertEqual(self.spec.paths._built, {})
+        pet = self.spec.paths['/v2/pet/{petId}']
+        self.assertIs(self.spec.paths['/v2/pet/{petId}'], pet)
+        self.assertEqual(list(self.spec.paths._built), ['/v2/pet/{petId}'])
+        with self.assertRaises(KeyError):
+            self.spec.paths['/pet/{petId}']
+
+    def test_resolve(self):
+        specification = {
+            'parameters': {'limit': {'name': 'limit', 'in': 'query', 'type': 'integer'}},
+            'definitions': {'a/b': {'type': 'string'}},
+            'paths': {'/items': {
+                'parameters': [{'$ref': '#/parameters/limit'}],
+                'get': {'parameters': [{'name': 'q', 'in': 'query', 'type': 'string'}], 'responses': {}},
+            }},
+        }
+        spec = LazySpec(specification)
+        limit = spec.resolve({'$ref': '#/parameters/limit'})
+        self.assertIs(limit, specification['parameters']['limit'])
+        self.assertIs(spec.resolve({'$ref': '#/definitions/a~1b'}), specification['definitions']['a/b'])
+        self.assertEqual(list(spec.paths['/items']['get']['parameters']), ['limit', 'q'])
+        self.assertIs(spec.paths['/items']['get']['parameters']['limit'], limit)
+
+
+class TestCompactor(SimpleTestCase):
+
+    def test_same_spec(self):
+        specification, compactor = load_spec(PETSTORE.encode('utf-8'))
+        self.assertEqual(specification, json.loads(PETSTORE))
+        self.assertGreater(compactor.size, 0)
+        self.assertGreater(compactor.shared_nodes, 0)
+
+    def test_shares_identical_nodes(self):
+        body = json.dumps({
+            'a': {'schema': {'type': 'string', 'enum': ['x', 'y']}},
+            'b': {'schema': {'type': 'string', 'enum': ['x', 'y']}},
+            'c': {'schema': {'type': 'string', 'enum': ['x', 'z']}},
+        })
+        specification, _ = load_spec(body.encode('utf-8'))
+        self.assertIs(specification['a'], specification['b'])
+        self.assertIsNot(specification['a'], specification['c'])
+
+    def test_interns_strings_across_specs(self):
+        first, _ = load_spec(b'{"type": "string", "description": "' + b'x' * 100 + b'"}')
+        second, _ = load_spec(b'{"type": "string", "description": "' + b'x' * 100 + b'"}')
+        self.assertIs(first['type'], second['type'])
+        self.assertIs(list(first)[0], list(second)[0])
+        self.assertIsNot(first['description'], second['description'])
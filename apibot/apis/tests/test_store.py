@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from test_plus.test import TestCase
+
+from ..cache import response_cache, spec_cache
+from ..models import Swagger
+from ..spec import LazySpec
+from ..store import SpecStore, write_store
+from .factories import SwaggerFactory, petstore_body, bot_payload
+
+
+class TestSpecStore(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        spec_cache.clear()
+        response_cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'specs')
+        self.swagger = SwaggerFactory(name='petstore')
+        self.swagger.store_swaggerfile(petstore_body())
+        self.swagger.save()
+        write_store(self.path, [self.swagger])
+        self.store = SpecStore(self.path)
+        self.store.check_interval = 0
+
+    def tearDown(self):
+        spec_cache.clear()
+        shutil.rmtree(self.directory)
+
+    def test_reads_like_the_spec(self):
+        stored = LazySpec(self.store.get(self.swagger.pk, self.swagger.spec_hash))
+        spec = LazySpec(json.loads(petstore_body().decode('utf-8')))
+        self.assertEqual(stored.base_path, spec.base_path)
+        self.assertEqual(stored.operation, spec.operation)
+        self.assertEqual(dict(stored.paths), dict(spec.paths))
+        self.assertEqual(dict(stored.specification['definitions']), spec.specification['definitions'])
+        self.assertEqual(stored.specification['info'], spec.specification['info'])
+
+    def test_other_versions_are_not_stored(self):
+        self.assertIsNone(self.store.get(self.swagger.pk, 'other'))
+        self.assertIsNone(self.store.get(self.swagger.pk + 1, self.swagger.spec_hash))
+
+    def test_rewrite(self):
+        self.assertIsNotNone(self.store.get(self.swagger.pk, self.swagger.spec_hash))
+        old = self.swagger.spec_hash
+        self.swagger.store_swaggerfile(petstore_body().replace(b'Swagger Petstore', b'Petstore'))
+        write_store(self.path, [self.swagger])
+        self.assertIsNone(self.store.get(self.swagger.pk, old))
+        stored = self.store.get(self.swagger.pk, self.swagger.spec_hash)
+        self.assertEqual(stored['info']['title'], 'Petstore')
+        self.assertEqual(os.listdir(self.directory), ['specs'])
+
+    def test_bot_reads_from_store(self):
+        swagger = Swagger.objects.defer(*Swagger.spec_fields).get(pk=self.swagger.pk)
+        with self.settings(APIBOT_SPEC_STORE_PATH=self.path):
+            entry = spec_cache.get(swagger)
+            self.assertEqual(entry.parser.paths['/v2/pet/{petId}']['get'].responses['200']['description'], 'successful operation')
+            spec_cache.clear()
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = APIClient().post(
+                    '/api/v1/apis/bot/', bot_payload('api.object-definition', api='petstore', object='Pet'), format='json')
+        self.assertIn('photoUrls', response.data['data']['slack']['text'])
+        # Only the query finding the API, not its Swagger file
+        selects = [query['sql'] for query in queries if 'SELECT' in query['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('spec_json', selects[0])
@@ -0,0 +1,112 @@
+import time
+
+from django.test import SimpleTestCase
+from swagger_spec_validator.validator20 import validate_spec
+from test_plus.test import TestCase
+
+from ..fetch import fetch_spec, probe_spec_url, SpecFetcher, SwaggerFetchError
+from ..stubhost import StubSpecServer
+from ..synthetic import definition_name, generate_body, generate_spec
+from .factories import SwaggerFactory
+
+
+class TestGenerateSpec(SimpleTestCase):
+
+    def test_options(self):
+        spec = generate_spec(20, 12, methods=('get', 'post', 'patch', 'head'), ref_depth=3, tags=4, size=100000)
+        validate_spec(spec)
+        self.assertEqual(len(spec['tags']), 4)
+        self.assertEqual(set(spec['paths']['/resources0/{id}']), {'parameters', 'get', 'post', 'patch', 'head'})
+        self.assertGreaterEqual(len(generate_body(20, 12, size=100000)), 100000)
+        self.assertLess(len(generate_body(20, 12, size=100000)), 110000)
+
+        # Chains of 3 $refs
+        refs = dict(
+            (name, definition['properties'].get('parent', {}).get('$ref', '').rsplit('/', 1)[-1])
+            for name, definition in spec['definitions'].items()
+        )
+        self.assertEqual(refs[definition_name(0)], definition_name(1))
+        self.assertEqual(refs[definition_name(2)], definition_name(3))
+        self.assertEqual(refs[definition_name(3)], '')
+        self.assertEqual(refs[definition_name(11)], '')
+
+    def test_deterministic(self):
+        self.assertEqual(generate_body(5, size=5000, ref_depth=1), generate_body(5, size=5000, ref_depth=1))
+
+
+class TestStubSpecServer(SimpleTestCase):
+
+    def setUp(self):
+        self.host = StubSpecServer(paths=5).start()
+        self.addCleanup(self.host.stop)
+
+    def test_serves_generated_spec(self):
+        result = fetch_spec(self.host.url())
+        self.assertEqual(result.body, self.host.get_body(self.host.get_options(''))[0])
+        self.assertEqual(len(generate_spec(5)['paths']), 5)
+        result = fetch_spec(self.host.url(paths=50, methods=['get']))
+        self.assertIn(b'getResource49', result.body)
+        self.assertNotIn(b'putResource', result.body)
+
+    def test_etags(self):
+        result = fetch_spec(self.host.url())
+        self.assertTrue(result.etag)
+        self.assertEqual(fetch_spec(self.host.url(), etag=result.etag).status, 304)
+        # Another version of the file
+        self.assertEqual(fetch_spec(self.host.url(version=1), etag=result.etag).status, 200)
+
+        self.assertEqual(fetch_spec(self.host.url(etag='none')).etag, '')
+        result = fetch_spec(self.host.url(etag='changing'))
+        self.assertEqual(fetch_spec(self.host.url(etag='changing'), etag=result.etag).status, 200)
+        self.assertEqual(self.host.statuses[304], 1)
+
+    def test_errors(self):
+        with self.assertRaises(SwaggerFetchError) as error:
+            fetch_spec(self.host.url(error_rate=1, error_status=502))
+        self.assertEqual(error.exception.status, 502)
+        with self.assertRaises(SwaggerFetchError):
+            fetch_spec(self.host.url(status=404))
+        with self.assertRaises(SwaggerFetchError) as error:
+            fetch_spec(self.host.url(paths='many'))
+        self.assertEqual(error.exception.status, 400)
+
+    def test_latency(self):
+        with self.assertRaises(SwaggerFetchError):
+            fetch_spec(self.host.url(latency=0.5), timeout=0.1)
+
+    def test_slow_drip(self):
+        # Every part comes within the read timeout, so the whole body takes longer than it
+        start = time.time()
+        result = fetch_spec(self.host.url(size=2000, drip_bytes=500, drip_delay=0.1), timeout=0.25)
+        self.assertGreaterEqual(len(result.body), 2000)
+        self.assertGreater(time.time() - start, 0.25)
+
+    def test_probe_spec_url(self):
+        # The stub only speaks HTTP, so the HTTPS candidate fails
+        url = self.host.url()
+        result = probe_spec_url(url.split('://', 1)[1], timeout=1)
+        self.assertEqual(result.url, url)
+
+    def test_per_host_limit(self):
+        fetcher = SpecFetcher(workers=6, per_host=2)
+        swaggers = [SwaggerFactory.build(swaggerfile=self.host.url(latency=0.05, version=i)) for i in range(6)]
+        results = list(fetcher.fetch_all(swaggers))
+        self.assertTrue(all(error is None for _swagger, _result, error, _seconds in results))
+        self.assertEqual(self.host.max_concurrent, 2)
+
+
+class TestSwaggerWithStubSpecServer(TestCase):
+
+    def setUp(self):
+        self.host = StubSpecServer(paths=30).start()
+        self.addCleanup(self.host.stop)
+
+    def test_fetch_and_parse(self):
+        swagger = SwaggerFactory(swaggerfile=self.host.url())
+        swagger.fetch_swaggerfile()
+        self.assertEqual(swagger.fetch_status, 200)
+        parser = swagger.parse_swaggerfile()
+        self.assertIn('getResource29', parser.operation)
+
+        self.assertEqual(swagger.fetch_swaggerfile().status, 304)
+        self.assertEqual(self.host.count, 2)
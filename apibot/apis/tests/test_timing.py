@@ -0,0 +1,99 @@
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings, SimpleTestCase
+from rest_framework.test import APIClient
+from test_plus.test import TestCase
+
+from ..cache import response_cache, spec_cache
+from ..timing import current_timer, phase, start_timer, stop_timer
+from .factories import bot_payload, petstore_body, SwaggerFactory
+
+
+class TestPhase(SimpleTestCase):
+
+    def test_without_timer(self):
+        self.assertIsNone(current_timer())
+        with phase('parse'):
+            pass
+        self.assertIsNone(stop_timer())
+
+    def test_phases_add_up(self):
+        timer = start_timer()
+        try:
+            with phase('parse'):
+                with phase('scan'):
+                    pass
+            with phase('parse'):
+                pass
+        finally:
+            self.assertIs(stop_timer(), timer)
+        self.assertEqual(list(timer.phases), ['scan', 'parse'])
+        header = timer.server_timing()
+        self.assertRegex(header, r'^scan;dur=[\d.]+, parse;dur=[\d.]+, total;dur=[\d.]+$')
+
+
+class TestBotViewTiming(TestCase):
+
+    def setUp(self):
+        spec_cache.clear()
+        response_cache.clear()
+        swagger = SwaggerFactory(name='petstore')
+        swagger.store_swaggerfile(petstore_body())
+        swagger.save()
+        self.client = APIClient()
+
+    def post(self, payload):
+        with mock.patch('apibot.apis.timing.logger') as logger:
+            logger.isEnabledFor.return_value = True
+            response = self.client.post('/api/v1/apis/bot/', payload, format='json')
+        self.assertEqual(logger.info.call_count, 1)
+        return response, json.loads(logger.info.call_args[0][0])
+
+    def test_phases(self):
+        payload = bot_payload('api.object-definition', api='petstore', object='Pet')
+        response, line = self.post(payload)
+        self.assertEqual(response.status_code, 200)
+        phases = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        for name in ('validate', 'lookup', 'cache', 'load', 'parse', 'scan', 'render', 'serialize', 'total'):
+            self.assertIn(name, phases)
+        self.assertEqual(line['action'], 'api.object-definition')
+        self.assertEqual(line['api'], 'petstore')
+        self.assertEqual(line['cache'], 'miss')
+        self.assertEqual(line['spec'], 'database')
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['request_bytes'], 0)
+        self.assertEqual(line['response_bytes'], len(response.content))
+        self.assertIn('encode', phases)
+        self.assertIn('parse_ms', line)
+
+        response, line = self.post(payload)
+        self.assertEqual(line['cache'], 'hit')
+        self.assertNotIn('parse', response['Server-Timing'])
+        self.assertIsNone(current_timer())
+
+    def test_invalid_payload(self):
+        response, line = self.post({'lang': 'en'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(line['status'], 400)
+        self.assertIn('validate;dur=', response['Server-Timing'])
+
+    def test_uncaught_exception(self):
+        with mock.patch('apibot.apis.timing.logger') as logger:
+            logger.isEnabledFor.return_value = True
+            with mock.patch('apibot.apis.handlers.ListHandler.handle', side_effect=RuntimeError('Boom')):
+                with self.assertRaises(RuntimeError):
+                    self.client.post('/api/v1/apis/bot/', bot_payload('api.list'), format='json')
+        self.assertIsNone(current_timer())
+        self.assertFalse(connection.force_debug_cursor)
+        line = json.loads(logger.info.call_args[0][0])
+        self.assertEqual(line['status'], 500)
+        self.assertEqual(line['action'], 'api.list')
+        self.assertEqual(line['response_bytes'], 0)
+
+    @override_settings(APIBOT_SERVER_TIMING=False)
+    def test_without_header(self):
+        response, line = self.post(bot_payload('api.list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(line['cache'], 'miss')
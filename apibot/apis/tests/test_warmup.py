@@ -0,0 +1,50 @@
+from unittest import mock
+
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from test_plus.test import TestCase
+
+from ..cache import record_hit, spec_cache
+from ..warmup import hot_swaggers, warm_up
+from .factories import SwaggerFactory, petstore_body, bot_payload
+
+
+class TestWarmUp(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        spec_cache.clear()
+        self.swaggers = []
+        for name in ('first', 'second', 'third'):
+            swagger = SwaggerFactory(name=name)
+            swagger.store_swaggerfile(petstore_body())
+            swagger.save()
+            self.swaggers.append(swagger)
+
+    def tearDown(self):
+        spec_cache.clear()
+
+    def test_most_asked_first(self):
+        record_hit(self.swaggers[1].pk)
+        record_hit(self.swaggers[1].pk)
+        record_hit(self.swaggers[0].pk)
+        self.assertEqual(
+            [swagger.pk for swagger in hot_swaggers(2)],
+            [self.swaggers[1].pk, self.swaggers[0].pk],
+        )
+
+    def test_warm_up(self):
+        self.assertEqual(warm_up(count=2), 2)
+        self.assertEqual(spec_cache.stats()['entries'], 2)
+        with self.assertNumQueries(0):
+            self.swaggers[2].get_spec()
+
+    def test_budget(self):
+        with mock.patch('apibot.apis.warmup.time') as clock:
+            clock.time.side_effect = [0, 0, 100, 100]
+            self.assertEqual(warm_up(count=3, budget=10), 1)
+
+    def test_bot_questions_are_counted(self):
+        client = APIClient()
+        client.post('/api/v1/apis/bot/', bot_payload('api.info', api='second', data='info'), format='json')
+        self.assertEqual(hot_swaggers(1)[0].pk, self.swaggers[1].pk)
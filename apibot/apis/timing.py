@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class RequestTimer(object):
+    """
+    How long the phases of one request took, and what it was about.
+    Phases with the same name add up, and phases may nest.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = OrderedDict()
+        self.fields = OrderedDict()
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def total(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self):
+        """
+        :rtype: str - the value of a Server-Timing header
+        """
+        metrics = ['{0};dur={1:.2f}'.format(name, seconds * 1000) for name, seconds in self.phases.items()]
+        metrics.append('total;dur={0:.2f}'.format(self.total() * 1000))
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        """
+        :rtype: OrderedDict - the fields, then milliseconds per phase
+        """
+        data = OrderedDict(self.fields)
+        data['total_ms'] = round(self.total() * 1000, 3)
+        for name, seconds in self.phases.items():
+            data['{0}_ms'.format(name)] = round(seconds * 1000, 3)
+        return data
+
+
+def start_timer():
+    """
+    Starts timing the request of this thread.
+    :rtype: RequestTimer
+    """
+    _local.timer = RequestTimer()
+    return _local.timer
+
+
+def stop_timer():
+    """
+    Stops timing the request of this thread.
+    :rtype: RequestTimer or None - if one was started
+    """
+    timer = getattr(_local, 'timer', None)
+    _local.timer = None
+    return timer
+
+
+def current_timer():
+    return getattr(_local, 'timer', None)
+
+
+class phase(object):
+    """
+    Times a phase of the current request, if it is timed:
+
+        with phase('parse'):
+            ...
+    """
+
+    __slots__ = ('name', 'timer', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.timer = getattr(_local, 'timer', None)
+        if self.timer is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.timer is not None:
+            self.timer.add(self.name, time.perf_counter() - self.start)
+
+
+def annotate(**fields):
+    """
+    Tells what the current request is about, for its log line.
+    """
+    timer = getattr(_local, 'timer', None)
+    if timer is not None:
+        timer.fields.update(fields)
+
+
+def log_timer(timer):
+    """
+    Writes one structured line about a timed request.
+    """
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(timer.as_dict()))
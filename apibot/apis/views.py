@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from .metrics import render_metrics
+
+
+@require_GET
+def metrics_view(request):
+    """
+    The metrics of every process of this node, in the Prometheus text format.
+    When APIBOT_METRICS_TOKEN is set, scrapers must send it as a bearer token,
+    else they must come from one of APIBOT_METRICS_IPS.
+    """
+    token = getattr(settings, 'APIBOT_METRICS_TOKEN', '')
+    if token:
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), 'Bearer {0}'.format(token)):
+            return HttpResponseForbidden()
+    elif request.META.get('REMOTE_ADDR') not in getattr(settings, 'APIBOT_METRICS_IPS', ['127.0.0.1', '::1']):
+        return HttpResponseForbidden()
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
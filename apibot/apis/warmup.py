@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+
+import gc
+import logging
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import get_hits, spec_cache
+from .models import Swagger
+
+
+logger = logging.getLogger(__name__)
+
+
+def hot_swaggers(count):
+    """
+    Returns the APIs asked about the most, then the latest changed ones.
+    :rtype: list - Swagger instances without their spec fields loaded
+    """
+    ids = list(Swagger.objects.filter(status=Swagger.READY).exclude(spec_hash='').order_by('-modified').values_list('pk', flat=True))
+    hits = get_hits(ids)
+    # sorted() is stable, so ties stay by date
+    ids = sorted(ids, key=lambda pk: hits[pk], reverse=True)[:count]
+    swaggers = Swagger.objects.defer(*Swagger.spec_fields).in_bulk(ids)
+    return [swaggers[pk] for pk in ids if pk in swaggers]
+
+
+def warm_up(count=None, budget=None):
+    """
+    Parses and indexes the specs of the APIs asked about the most.
+
+    Meant to run in the gunicorn master before it forks, so that the
+    workers start with the specs in memory and share them copy-on-write.
+    Stops when the time budget is spent or the spec cache is full, and
+    closes the database connections, which must not be shared with
+    the workers.
+    :param count: How many specs to load, APIBOT_WARMUP_COUNT by default
+    :param budget: Seconds to stop after, APIBOT_WARMUP_BUDGET by default
+    :rtype: int - the number of specs loaded
+    """
+    if count is None:
+        count = getattr(settings, 'APIBOT_WARMUP_COUNT', 50)
+    if budget is None:
+        budget = getattr(settings, 'APIBOT_WARMUP_BUDGET', 30.0)
+
+    start = time.time()
+    loaded = 0
+    try:
+        for swagger in hot_swaggers(count) if count > 0 else []:
+            if time.time() - start >= budget:
+                logger.warning('Warm-up ran out of time after %d specs', loaded)
+                break
+            if spec_cache.stats()['bytes'] >= spec_cache.max_bytes:
+                logger.warning('Warm-up filled the spec cache after %d specs', loaded)
+                break
+            try:
+                spec = swagger.get_spec()
+                spec.definition_index
+                spec.definition_lookup
+                spec.operation_lookup
+                spec.path_lookup
+                spec.search_index
+            except Exception:
+                logger.exception('Warming up %s failed', swagger)
+                continue
+            loaded += 1
+    finally:
+        connections.close_all()
+
+    if hasattr(gc, 'freeze'):
+        # Keeps the collector of the workers from writing to the shared pages
+        gc.freeze()
+    stats = spec_cache.stats()
+    logger.info(
+        'Warmed up %d specs in %.2fs, %d bytes in memory',
+        loaded, time.time() - start, stats['bytes'],
+    )
+    return loaded
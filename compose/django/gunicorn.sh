@@ -1,3 +1,3 @@
 #!/bin/sh
 python /app/manage.py collectstatic --noinput
-/usr/local/bin/gunicorn config.wsgi -w 4 -b 0.0.0.0:5000 --chdir=/app
\ No newline at end of file
+/usr/local/bin/gunicorn config.wsgi -c /app/config/gunicorn.py -w 4 -b 0.0.0.0:5000 --chdir=/app
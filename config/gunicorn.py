@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration for apibot.
+
+The application is loaded in the master, which loads the specs of the
+most asked about APIs before forking its workers, see
+apibot.apis.warmup. Workers then start with a warm cache, shared
+copy-on-write.
+
+Every process keeps its metrics in files of a directory of its own,
+which /metrics adds up, see apibot.apis.metrics.
+"""
+import os
+import shutil
+import tempfile
+
+preload_app = True
+
+# prometheus_client reads the directory when it is imported, so before the
+# application is loaded. A reload of the master keeps the directory in use.
+if 'prometheus_multiproc_dir' not in os.environ:
+    metrics_dir = os.environ.get('APIBOT_METRICS_DIR') or os.path.join(tempfile.gettempdir(), 'apibot-metrics')
+    # Counts of a previous run would add up with the new ones
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    os.environ['prometheus_multiproc_dir'] = metrics_dir
+
+
+def when_ready(server):
+    # Runs in the master, once the application is loaded and before the workers are forked
+    from apibot.apis.warmup import warm_up
+    warm_up()
+
+
+def child_exit(server, worker):
+    # The gauges of a dead worker no longer count, its counters do
+    from apibot.apis.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -67,7 +67,7 @@ LOCAL_APPS = [
     # custom users app
     'apibot.users.apps.UsersConfig',
     # Your stuff: custom apps go here
-    'apibot.apis'
+    'apibot.apis.apps.ApisConfig',
 ]
 
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -303,3 +303,62 @@ REST_FRAMEWORK = {
 #     'USER_DETAILS_SERIALIZER': 'apps.users.serializers.UserDetailsSerializer',
 #     # 'PASSWORD_RESET_SERIALIZER': 'apps.users.serializers.PasswordResetSerializer',
 # }
+
+# Swagger spec cache
+# ------------------------------------------------------------------------------
+# Parsed specs are kept in a per-process LRU backed by CACHES['default'].
+# The TTL (seconds) defines how long a compressed spec stays in CACHES['default'].
+APIBOT_SPEC_CACHE_TTL = env.int('APIBOT_SPEC_CACHE_TTL', default=300)
+# Upper bound (bytes) for the memory taken by the specs one process holds.
+# A spec larger than this is never cached.
+APIBOT_SPEC_CACHE_MAX_BYTES = env.int('APIBOT_SPEC_CACHE_MAX_BYTES', default=64 * 1024 * 1024)
+# Timeout (seconds) for fetching a spec from its host
+APIBOT_SPEC_FETCH_TIMEOUT = env.float('APIBOT_SPEC_FETCH_TIMEOUT', default=10.0)
+# Timeout (seconds) for connecting to the host of a spec added through the bot
+APIBOT_SPEC_CONNECT_TIMEOUT = env.float('APIBOT_SPEC_CONNECT_TIMEOUT', default=3.0)
+# Time (seconds) the HTTPS URL of a spec added without a scheme has to
+# answer before the HTTP one is tried as well
+APIBOT_SPEC_PROBE_HEAD_START = env.float('APIBOT_SPEC_PROBE_HEAD_START', default=1.0)
+
+# A file all processes of a node map to read specs from, rewritten by
+# `manage.py refresh_swaggers`. Not used when empty.
+APIBOT_SPEC_STORE_PATH = env('APIBOT_SPEC_STORE_PATH', default='')
+
+# Number of APIs per page of the api.list answer, and how long (seconds)
+# a rendered page is cached. Pages are dropped whenever an API is added,
+# renamed or removed.
+APIBOT_API_LIST_PAGE_SIZE = env.int('APIBOT_API_LIST_PAGE_SIZE', default=20)
+APIBOT_API_LIST_CACHE_TTL = env.int('APIBOT_API_LIST_CACHE_TTL', default=3600)
+
+# Definitions, operations and paths are shown a part of at most this many
+# characters at a time, going no deeper than this many levels
+APIBOT_RENDER_MAX_CHARS = env.int('APIBOT_RENDER_MAX_CHARS', default=3000)
+APIBOT_RENDER_MAX_DEPTH = env.int('APIBOT_RENDER_MAX_DEPTH', default=6)
+
+# Answers about a spec are cached, per version of the spec, for this long
+# (seconds) in CACHES['default'], and the last APIBOT_RESPONSE_CACHE_SIZE
+# of them in each process.
+APIBOT_RESPONSE_CACHE_TTL = env.int('APIBOT_RESPONSE_CACHE_TTL', default=3600)
+APIBOT_RESPONSE_CACHE_SIZE = env.int('APIBOT_RESPONSE_CACHE_SIZE', default=1000)
+
+# Specs of new APIs are ingested by a job queue: in Redis when a URL is given,
+# for `manage.py run_jobs` workers, else in a background thread of the web process
+APIBOT_JOB_QUEUE_URL = env('APIBOT_JOB_QUEUE_URL', default='')
+APIBOT_JOB_QUEUE_THREAD = env.bool('APIBOT_JOB_QUEUE_THREAD', default=True)
+
+# Before gunicorn forks its workers, the specs of the most asked about APIs
+# are loaded, at most this many and for at most this long (seconds)
+APIBOT_WARMUP_COUNT = env.int('APIBOT_WARMUP_COUNT', default=50)
+APIBOT_WARMUP_BUDGET = env.float('APIBOT_WARMUP_BUDGET', default=30.0)
+
+# Whether answers of the bot tell how long each phase took in a Server-Timing header
+APIBOT_SERVER_TIMING = env.bool('APIBOT_SERVER_TIMING', default=True)
+
+# Bearer token Prometheus must send to read /metrics. When empty, only these
+# addresses may read it; behind a proxy, that is the address of the proxy.
+APIBOT_METRICS_TOKEN = env('APIBOT_METRICS_TOKEN', default='')
+APIBOT_METRICS_IPS = env.list('APIBOT_METRICS_IPS', default=['127.0.0.1', '::1'])
+
+# Extra handlers of bot actions, as dotted paths to BotHandler subclasses.
+# A handler replaces the built-in one answering the same action.
+APIBOT_BOT_HANDLERS = []
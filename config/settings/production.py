@@ -157,6 +157,9 @@ CACHES = {
     }
 }
 
+# Run the jobs of the bot in `manage.py run_jobs` workers
+APIBOT_JOB_QUEUE_URL = env('APIBOT_JOB_QUEUE_URL', default=REDIS_LOCATION)
+
 
 # Sentry Configuration
 SENTRY_DSN = env('DJANGO_SENTRY_DSN')
@@ -207,6 +210,17 @@ LOGGING = {
             'handlers': ['console', 'sentry', ],
             'propagate': False,
         },
+        'apibot.apis.warmup': {
+            'level': 'INFO',
+            'handlers': ['console', 'sentry', ],
+            'propagate': False,
+        },
+        # One line per bot request, with how long each phase took
+        'apibot.apis.timing': {
+            'level': 'INFO',
+            'handlers': ['console', ],
+            'propagate': False,
+        },
     },
 }
 SENTRY_CELERY_LOGLEVEL = env.int('DJANGO_SENTRY_LOG_LEVEL', logging.INFO)
@@ -42,6 +42,10 @@ CACHES = {
 # ------------------------------------------------------------------------------
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 
+# Jobs wait in the local queue until a test runs them
+APIBOT_JOB_QUEUE_URL = ''
+APIBOT_JOB_QUEUE_THREAD = False
+
 
 # PASSWORD HASHING
 # ------------------------------------------------------------------------------
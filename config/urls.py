@@ -4,6 +4,9 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.views import defaults as default_views
 from django.views.generic import TemplateView
+
+from apibot.apis.views import metrics_view
+
 api_patterns = [
     url(r'^apis/', include('apibot.apis.urls')),
 
@@ -24,6 +27,9 @@ urlpatterns = [
 
     url(r'^api/v1/', include(api_patterns)),
 
+    # Prometheus
+    url(r'^metrics$', metrics_view, name='metrics'),
+
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 if settings.DEBUG: